@@ -0,0 +1,144 @@
+import datetime
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+from pyecharts import options as opts
+from pyecharts.charts import HeatMap
+from streamlit_echarts import st_pyecharts
+
+try:
+    from src.data_loader.store import store_stamp
+    from src.data_loader.loader import list_factors
+    from src.factor_eval.correlation import FACTOR_CORR
+except ImportError:
+    st.error("无法导入本地模块: src.factor_eval.correlation，请检查路径。")
+
+# ------------------------------------------------------------------------
+# Constants & Config
+# ------------------------------------------------------------------------
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+DATA_DIR = BASE_DIR / "data"
+RAW_DATA_PATH = DATA_DIR / "raw" / "all"
+FACTOR_DIR = DATA_DIR / "factors"
+
+BOARD_OPTIONS = {'全市': 'all', '主板': 'main', '创业板': 'cy', '科创板': 'kc'}
+CORR_OPTIONS = {'截面 Pearson': 'pearson', '截面排名': 'rank', 'IC 序列': 'ic'}
+
+# ------------------------------------------------------------------------
+# 1. Computation Logic
+# ------------------------------------------------------------------------
+def data_stamp(factors: List[Tuple[str, str]]) -> str:
+    """行情与所选因子的写入标记, 数据更新后页面缓存失效"""
+    stamps = [store_stamp(RAW_DATA_PATH)] + [store_stamp(FACTOR_DIR / t / n) for t, n in factors]
+    return '|'.join(stamps)
+
+@st.cache_data
+def compute_correlation(
+    factors: Tuple[Tuple[str, str], ...],
+    board: str,
+    start_date: str,
+    end_date: str,
+    horizon: int,
+    stamp: str
+) -> Dict[str, pd.DataFrame]:
+    """多因子相关矩阵, 磁盘上按因子增量缓存 (新增一个因子只计算一行)"""
+    engine = FACTOR_CORR(start_date, end_date, board, horizon, price_root=RAW_DATA_PATH, factor_root=FACTOR_DIR)
+    return engine.run(list(factors))
+
+def top_pairs(corr: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """相关性绝对值最高的因子对"""
+    upper = np.triu(np.ones(corr.shape, dtype=bool), k=1)
+    pairs = corr.where(upper).stack().dropna().rename('corr').reset_index()
+    pairs.columns = ['因子 A', '因子 B', 'corr']
+    return pairs.reindex(pairs['corr'].abs().sort_values(ascending=False).index).head(n).reset_index(drop=True)
+
+# ------------------------------------------------------------------------
+# 2. Visualization Functions
+# ------------------------------------------------------------------------
+def plot_corr_heatmap(corr: pd.DataFrame, title: str):
+    """绘制相关系数热力图"""
+    if corr.empty:
+        return
+
+    labels = corr.index.tolist()
+    values = corr.to_numpy()
+    data = [
+        [j, i, None if np.isnan(values[i, j]) else round(float(values[i, j]), 3)]
+        for i in range(len(labels)) for j in range(len(labels))
+    ]
+    heatmap = HeatMap()
+    heatmap.add_xaxis(labels)
+    heatmap.add_yaxis("corr", labels, data, label_opts=opts.LabelOpts(is_show=len(labels) <= 20))
+    heatmap.set_global_opts(
+        title_opts=opts.TitleOpts(title=title),
+        xaxis_opts=opts.AxisOpts(type_="category", axislabel_opts=opts.LabelOpts(rotate=45)),
+        yaxis_opts=opts.AxisOpts(type_="category"),
+        visualmap_opts=opts.VisualMapOpts(min_=-1, max_=1, pos_right="0%", pos_top="center"),
+        tooltip_opts=opts.TooltipOpts(trigger="item"),
+        datazoom_opts=[opts.DataZoomOpts(type_="inside", xaxis_index=0), opts.DataZoomOpts(type_="inside", yaxis_index=0)],
+    )
+    height = max(500, min(1200, 20 * len(labels)))
+    st_pyecharts(heatmap, height=f"{height}px")
+
+# ------------------------------------------------------------------------
+# 3. Main Application
+# ------------------------------------------------------------------------
+def main():
+    st.sidebar.title("Configuration")
+
+    st.sidebar.subheader("1. 因子选择")
+    if not FACTOR_DIR.exists():
+        st.sidebar.error(f"目录不存在: {FACTOR_DIR}")
+        return
+
+    factor_dict = list_factors(FACTOR_DIR, cross_section=True)
+    selected_types = st.sidebar.multiselect("因子大类", list(factor_dict), default=list(factor_dict))
+    options = [f"{t}/{n}" for t in selected_types for n in factor_dict[t]]
+    selected = st.sidebar.multiselect("具体因子 (留空为全部)", options)
+    factors = tuple(tuple(key.split('/', 1)) for key in (selected or options))
+
+    board_label = st.sidebar.selectbox("股票池", list(BOARD_OPTIONS))
+    board = BOARD_OPTIONS[board_label]
+
+    st.sidebar.subheader("2. 时间范围")
+    default_start = datetime.date(2024, 1, 1)
+    default_end = datetime.date.today()
+    date_range = st.sidebar.date_input("选择日期区间", [default_start, default_end])
+    if len(date_range) != 2:
+        st.sidebar.warning("请选择完整的起止日期")
+        return
+    start_date_str, end_date_str = (d.strftime('%Y-%m-%d') for d in date_range)
+
+    st.sidebar.subheader("3. 分析参数")
+    corr_label = st.sidebar.radio("相关性", list(CORR_OPTIONS))
+    horizon = st.sidebar.number_input("IC 收益率周期", min_value=1, max_value=60, value=1)
+
+    st.title("多因子相关性")
+    st.markdown("___")
+    if len(factors) < 2:
+        st.info("请至少选择两个因子")
+        return
+
+    with st.spinner("Computing Correlation..."):
+        result = compute_correlation(
+            factors, board, start_date_str, end_date_str, int(horizon), data_stamp(list(factors))
+        )
+    corr = result[CORR_OPTIONS[corr_label]]
+
+    st.subheader(f"📊 {corr_label}相关矩阵")
+    if corr_label == 'IC 序列':
+        st.caption(f"各因子逐日 IC ({horizon} 日收益) 序列之间的相关系数")
+    else:
+        st.caption("逐日截面相关系数的时间均值")
+    plot_corr_heatmap(corr, corr_label)
+
+    st.subheader("🔗 高相关因子对")
+    st.dataframe(top_pairs(corr).style.format({'corr': "{:.3f}"}), use_container_width=True)
+
+    with st.expander("相关矩阵数据"):
+        st.dataframe(corr.style.format("{:.3f}").background_gradient(cmap='RdBu_r', vmin=-1, vmax=1))
+
+main()
@@ -7,6 +7,8 @@ from pyecharts import options as opts
 from pyecharts.charts import Kline, Line
 from streamlit_echarts import st_pyecharts
 
+from src.utils.downsample import ZOOM_EVENTS, downsample_ohlc, zoom_range, zoom_window
+
 
 
 
@@ -27,9 +29,13 @@ def load_index_data(index_name:str):
 # 2. func - plot
 #--------------------------
 @st.cache_data()
-def st_index_plot_01(index_data):
-    '''指数ohlc可视化'''
-    index_data = index_data.droplevel(1)
+def st_index_plot_01(index_data, window=None):
+    '''指数ohlc可视化
+
+    按可见日期区间 window 聚合 K 线 (区间内交易日不多时为日线, 区间外为粗粒度 K 线), 返回图表与横轴日期
+    '''
+    index_data = downsample_ohlc(index_data.droplevel(1), window=window)
+    range_start, range_end = zoom_range(index_data.index, window)
     kline = (
         Kline(
             init_opts=opts.InitOpts(width="100%", height="1000px")
@@ -53,13 +59,25 @@ def st_index_plot_01(index_data):
             tooltip_opts=opts.TooltipOpts(trigger="axis"),
             datazoom_opts=[
                 opts.DataZoomOpts(          # 缩放条
-                    range_start=0,          # 从0%
-                    range_end=100           # 到100%，即全宽
-                ), opts.DataZoomOpts(type_="inside")
+                    range_start=range_start,    # 未缩放时为 0% ~ 100%，即全宽
+                    range_end=range_end
+                ), opts.DataZoomOpts(type_="inside", range_start=range_start, range_end=range_end)
             ]
         )
     )
-    return kline
+    return kline, index_data.index
+
+
+@st.fragment
+def st_index_kline(index_data, key="index_kline"):
+    '''绘制指数 K 线; 缩放后只重跑本片段, 按新的可见区间重新聚合'''
+    window = st.session_state.get(f'{key}_window')
+    kline, shown = st_index_plot_01(index_data, window)
+    zoom = st_pyecharts(kline, height="500px", events=ZOOM_EVENTS, key=key)
+    if zoom and zoom != st.session_state.get(f'{key}_zoom'):
+        st.session_state[f'{key}_zoom'] = zoom
+        st.session_state[f'{key}_window'] = zoom_window(shown, zoom)
+        st.rerun(scope="fragment")
 
 
 
@@ -85,5 +103,4 @@ with col1:
     index_lst = [index_file.split('.')[0] for index_file in index_file_lst]
     select_index_name = st.selectbox("指数列表", index_lst, index=index_lst.index('上证指数'))  # 默认第一个指数
 index_data = load_index_data(select_index_name)
-kline = st_index_plot_01(index_data)
-st_pyecharts(kline, height="500px")
+st_index_kline(index_data)
@@ -1,5 +1,6 @@
 import os
-import yaml
+import uuid
+import hashlib
 import datetime
 import pandas as pd
 import numpy as np
@@ -17,6 +18,15 @@ from pyecharts.commons.utils import JsCode
 # Local Module (保留原有引用)
 try:
     from src.factor_eval.get_eval import EVALUATION
+    from src.data_loader.loader import board_stamp, list_factors, load_factor
+    from src.factor_calc.registry import FACTOR_REGISTRY
+    from src.data_loader.store import store_stamp
+    from src.factor_eval.artifacts import EVAL_ARTIFACTS
+    from src.factor_eval.portfolio import apply_cost, long_short_nav, simulate_groups
+    from src.factor_eval.jobs import JOBS, decay_job, evaluate_job
+    from src.factor_calc.panel import PANEL
+    from src.data_loader.service import DATA_SERVICE
+    from src.utils.downsample import ZOOM_EVENTS, downsample_lines, zoom_range, zoom_window
 except ImportError:
     st.error("无法导入本地模块: src.factor_eval.get_eval，请检查路径。")
     # 创建一个 dummy 类防止 IDE 报错，实际运行时会报错停止
@@ -30,117 +40,199 @@ except ImportError:
 # ------------------------------------------------------------------------
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data" # Path("./data")
-RAW_DATA_PATH = DATA_DIR / "raw" / "all.parquet"
+RAW_DATA_PATH = DATA_DIR / "raw" / "all"
 FACTOR_DIR = DATA_DIR / "factors"
 DESC_PATH = DATA_DIR / "factor_desc.yaml"
+ARTIFACTS = EVAL_ARTIFACTS()
 # print(123, RAW_DATA_PATH, FACTOR_DIR, DESC_PATH)
 # st.set_page_config(page_title="单因子分析", layout="wide")
 
 # ------------------------------------------------------------------------
 # 1. Data Loader
 # ------------------------------------------------------------------------
-@st.cache_data
-def load_base_data() -> pd.DataFrame:
-    """加载基础行情数据"""
-    if not RAW_DATA_PATH.exists():
-        st.error(f"数据文件不存在: {RAW_DATA_PATH}")
-        return pd.DataFrame()
-    return pd.read_parquet(RAW_DATA_PATH)
-
-@st.cache_data
-def load_factor_data(type_i: str, name: str) -> pd.DataFrame:
+BOARD_OPTIONS = {'全市': 'all', '主板': 'main', '创业板': 'cy', '科创板': 'kc'}
+WINSORIZE_OPTIONS = {'无': None, 'MAD (3倍)': ('mad', {'n': 3.0}), '分位数 (1%-99%)': ('quantile', {'lower': 0.01, 'upper': 0.99})}
+STANDARDIZE_OPTIONS = {'无': None, 'Z-Score': ('zscore', {}), '排名': ('rank', {})}
+
+# 缓存约定: 行情由 DATA_SERVICE 提供共享视图; 其余大对象用 st.cache_resource 按 (数据集键, 参数) 缓存, 各会话共享同一对象, 不做哈希与拷贝;
+# DataFrame 参数以 _ 开头不参与哈希, 由同时传入的 data_key / factor_key 标识其内容.
+# 共享对象只读使用 (开启 Copy-on-Write 后派生对象不会改动缓存), 不要原地修改返回值.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)       # pandas 3 起默认开启, 该选项已弃用
+def data_key(board: str, start_date: str, end_date: str) -> str:
+    """行情数据集键: 存储写入标记 + 股票池 (及其成分的标记) + 日期区间"""
+    return f"{store_stamp(RAW_DATA_PATH)}|{board}:{board_stamp(board)}|{start_date}|{end_date}"
+
+def factor_key(type_i: str, name: str, start_date: str, end_date: str) -> str:
+    """因子数据集键: 因子存储写入标记 + 日期区间"""
+    return f"{type_i}/{name}|{store_stamp(FACTOR_DIR / type_i / name)}|{start_date}|{end_date}"
+
+def load_price_panel(board: str, start_date: str, end_date: str, fields: List[str] = None) -> PANEL:
+    """行情面板: 进程内共享的 mmap 只读视图 (各会话不再各自持有一份行情), 数据文件更新后自动重载"""
+    return DATA_SERVICE.price(board, start_date, end_date, fields)
+
+@st.cache_resource(max_entries=16)
+def load_factor_data(type_i: str, name: str, start_date: str, end_date: str, key: str) -> pd.DataFrame:
     """加载因子数据"""
-    path = FACTOR_DIR / type_i / f"{name}.parquet"
-    if not path.exists():
-        st.error(f"因子文件不存在: {path}")
-        return pd.DataFrame()
-    return pd.read_parquet(path)
+    factor_df = load_factor(type_i, name, start_date, end_date, root=FACTOR_DIR)
+    if factor_df.empty:
+        st.error(f"因子文件不存在: {FACTOR_DIR / type_i / name}")
+    return factor_df
 
 @st.cache_data
 def load_factor_description(type_i: str, name: str) -> Dict[str, Any]:
-    """加载因子描述文件"""
-    if not DESC_PATH.exists():
-        return {}
-    with open(DESC_PATH, "r", encoding="utf-8") as f:
-        desc_dict = yaml.safe_load(f) or {}
+    """加载因子描述 (注册表元数据 + factor_desc.yaml)"""
+    desc_dict = FACTOR_REGISTRY.describe(DESC_PATH)
     return desc_dict.get(type_i, {}).get(name, {})
 
 # ------------------------------------------------------------------------
 # 2. Computation Logic
 # ------------------------------------------------------------------------
-@st.cache_data
-def compute_ic(
-    data: pd.DataFrame, 
-    factor_df: pd.DataFrame, 
-    ret_nd: List[int], 
-    ic_type: Literal['IC', 'Rank-IC']
+# 后台任务: 实时评价在进程池中执行, 页面只轮询进度; 相同参数的任务各会话共享,
+# 本会话参数变化时释放旧任务 (无其他会话需要时取消), 避免过期计算占用进程.
+JOB_POLL_SECONDS = 0.5
+
+def job_owner() -> str:
+    """本会话的任务提交者标识"""
+    if 'job_owner' not in st.session_state:
+        st.session_state['job_owner'] = uuid.uuid4().hex
+    return st.session_state['job_owner']
+
+def run_job(slot: str, key: str, func, **kwargs) -> Any:
+    """提交 (或复用) 后台任务; 完成时返回结果, 否则显示进度并返回 None (任务结束后整页重跑)"""
+    owner = job_owner()
+    previous = st.session_state.get(f'job_{slot}')
+    if previous is not None and previous != key:
+        JOBS.release(previous, owner)
+    st.session_state[f'job_{slot}'] = key
+
+    # 失败的任务显示一次错误; 之后由用户操作触发的重跑重新提交 (进度片段结束时的自动重跑不会循环重试)
+    status = JOBS.status(key)
+    if status['state'] == 'failed' and st.session_state.get(f'job_{slot}_failed') != key:
+        st.session_state[f'job_{slot}_failed'] = key
+        st.error(f"计算失败: {status['error']}")
+        return None
+    st.session_state.pop(f'job_{slot}_failed', None)
+    JOBS.submit(key, func, owner=owner, **kwargs)
+
+    status = JOBS.status(key)
+    if status['state'] == 'done':
+        return JOBS.result(key)
+    show_job_progress(key)
+    return None
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(key: str):
+    """定时刷新的进度条, 只重跑本片段, 页面其余部分保持可交互"""
+    status = JOBS.status(key)
+    if status['state'] not in ('pending', 'running'):
+        st.rerun()
+    st.progress(status['progress'], text=f"{status['stage']} ({status['progress']:.0%})")
+
+@st.cache_resource(max_entries=32)
+def load_ic_artifact(
+    type_i: str,
+    name: str,
+    board: str,
+    ret_nd: List[int],
+    ic_type: Literal['IC', 'Rank-IC'],
+    start_date: str,
+    end_date: str,
+    stamp: str
 ) -> pd.DataFrame:
-    """计算 IC 或 Rank-IC"""
-    evaluator = EVALUATION(data, factor_df, ret_nd)
-    method = 'pearson' if ic_type.lower() == 'ic' else 'spearman'
-    return evaluator.calc_IC(method)
-
-@st.cache_data
-def compute_grouped(
-    data: pd.DataFrame, 
-    factor_df: pd.DataFrame, 
-    ret_nd: List[int], 
-    quantile: Optional[int] = 10, 
-    bins: Optional[int] = None
+    """读取离线 IC 结果并按月取均值 (stamp 为结果的写入标记, 结果更新后缓存失效)"""
+    kind = 'ic' if ic_type.lower() == 'ic' else 'rank_ic'
+    columns = [f'IC_{nd}d' for nd in ret_nd]
+    ic_df = ARTIFACTS.read(kind, type_i, name, board, start_date, end_date, columns=columns)
+    return EVALUATION.monthly_IC(ic_df.dropna(how='all'))
+
+@st.cache_resource(max_entries=32)
+def load_grouped_artifact(
+    _factor_df: pd.DataFrame,
+    type_i: str,
+    name: str,
+    board: str,
+    ret_nd: List[int],
+    start_date: str,
+    end_date: str,
+    stamp: str,
+    factor_key: str
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """计算分组收益和描述统计"""
-    evaluator = EVALUATION(data, factor_df, ret_nd)
-    return evaluator.calc_grouped(quantile, bins)
-
-def calculate_hedged_curve(
-    ret_series: pd.Series, 
-    ret_horizon: int, 
+    """读取离线分组结果, 与 evaluate_job 的 describe / grouped 一致"""
+    desc_df = ARTIFACTS.read_describe(_factor_df, type_i, name, board, start_date, end_date)
+    columns = [f'{nd}d' for nd in ret_nd]
+    ret_grouped_df = ARTIFACTS.read('grouped', type_i, name, board, start_date, end_date, columns=columns)
+    return desc_df, ret_grouped_df
+
+def artifact_stamp(type_i: str, name: str, board: str) -> str:
+    meta = ARTIFACTS.meta(type_i, name, board) or {}
+    return f"{meta.get('price_stamp')}|{meta.get('factor_stamp')}"
+
+def portfolio_nav(
+    sim: Dict[str, np.ndarray],
+    dates: pd.DatetimeIndex,
+    cost: float,
     direction: str = 'L-S'
-) -> pd.DataFrame:
-    """
-    计算分组累计净值及多空对冲净值
-    逻辑优化：先算出收益率序列，再进行 cumprod
-    """
-    # 1. 原始分组收益 (ret_series 是 forward return)
-    # 假设输入 ret_series index 是日期, columns 是组别
-    # 需要将 forward return shift 回去对齐持有期，这里假设传入的已经是处理好的单期收益
-    # 如果 evaluator.calc_grouped 返回的是持有期收益(例如5日收益)，绘图时需要注意频率
-    
-    # 简单的复利计算: (1+r).cumprod()
-    cum_nav = (ret_series + 1).cumprod()
-    
-    # 2. 计算多空对冲 (Long - Short)
-    # 对冲收益率 = 多头组收益率 - 空头组收益率 (不考虑资金利用率减半，纯纯的 alpha)
-    cols = ret_series.columns
-    long_col = cols[-1] if direction == 'L-S' else cols[0]
-    short_col = cols[0] if direction == 'L-S' else cols[-1]
-    
-    hedged_ret = ret_series[long_col] - ret_series[short_col]
-    hedged_col_name = f"{long_col}-{short_col}"
-    
-    # 合并数据
-    final_df = cum_nav.copy()
-    final_df[hedged_col_name] = (hedged_ret + 1).cumprod()
-    
-    # 3. 归一化：起始点设为 1.0 (在最早日期前补一天)
-    start_date = final_df.index[0] - datetime.timedelta(days=1)
-    # 创建一行 1.0 的数据
-    initial_row = pd.DataFrame(1.0, index=[start_date], columns=final_df.columns)
-    final_df = pd.concat([initial_row, final_df]).sort_index()
-    
-    return final_df.round(4)
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """由未扣费的分组组合得到扣费后的分组净值与多空净值, 以及各组的平均日换手率 (调整成本无需重新模拟)"""
+    sim = apply_cost(sim, cost)
+    nav_df = long_short_nav(sim, dates, direction)
+    n_groups = sim['turnover'].shape[1]
+    turnover = pd.Series(sim['turnover'].mean(axis=0), index=np.arange(1, n_groups + 1, dtype=float))
+    return nav_df, turnover.loc[nav_df.columns[:-1]]
+
+@st.cache_resource(max_entries=32)
+def load_portfolio_artifact(
+    type_i: str,
+    name: str,
+    board: str,
+    horizon: int,
+    start_date: str,
+    end_date: str,
+    stamp: str
+) -> Tuple[Dict[str, np.ndarray], pd.DatetimeIndex]:
+    """由离线组号与收盘价模拟交错持有 horizon 日的分组组合 (未扣费)"""
+    dates, symbols, labels, n_groups = ARTIFACTS.read_labels(type_i, name, board, start_date, end_date)
+    price = load_price_panel(board, start_date, end_date, ['close'])
+    rows = price.dates.get_indexer(dates)
+    cols = price.symbols.get_indexer(symbols)
+    close = np.full((len(dates), len(symbols)), np.nan)
+    close[np.ix_(rows >= 0, cols >= 0)] = price.close[np.ix_(rows[rows >= 0], cols[cols >= 0])]
+    panel = PANEL(dates, symbols, {'close': close})
+    sim = simulate_groups(labels, panel.ret, n_groups, [horizon], cost=0.0)[horizon]
+    for arr in sim.values():
+        arr.setflags(write=False)       # 各会话共享; numpy 数组不受 Copy-on-Write 保护
+    return sim, panel.dates
 
 # ------------------------------------------------------------------------
 # 3. Plotting Functions
 # ------------------------------------------------------------------------
-def plot_ic_series(ic_df: pd.DataFrame):
+# 长序列图表先降采样再序列化: 可见区间 (缩放事件换算的日期区间, 存于 session_state) 内为全分辨率或 LTTB,
+# 区间外保留粗略轮廓; 缩放时只重跑图表所在的 fragment, 按新区间重新取点, 图表 JSON 大小与历史长度无关.
+def chart_window(key: str) -> Optional[Tuple]:
+    """图表当前的可见日期区间, 未缩放时为 None"""
+    return st.session_state.get(f'{key}_window')
+
+def update_chart_window(key: str, zoom: Optional[List[float]], shown: pd.DatetimeIndex):
+    """缩放后按新的可见区间重新降采样 (只重跑图表所在 fragment)"""
+    if zoom and zoom != st.session_state.get(f'{key}_zoom'):
+        st.session_state[f'{key}_zoom'] = zoom
+        st.session_state[f'{key}_window'] = zoom_window(shown, zoom)
+        st.rerun(scope="fragment")
+
+@st.fragment
+def plot_ic_series(ic_df: pd.DataFrame, key: str = "ic_chart"):
     """绘制 IC 时序图"""
     if ic_df.empty:
         st.warning("IC 数据为空")
         return
 
-    # 计算累计 IC
+    # 计算累计 IC (在全部日期上累计, 再降采样)
+    window = chart_window(key)
     cum_ic_df = ic_df.cumsum().round(3)
+    ic_df = downsample_lines(ic_df, window=window)
+    cum_ic_df = cum_ic_df.loc[ic_df.index]
+    range_start, range_end = zoom_range(ic_df.index, window)
     
     # 准备 X 轴
     x_axis = ic_df.index.strftime("%Y-%m-%d").tolist()
@@ -192,11 +284,12 @@ def plot_ic_series(ic_df: pd.DataFrame):
         xaxis_opts=opts.AxisOpts(type_="category"),
         yaxis_opts=opts.AxisOpts(name="IC Value", splitline_opts=opts.SplitLineOpts(is_show=True)),
         tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="cross"),
-        datazoom_opts=[opts.DataZoomOpts(range_start=0, range_end=100)],
+        datazoom_opts=[opts.DataZoomOpts(range_start=range_start, range_end=range_end)],
         legend_opts=opts.LegendOpts(selected_map=legend_selected, pos_top="5%")
     )
     
-    st_pyecharts(bar, height="500px")
+    zoom = st_pyecharts(bar, height="500px", events=ZOOM_EVENTS, key=key)
+    update_chart_window(key, zoom, ic_df.index)
 
 def plot_factor_distribution(desc_df: pd.DataFrame):
     """绘制因子分布图 (Bar + Kline)"""
@@ -268,11 +361,16 @@ def plot_factor_distribution(desc_df: pd.DataFrame):
     )
     st_pyecharts(bar, height="400px")
 
-def plot_cumulative_returns(nav_df: pd.DataFrame):
+@st.fragment
+def plot_cumulative_returns(nav_df: pd.DataFrame, key: str = "nav_chart"):
     """绘制分组累计收益曲线"""
     if nav_df.empty:
         return
 
+    window = chart_window(key)
+    nav_df = downsample_lines(nav_df, window=window)
+    range_start, range_end = zoom_range(nav_df.index, window)
+
     line = Line()
     x_axis = nav_df.index.strftime("%Y-%m-%d").tolist()
     line.add_xaxis(x_axis)
@@ -312,9 +410,61 @@ def plot_cumulative_returns(nav_df: pd.DataFrame):
         xaxis_opts=opts.AxisOpts(type_="category"),
         yaxis_opts=opts.AxisOpts(name="Net Value", is_scale=True, splitline_opts=opts.SplitLineOpts(is_show=True)),
         tooltip_opts=opts.TooltipOpts(trigger="axis"),
+        datazoom_opts=[opts.DataZoomOpts(range_start=range_start, range_end=range_end)],
+    )
+    zoom = st_pyecharts(line, height="600px", events=ZOOM_EVENTS, key=key)
+    update_chart_window(key, zoom, nav_df.index)
+
+def plot_ic_decay(decay_df: pd.DataFrame):
+    """绘制 IC 衰减曲线 (IC 均值柱 + ICIR 折线)"""
+    if decay_df.empty:
+        return
+
+    x_axis = [str(h) for h in decay_df.index]
+    bar = Bar()
+    bar.add_xaxis(x_axis)
+    bar.add_yaxis("IC Mean", decay_df['IC_mean'].round(4).tolist(), label_opts=opts.LabelOpts(is_show=False))
+
+    line = Line()
+    line.add_xaxis(x_axis)
+    line.add_yaxis(
+        "ICIR", decay_df['ICIR'].round(3).tolist(), yaxis_index=1,
+        symbol="none", label_opts=opts.LabelOpts(is_show=False)
+    )
+
+    bar.extend_axis(
+        yaxis=opts.AxisOpts(name="ICIR", position="right", splitline_opts=opts.SplitLineOpts(is_show=False))
+    )
+    bar.overlap(line)
+    bar.set_global_opts(
+        title_opts=opts.TitleOpts(title="IC 衰减"),
+        xaxis_opts=opts.AxisOpts(name="持有期", type_="category"),
+        yaxis_opts=opts.AxisOpts(name="IC Mean", splitline_opts=opts.SplitLineOpts(is_show=True)),
+        tooltip_opts=opts.TooltipOpts(trigger="axis"),
+    )
+    st_pyecharts(bar, height="400px")
+
+def plot_lines(df: pd.DataFrame, title: str, y_name: str):
+    """绘制多条时序折线"""
+    if df.empty:
+        return
+
+    line = Line()
+    line.add_xaxis(df.index.strftime("%Y-%m-%d").tolist())
+    for col in df.columns:
+        line.add_yaxis(
+            series_name=str(col), y_axis=df[col].round(4).tolist(),
+            symbol="none", label_opts=opts.LabelOpts(is_show=False)
+        )
+    line.set_global_opts(
+        title_opts=opts.TitleOpts(title=title),
+        xaxis_opts=opts.AxisOpts(type_="category"),
+        yaxis_opts=opts.AxisOpts(name=y_name, is_scale=True, splitline_opts=opts.SplitLineOpts(is_show=True)),
+        tooltip_opts=opts.TooltipOpts(trigger="axis"),
         datazoom_opts=[opts.DataZoomOpts(range_start=0, range_end=100)],
+        legend_opts=opts.LegendOpts(pos_top="5%"),
     )
-    st_pyecharts(line, height="600px")
+    st_pyecharts(line, height="400px")
 
 
 # ------------------------------------------------------------------------
@@ -330,15 +480,16 @@ def main():
         st.sidebar.error(f"目录不存在: {FACTOR_DIR}")
         return
 
-    factor_types = [d.name for d in FACTOR_DIR.iterdir() if d.is_dir()]
+    factor_dict = list_factors(FACTOR_DIR, cross_section=True)
+    factor_types = list(factor_dict)
     selected_type = st.sidebar.selectbox("因子大类", factor_types, index=1 if factor_types else None)
     
-    factor_names = []
-    if selected_type:
-        type_path = FACTOR_DIR / selected_type
-        factor_names = [f.stem for f in type_path.glob("*.parquet")]
+    factor_names = factor_dict.get(selected_type, [])
     selected_name = st.sidebar.selectbox("具体因子", factor_names)
 
+    board_label = st.sidebar.selectbox("股票池", list(BOARD_OPTIONS))
+    board = BOARD_OPTIONS[board_label]
+
     # Date Selection
     st.sidebar.subheader("2. 时间范围")
     # 默认值，实际应从数据中获取
@@ -360,9 +511,11 @@ def main():
     
     ret_lags_str = st.sidebar.text_input("收益率周期 (逗号分隔)", "1, 5, 10, 22")
     try:
-        ret_nds = [int(x.strip()) for x in ret_lags_str.split(',') if x.strip().isdigit()]
+        ret_nds = [int(x.strip()) for x in ret_lags_str.split(',') if x.strip().isdigit() and int(x.strip()) >= 1]
     except:
         ret_nds = [1, 5, 10]
+    if not ret_nds:
+        ret_nds = [1, 5, 10]
         
     group_mode = st.sidebar.selectbox("分组方式", ["Quantile", "Bins"])
     group_num = st.sidebar.number_input("分组数量", min_value=2, max_value=50, value=10)
@@ -371,22 +524,39 @@ def main():
     st.title(f"{selected_name}")
     st.markdown("___")
 
+    # Preprocessing
+    st.sidebar.subheader("4. 因子预处理")
+    winsorize_mode = st.sidebar.selectbox("去极值", list(WINSORIZE_OPTIONS))
+    standardize_mode = st.sidebar.selectbox("标准化", list(STANDARDIZE_OPTIONS))
+    neutralize_by = st.sidebar.multiselect("中性化", ["市值", "板块"])
+    steps = [step for step in [WINSORIZE_OPTIONS[winsorize_mode], STANDARDIZE_OPTIONS[standardize_mode]] if step]
+    if neutralize_by:
+        steps.append(('neutralize', {'size': "市值" in neutralize_by, 'board': "板块" in neutralize_by}))
+
+    params = {'quantile': group_num, 'bins': None} if group_mode == "Quantile" else {'quantile': None, 'bins': group_num}
+
     # 1. Load Data
+    # 离线评价结果覆盖所选参数且与当前行情 / 因子存储一致时直接读取 (仅原始因子), 否则提交后台任务实时计算
+    roots = dict(price_root=RAW_DATA_PATH, factor_root=FACTOR_DIR)
+    ic_cached = not steps and ARTIFACTS.covers(selected_type, selected_name, board, ret_nds, **roots)
+    grouped_cached = ic_cached and ARTIFACTS.covers(selected_type, selected_name, board, ret_nds, **params, **roots)
+    stamp = artifact_stamp(selected_type, selected_name, board)
+    price_key = data_key(board, start_date_str, end_date_str)
+    raw_factor_key = factor_key(selected_type, selected_name, start_date_str, end_date_str)
     with st.spinner("Loading Data..."):
-        full_data = load_base_data()
-        full_factor = load_factor_data(selected_type, selected_name)
-        
-        if full_data.empty or full_factor.empty:
-            st.error("数据加载失败")
-            return
+        factor_df = load_factor_data(selected_type, selected_name, start_date_str, end_date_str, raw_factor_key)
+    if factor_df.empty:
+        st.error("数据加载失败")
+        return
+    if not grouped_cached and not RAW_DATA_PATH.exists():
+        st.error(f"数据文件不存在: {RAW_DATA_PATH}")
+        return
 
-        # Slicing
-        data = full_data.loc[start_date_str:end_date_str]
-        factor_df = full_factor.loc[start_date_str:end_date_str]
-        
-        if data.empty or factor_df.empty:
-            st.warning("选定区间无数据")
-            return
+    job_args = dict(
+        factor_type=selected_type, factor_name=selected_name, board=board,
+        start_date=start_date_str, end_date=end_date_str, steps=steps,
+    )
+    eval_key = f"evaluate|{price_key}|{raw_factor_key}|{ret_nds}|{params}|{steps}"
 
     # 2. Factor Description
     st.subheader("📌 因子描述")
@@ -409,9 +579,22 @@ def main():
     st.markdown("---")
     st.subheader("📊 IC 分析")
     
-    ic_df = compute_ic(data, factor_df, ret_nds, ic_mode)
-    # 按时间切片，因为 EVALUATION 计算可能包含所有时间
-    ic_df = ic_df.loc[start_date_str:end_date_str]
+    result = None
+    if not grouped_cached:
+        fingerprint = hashlib.blake2b(price_key.encode(), digest_size=16).hexdigest()
+        result = run_job('evaluate', eval_key, evaluate_job, ret_nd=ret_nds, fingerprint=fingerprint, **params, **job_args)
+        if result is None:
+            return
+        if result['empty']:
+            st.warning("选定区间无数据")
+            return
+
+    if ic_cached:
+        ic_df = load_ic_artifact(selected_type, selected_name, board, ret_nds, ic_mode, start_date_str, end_date_str, stamp)
+    else:
+        ic_df = result['ic']['pearson' if ic_mode == 'IC' else 'spearman']
+        # 按时间切片，因为 EVALUATION 计算可能包含所有时间
+        ic_df = ic_df.loc[start_date_str:end_date_str]
     plot_ic_series(ic_df)
     
     # IC 统计表
@@ -437,9 +620,10 @@ def main():
     st.markdown("---")
     st.subheader("📈 分组回测")
 
-    params = {'quantile': group_num, 'bins': None} if group_mode == "Quantile" else {'quantile': None, 'bins': group_num}
-    
-    desc_df, ret_grouped_df = compute_grouped(data, factor_df, ret_nds, **params)
+    if grouped_cached:
+        desc_df, ret_grouped_df = load_grouped_artifact(factor_df, selected_type, selected_name, board, ret_nds, start_date_str, end_date_str, stamp, raw_factor_key)
+    else:
+        desc_df, ret_grouped_df = result['describe'], result['grouped']
     
     # 4.1 分布图
     st.markdown("#### 因子分层分布")
@@ -449,49 +633,61 @@ def main():
     st.markdown("#### 分组累计净值")
     cols = st.columns(5)
     with cols[0]:
-        selected_lag = st.selectbox("选择回测周期 (Ret Lag)", ret_grouped_df.columns, index=0)
+        selected_lag = st.selectbox("持有期 (Ret Lag)", ret_grouped_df.columns, index=0)
     with cols[1]:
         ls_dir = st.radio("对冲方向", ["Long-Short (L-S)", "Short-Long (S-L)"], horizontal=True)
+    with cols[2]:
+        cost_permille = st.number_input("单边交易成本 (‰)", min_value=0.0, max_value=10.0, value=0.0, step=0.5)
     direction_code = 'L-S' if ls_dir.startswith('L') else 'S-L'
+    cost = cost_permille / 1000
 
-    # 处理收益率数据
-    # 假设 ret_grouped_df 是 MultiIndex 或者列名包含周期信息
-    # 这里根据原代码逻辑提取特定周期的 Series
-    try:
-        # 提取特定周期的分组收益，假设结构为: Index=Date, Columns=[Lag1_G1, Lag1_G2...] 或 MultiIndex
-        # 原代码逻辑较为特定，这里做通用假设：ret_grouped_df 列名为 '1d', '5d' 等，值为 list 或 dict
-        # 但通常 grouped_ret 是 DataFrame: index=date, columns=MultiIndex(lag, group)
-        
-        # 假设 evaluator 返回的是：列为 (lag, group) 的 DataFrame
-        if isinstance(ret_grouped_df.columns, pd.MultiIndex):
-            # 取出选定 lag 的数据
-            subset = ret_grouped_df[selected_lag] # 得到 columns 为 group 的 df
-        else:
-            # 兼容原代码的某些特定返回结构，如果 evaluator 返回的是 Series 包含 dict 等
-            # 这里暂时保留原代码逻辑的影子，但建议 evaluator 返回标准 DF
-            # 下面模拟原代码的 unstack().T 逻辑，视实际数据结构而定
-            # 假设: ret_grouped_df 是 index=date, columns=lag, values=分组收益Series
-            pass 
-            # ！！！注意：由于看不到 EVALUATION 的内部实现，这里使用原代码逻辑进行适配
-            subset = ret_grouped_df[selected_lag].unstack().T.dropna()
-        
-        # 采样频率处理：如果持有期是 5天，理论上应每5天调仓，或者看成重叠收益
-        # 为了展示简单，这里按日展示，但需注意复利逻辑
-        ret_horizon_days = int(''.join(filter(str.isdigit, str(selected_lag))))
-        
-        # 重采样以匹配持有期 (可选，原代码有 ::int(selected_nd[:-1]) 逻辑)
-        # 如果是重叠收益，直接 cumprod 会夸大。如果是单期独立收益，需要降采样。
-        # 采用原代码逻辑：降采样
-        subset_resampled = subset.iloc[::ret_horizon_days]
-        
-        nav_data = calculate_hedged_curve(subset_resampled, ret_horizon_days, direction_code)
-        
-        # st.markdown(f"#### 分组累计净值 ({selected_lag}, {direction_code})")
+    # 持有期为 n 日时, 资金分为 n 个交错调仓的子组合, 使用全部日期而非每 n 日采样
+    ret_horizon_days = int(''.join(filter(str.isdigit, str(selected_lag))))
+    if grouped_cached:
+        sim, sim_dates = load_portfolio_artifact(
+            selected_type, selected_name, board, ret_horizon_days, start_date_str, end_date_str, stamp
+        )
+    else:
+        sim, sim_dates = result['portfolio'][ret_horizon_days], result['dates']
+    nav_data, turnover = portfolio_nav(sim, sim_dates, cost, direction_code)
+
+    if nav_data.empty:
+        st.info("所选股票池与区间内没有分组成分, 无法计算分组净值")
+    else:
         plot_cumulative_returns(nav_data)
-        
-    except Exception as e:
-        st.error(f"处理分组收益数据时出错: {e}")
-        st.write("Raw Data Debug:", ret_grouped_df.head())
+        st.caption(
+            f"平均日换手率: 第 {turnover.index[0]:.0f} 组 {turnover.iloc[0]:.2%}, "
+            f"第 {turnover.index[-1]:.0f} 组 {turnover.iloc[-1]:.2%}"
+        )
+
+    # 5. Decay & Turnover
+    st.markdown("---")
+    st.subheader("⏳ 衰减与换手")
 
+    max_horizon = st.slider("IC 衰减最长持有期", min_value=5, max_value=120, value=60, step=5)
+    decay_key = f"decay|{price_key}|{raw_factor_key}|{max_horizon}|{params}|{steps}"
+    decay = run_job('decay', decay_key, decay_job, max_horizon=max_horizon, **params, **job_args)
+    if decay is None:
+        return
+    decay_df, autocorr_df, group_turnover_df = decay
+
+    plot_ic_decay(decay_df)
+    c1, c2 = st.columns(2)
+    with c1:
+        plot_lines(autocorr_df, "因子排名自相关", "Autocorr")
+    with c2:
+        edge_turnover = pd.DataFrame({
+            'Top': group_turnover_df[('top', 'lag_1')],
+            'Bottom': group_turnover_df[('bottom', 'lag_1')],
+        })
+        plot_lines(edge_turnover, "首尾组日换手率", "Turnover")
+
+    st.markdown("**衰减与换手摘要 (均值)**")
+    summary = pd.DataFrame({
+        'Rank Autocorr': autocorr_df.mean(),
+        'Top Turnover': group_turnover_df['top'].mean(),
+        'Bottom Turnover': group_turnover_df['bottom'].mean(),
+    }).T
+    st.dataframe(summary.style.format("{:.3f}"))
 
 main()
\ No newline at end of file
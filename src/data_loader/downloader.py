@@ -0,0 +1,180 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : downloader.py
+@Date    : 2026-10-18 14:02:11
+@Author  : DDB
+@Version : 1.0
+@Desc    : 按 symbol × 日期分片的并发下载引擎
+'''
+
+import os
+import time
+import random
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from typing import *
+
+
+
+def format_history(piece:pd.DataFrame) -> pd.DataFrame:
+    """将掘金 history 返回的原始数据整理为 MultiIndex(date, symbol) 格式"""
+    if piece is None or piece.empty:
+        return pd.DataFrame()
+    piece = piece.copy()
+    piece['eob'] = pd.to_datetime(piece['eob'])
+    if piece['eob'].dt.tz is not None:
+        piece['eob'] = piece['eob'].dt.tz_localize(None)
+    piece = piece.set_index(['eob', 'symbol']).drop(['frequency', 'position', 'bob'], axis=1, errors='ignore')
+    piece.index.names = ['date', 'symbol']
+    return piece
+
+
+
+class RATE_LIMITER:
+    '''线程安全的请求限速器（每秒最多 rate 次请求）'''
+    def __init__(self, rate:float=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+
+class DOWNLOADER:
+    '''分片并发下载器
+
+    将 symbol 列表与日期区间同时切片, 在有界线程池中并发调用 history,
+    每个分片独立重试/退避, 完成后直接落盘, 避免在内存中堆积全部分片.
+    '''
+    def __init__(
+        self,
+        history_func:Callable = None,
+        max_workers:int = 8,
+        symbols_per_shard:int = 300,
+        max_retries:int = 3,
+        backoff:float = 1.0,
+        rate_limit:float = 10.0,
+    ):
+        """_summary_
+
+        Args:
+            history_func (Callable, optional): 行情接口, 签名同 gm.api.history. 默认使用掘金 history, 测试时可传入本地桩函数.
+            max_workers (int, optional): 线程池大小.
+            symbols_per_shard (int, optional): 每个分片包含的 symbol 数量.
+            max_retries (int, optional): 单个分片的最大重试次数.
+            backoff (float, optional): 退避基数(秒), 第 k 次重试等待 backoff * 2**k.
+            rate_limit (float, optional): 每秒最多请求次数, None 表示不限速.
+        """
+        if history_func is None:
+            from gm.api import history as history_func
+        self.history_func = history_func
+        self.max_workers = max_workers
+        self.symbols_per_shard = symbols_per_shard
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = RATE_LIMITER(rate_limit)
+
+
+    def make_shards(
+        self,
+        symbol_list:List[str],
+        start_date:str,
+        end_date:str,
+        split:int = 1
+    ) -> List[Tuple[List[str], str, str]]:
+        """按 symbol 与日期区间生成分片 [(symbols, start, end), ...]"""
+        if isinstance(symbol_list, str):
+            symbol_list = symbol_list.split(',')
+        n_sym = max(int(np.ceil(len(symbol_list) / self.symbols_per_shard)), 1)
+        symbol_chunks = [list(chunk) for chunk in np.array_split(symbol_list, n_sym) if len(chunk)]
+
+        dates = pd.date_range(start_date, end_date).strftime('%Y-%m-%d')
+        if split > 1 and len(dates) > 1:
+            date_chunks = [(chunk[0], chunk[-1]) for chunk in np.array_split(dates, int(split)) if len(chunk)]
+        else:
+            date_chunks = [(start_date, end_date)]
+
+        return [(symbols, start, end) for start, end in date_chunks for symbols in symbol_chunks]
+
+
+    def fetch_shard(self, shard:Tuple[List[str], str, str], freq:str='1d', adj:int=1) -> pd.DataFrame:
+        """下载单个分片, 失败时指数退避重试"""
+        symbols, start, end = shard
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait()
+            try:
+                piece = self.history_func(symbols, frequency=freq, start_time=start, end_time=end, adjust=adj, df=True)
+                return format_history(piece)
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self.backoff * 2**attempt * (1 + random.random() * 0.1))
+
+
+    def run(
+        self,
+        symbol_list:List[str],
+        start_date:str,
+        end_date:str,
+        split:int = 1,
+        freq:str = '1d',
+        adj:int = 1,
+        save_dir:str | Path = None,
+        progress:bool = True,
+    ) -> pd.DataFrame | List[Path]:
+        """并发下载全部分片
+
+        Args:
+            save_dir (str | Path, optional): 分片落盘目录. 指定时每个分片完成即写入
+                `part-xxxxx.parquet` 并返回文件列表; 否则返回合并后的 DataFrame.
+
+        Returns:
+            pd.DataFrame | List[Path]: 行情数据或分片文件列表
+        """
+        shards = self.make_shards(symbol_list, start_date, end_date, split)
+        if save_dir is not None:
+            save_dir = Path(save_dir)
+            save_dir.mkdir(parents=True, exist_ok=True)
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.fetch_shard, shard, freq, adj): i for i, shard in enumerate(shards)}
+            for future in tqdm(as_completed(futures), total=len(futures), disable=not progress):
+                i = futures[future]
+                piece = future.result()
+                if piece.empty:
+                    continue
+                if save_dir is None:
+                    results[i] = piece
+                else:
+                    results[i] = self._write_part(piece, save_dir / f'part-{i:05d}.parquet')
+
+        ordered = [results[i] for i in sorted(results)]
+        if save_dir is not None:
+            return ordered
+        if not ordered:
+            return pd.DataFrame()
+        return pd.concat(ordered, axis=0).sort_index()
+
+
+    @staticmethod
+    def _write_part(piece:pd.DataFrame, path:Path) -> Path:
+        """先写临时文件再原子替换, 中断时不会留下半个分片"""
+        tmp_path = path.with_suffix('.tmp')
+        piece.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        return path
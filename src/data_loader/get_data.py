@@ -14,12 +14,14 @@ from gm.api import *
 
 ## local
 from src.data_loader.read_token import get_token
+from src.data_loader.downloader import DOWNLOADER
+from src.data_loader.store import PARQUET_STORE
+from src.data_loader.symbols import SYMBOL_META_PATH, board_symbols, is_meta_fresh, load_symbol_meta, save_symbol_meta
 
 ## research needed
 from datetime import datetime
-import numpy as np
+from pathlib import Path
 import pandas as pd
-from tqdm import tqdm
 from typing import *
 
 
@@ -36,6 +38,19 @@ class GOLDMINE:
 
 
 
+    def get_symbol_meta(self, refresh:bool=False, ttl:float=86400) -> pd.DataFrame:
+        """获取股票元数据表 (board, listed_date, delisted_date), 本地缓存 ttl 秒
+
+        Args:
+            refresh (bool): 是否强制从掘金重新拉取
+            ttl (float): 缓存有效期 (秒)
+        """
+        if refresh or not is_meta_fresh(SYMBOL_META_PATH, ttl):
+            data = get_symbols(sec_type1=1010, sec_type2=101001, df=True)
+            save_symbol_meta(data, SYMBOL_META_PATH)
+        return load_symbol_meta(SYMBOL_META_PATH)
+
+
     def get_symbols(
             self, 
             type:Literal['all', 'main', 'cy', 'kc']='all', 
@@ -47,26 +62,7 @@ class GOLDMINE:
             type (Literal[&#39;all&#39;, &#39;main&#39;, &#39;cy&#39;, &#39;kc&#39;]): ['全市', '主板', '创业', '科创']
             is_trade (bool): 筛选是否已经退市
         """
-        data = get_symbols(sec_type1=1010, sec_type2=101001, df=True)
-        type_lower = type.lower()
-        type_dict = {
-            'main': 10100101,
-            'cy': 10100102,
-            'kc': 10100103
-        }
-
-        if is_trade:
-            data = data[(data['delisted_date'] >= '2038-01-01')]
-
-        # 全 A 股
-        if type_lower == 'all':
-            symbols = data['symbol'].tolist()
-        # A 股主板
-        else:
-            data = data[data.board == type_dict[type_lower]]
-            symbols = data['symbol'].tolist()
-
-        return symbols
+        return board_symbols(self.get_symbol_meta(), type, is_trade)
     
 
     def get_ohlcv(
@@ -76,32 +72,100 @@ class GOLDMINE:
         end_date:str = None,
         split:int = 1,
         freq:str = '1d',
-        adj:int = 1
-    ) -> pd.DataFrame:
-        
+        adj:int = 1,
+        max_workers:int = 8,
+        symbols_per_shard:int = 300,
+        save_dir:str = None
+    ) -> pd.DataFrame | List[Path]:
+        """获取行情数据, 按 symbol × 日期分片并发下载
+
+        Args:
+            split (int, optional): 日期区间切分数量.
+            max_workers (int, optional): 并发线程数, 1 即串行.
+            symbols_per_shard (int, optional): 每个分片的 symbol 数量.
+            save_dir (str, optional): 指定时分片完成即落盘, 返回分片文件列表.
+        """
         if not symbol_list: 
             symbol_list = self.get_symbols()
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
-        
-        price_list = []
-        if split > 1:
-            dateRange = np.array_split(pd.date_range(start_date, end_date).strftime('%Y-%m-%d'), int(split))
-            for Range in tqdm(dateRange):
-                piece = history(symbol_list, frequency=freq, start_time=Range[0], end_time=Range[-1], adjust=adj, df=True)
-                price_list.append(piece)
-        else:
-            piece = history(symbol_list, frequency=freq, start_time=start_date, end_time=end_date, adjust=adj, df=True)
-            price_list.append(piece)
-
-        price = pd.concat(price_list, axis=0)
-        if price.empty: 
-            return pd.DataFrame()
-        price.eob = price.eob.dt.tz_localize(None)
-        price = price.set_index(['eob', 'symbol']).drop(['frequency', 'position', 'bob'], axis=1)
-        price.index.names = ['date', 'symbol']
-        return price
-    
+
+        loader = DOWNLOADER(history, max_workers=max_workers, symbols_per_shard=symbols_per_shard)
+        return loader.run(symbol_list, start_date, end_date, split=split, freq=freq, adj=adj, save_dir=save_dir)
+
+
+    def update_ohlcv(
+        self,
+        store_dir:str | Path,
+        symbol_list:List[str] = None,
+        start_date:str = '2024-01-01',
+        back_days:int = 5,
+        adj:int = 1,
+        rtol:float = 1e-6,
+        **kwargs
+    ) -> Dict[str, int]:
+        """增量更新行情存储, 只下载缺失的交易日
+
+        - 已有 symbol: 一次性从最早的最后日期往前 back_days 个交易日开始下载,
+          重叠区间与已存数据比对, 前复权价格变化(除权除息)的 symbol 重新下载全历史并替换;
+          元数据表中已退市且退市前数据已入库的 symbol 跳过
+        - 新上市 symbol: 从 start_date 开始下载
+        - 新数据以新分片的形式原子追加
+
+        Args:
+            store_dir (str | Path): PARQUET_STORE 目录.
+            back_days (int, optional): 用于检查复权因子变化的回看交易日数.
+            rtol (float, optional): 判断价格变化的相对容差.
+
+        Returns:
+            Dict[str, int]: 各类更新的 symbol 数量
+        """
+        store = PARQUET_STORE(store_dir)
+        if not symbol_list:
+            symbol_list = self.get_symbols()
+        end_date = datetime.now().strftime('%Y-%m-%d')
+
+        last_dates = store.last_dates()
+        new_symbols = [s for s in symbol_list if s not in last_dates.index]
+        old_last = last_dates[last_dates.index.isin(symbol_list)]
+        delisted = self.get_symbol_meta().set_index('symbol')['delisted_date']
+        ended = (delisted.reindex(old_last.index) <= old_last).to_numpy()
+        old_last = old_last[~ended]
+
+        ## 1. 已有 symbol: 一次下载全部回看窗口, 一次读取重叠区间
+        appended, adjusted = [], []
+        if len(old_last):
+            earliest = old_last.min()
+            trade_dates = store.dates(start_date=earliest - pd.Timedelta(days=2 * back_days + 30))     # 只需最早日期之前的 back_days 个交易日
+            window_start = trade_dates[max(trade_dates.searchsorted(earliest) - back_days, 0)]
+            symbols = old_last.index.tolist()
+            fresh = self.get_ohlcv(symbols, start_date=window_start.strftime('%Y-%m-%d'), end_date=end_date, adj=adj, **kwargs)
+            if not fresh.empty:
+                ## 比对重叠区间
+                stored = store.read(window_start, symbols=symbols, columns=['close'])
+                overlap = fresh[['close']].join(stored, how='inner', rsuffix='_stored')
+                changed = overlap.close.sub(overlap.close_stored).abs() > rtol * overlap.close_stored.abs()
+                adjusted = changed[changed].index.get_level_values('symbol').unique().tolist()
+
+                dates = fresh.index.get_level_values('date')
+                symbols_idx = fresh.index.get_level_values('symbol')
+                after_last = dates > old_last.reindex(symbols_idx).to_numpy()
+                appended.append(fresh[after_last & ~symbols_idx.isin(adjusted)])
+
+        store.append(pd.concat(appended) if appended else None)
+
+        ## 2. 复权变化的 symbol 重新下载全历史
+        if adjusted:
+            history_data = self.get_ohlcv(adjusted, start_date=start_date, end_date=end_date, adj=adj, **kwargs)
+            store.mark_replaced(adjusted)       # 因子增量更新据此重算这些 symbol 的全历史
+            store.replace_symbols(history_data, adjusted)
+
+        ## 3. 新上市 symbol
+        if new_symbols:
+            store.append(self.get_ohlcv(new_symbols, start_date=start_date, end_date=end_date, adj=adj, **kwargs))
+
+        return {'appended': len(old_last) - len(adjusted), 'adjusted': len(adjusted), 'new': len(new_symbols), 'delisted': int(ended.sum())}
+
 
 
 
@@ -110,11 +174,11 @@ if __name__ == '__main__':
     
     gm = GOLDMINE()
 
-    # 加载个股
-    for symbol_type in tqdm(['all', 'main', 'cy', 'kc']):
-        symbols = gm.get_symbols(symbol_type)
-        data = gm.get_ohlcv(symbols, start_date='2024-01-01', adj=1, split=int(len(symbols)/300))
-        data.to_parquet(rf'./data/raw/{symbol_type}.parquet')
+    # 加载个股 (全市场一次增量更新, 板块数据在读取时按元数据表筛选)
+    store_dir = r'./data/raw/all'
+    PARQUET_STORE(store_dir).migrate_from(r'./data/raw/all.parquet')
+    gm.get_symbol_meta(refresh=True)
+    print(gm.update_ohlcv(store_dir, gm.get_symbols('all'), start_date='2024-01-01', adj=1))
 
     # 加载指数
     index_symbol = 'SHSE.000001'
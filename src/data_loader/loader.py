@@ -0,0 +1,118 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : loader.py
+@Date    : 2026-10-18 17:02:55
+@Author  : DDB
+@Version : 1.0
+@Desc    : 行情/因子数据读取接口 (日期、symbol、列过滤下推)
+'''
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+from typing import *
+
+from src.data_loader.store import PARQUET_STORE
+from src.data_loader.symbols import SYMBOL_META_PATH, board_symbols, load_symbol_meta
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+DATA_DIR = BASE_DIR / "data"
+RAW_DIR = DATA_DIR / "raw" / "all"
+FACTOR_DIR = DATA_DIR / "factors"
+
+
+
+def load_price(
+    start_date:str = None,
+    end_date:str = None,
+    symbols:List[str] = None,
+    columns:List[str] = None,
+    board:Literal['all', 'main', 'cy', 'kc'] = 'all',
+    root:str | Path = RAW_DIR
+) -> pd.DataFrame:
+    """读取行情数据
+
+    Args:
+        start_date (str, optional): 起始日期 (含).
+        end_date (str, optional): 结束日期 (含).
+        symbols (List[str], optional): 只读取的 symbol.
+        columns (List[str], optional): 只读取的列, 如 ['close'].
+        board (Literal['all', 'main', 'cy', 'kc'], optional): 板块, 依据元数据表筛选.
+    """
+    if board != 'all' and SYMBOL_META_PATH.exists():
+        board_list = board_symbols(load_symbol_meta(), board)
+        symbols = board_list if symbols is None else [s for s in symbols if s in set(board_list)]
+    return PARQUET_STORE(root).read(start_date, end_date, symbols, columns)
+
+
+def board_stamp(board:str) -> str:
+    """股票池成分的写入标记: 非全市场时由元数据表 (定期刷新) 决定, 取其大小与修改时间"""
+    if board == 'all' or not SYMBOL_META_PATH.exists():
+        return ''
+    stat = SYMBOL_META_PATH.stat()
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def factor_store(factor_type:str, factor_name:str, root:str | Path=FACTOR_DIR) -> PARQUET_STORE:
+    """因子存储目录 data/factors/<type>/<name>/"""
+    return PARQUET_STORE(Path(root) / factor_type / factor_name)
+
+
+def list_factors(root:str | Path=FACTOR_DIR, cross_section:bool=False) -> Dict[str, List[str]]:
+    """列出全部因子 {factor_type: [factor_name, ...]}, 兼容旧的单文件因子
+
+    Args:
+        cross_section (bool, optional): 只列出 MultiIndex(date, symbol) 的截面因子,
+            跳过按日期的市场因子 (如 emotion/upDownCount); 因子库整体评价时使用
+    """
+    root = Path(root)
+    if not root.is_dir():
+        return {}
+    factors = {}
+    for type_path in sorted(p for p in root.iterdir() if p.is_dir()):
+        names = {p.stem for p in type_path.glob('*.parquet') if p.is_file()}
+        names |= {p.name for p in type_path.iterdir() if p.is_dir() and PARQUET_STORE(p).exists()}
+        if cross_section:
+            names = {name for name in names if is_cross_section(type_path.name, name, root)}
+            if not names:
+                continue
+        factors[type_path.name] = sorted(names)
+    return factors
+
+
+def is_cross_section(factor_type:str, factor_name:str, root:str | Path=FACTOR_DIR) -> bool:
+    """因子是否以 MultiIndex(date, symbol) 存储 (只读取首个分片的 schema)"""
+    files = factor_store(factor_type, factor_name, root).files()
+    path = files[0] if files else Path(root) / factor_type / f'{factor_name}.parquet'
+    if not path.is_file():
+        return False
+    meta = pq.read_schema(path).pandas_metadata or {}
+    return 'symbol' in meta.get('index_columns', [])
+
+
+def load_factor(
+    factor_type:str,
+    factor_name:str,
+    start_date:str = None,
+    end_date:str = None,
+    symbols:List[str] = None,
+    root:str | Path = FACTOR_DIR
+) -> pd.DataFrame:
+    """读取单个因子, 兼容旧的单文件因子 <type>/<name>.parquet"""
+    store = factor_store(factor_type, factor_name, root)
+    if store.exists():
+        return store.read(start_date, end_date, symbols)
+
+    legacy_path = Path(root) / factor_type / f'{factor_name}.parquet'
+    if not legacy_path.is_file():
+        return pd.DataFrame()
+    filters = []
+    if start_date is not None:
+        filters.append(('date', '>=', pd.Timestamp(start_date)))
+    if end_date is not None:
+        filters.append(('date', '<=', pd.Timestamp(end_date)))
+    if symbols is not None:
+        filters.append(('symbol', 'in', list(symbols)))
+    return pd.read_parquet(legacy_path, filters=filters or None)
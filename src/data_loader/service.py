@@ -0,0 +1,148 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : service.py
+@Date    : 2026-10-24 16:48:09
+@Author  : DDB
+@Version : 1.0
+@Desc    : 进程内共享的 mmap 面板服务: 行情/因子面板以 .npy 落盘, 各会话共享只读零拷贝视图
+'''
+
+import os
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.data_loader.store import store_stamp
+from src.data_loader.loader import DATA_DIR, FACTOR_DIR, RAW_DIR, board_stamp, load_factor, load_price
+
+
+PANEL_CACHE_DIR = DATA_DIR / "cache" / "panel"
+
+
+
+class PANEL_SERVICE:
+    '''mmap 面板服务
+
+    行情按股票池整体构建为面板, 各字段保存为 `<root>/price/<board>/<指纹>/<field>.npy`,
+    因子对齐到同一行情网格后保存为 `<root>/factors/<type>/<name>/<board>/<指纹>/values.npy`;
+    指纹由存储的写入标记 (及非全市场股票池的元数据表标记) 得到, 数据追加、重写或股票池成分刷新后自动重建,
+    旧版本目录随后清理.
+
+    数组以 mmap_mode='r' 打开并在进程内只保留一份, 日期区间切片为视图, 多个会话/页面并发读取时
+    内存不随用户数增长 (页缓存还可在进程间共享). 返回的数组均为只读.
+    '''
+    def __init__(
+        self,
+        root:str | Path = PANEL_CACHE_DIR,
+        price_root:str | Path = RAW_DIR,
+        factor_root:str | Path = FACTOR_DIR,
+    ):
+        self.root = Path(root)
+        self.price_root = Path(price_root)
+        self.factor_root = Path(factor_root)
+        self._panels = {}        # (kind, ...) -> (指纹, 数据)
+        self._lock = threading.RLock()      # 构建因子面板时会嵌套获取行情面板
+
+
+    def price(self, board:str='all', start_date:str=None, end_date:str=None, fields:List[str]=None) -> PANEL:
+        """行情面板的日期区间视图 (只读, 不复制)"""
+        stamp = store_stamp(self.price_root)
+        key = ('price', board)
+        fingerprint = self._fingerprint(stamp, board, board_stamp(board))
+        panel = self._get(key, fingerprint, lambda: self._build_price(board, fingerprint))
+        rows = self._rows(panel.dates, start_date, end_date)
+        fields = fields or list(panel.fields)
+        return PANEL(panel.dates[rows], panel.symbols, {f: panel.fields[f][rows] for f in fields})
+
+
+    def factor(self, factor_type:str, factor_name:str, board:str='all', start_date:str=None, end_date:str=None) -> np.ndarray:
+        """因子对齐到行情网格 (同 price() 的 dates × symbols) 后的日期区间视图 (只读)"""
+        price_stamp = store_stamp(self.price_root)
+        stamp = store_stamp(self.factor_root / factor_type / factor_name)
+        key = ('factor', factor_type, factor_name, board)
+        fingerprint = self._fingerprint(price_stamp, stamp, board, board_stamp(board))
+        values = self._get(key, fingerprint, lambda: self._build_factor(factor_type, factor_name, board, fingerprint))
+        panel = self.price(board)
+        return values[self._rows(panel.dates, start_date, end_date)]
+
+
+    def clear(self):
+        """释放进程内的映射 (已交出的视图仍然有效)"""
+        with self._lock:
+            self._panels.clear()
+
+
+    def _get(self, key:Tuple, fingerprint:str, build:Callable[[], Any]) -> Any:
+        """进程内只映射一次; 指纹变化时重新加载"""
+        with self._lock:
+            cached = self._panels.get(key)
+            if cached is None or cached[0] != fingerprint:
+                self._panels[key] = (fingerprint, build())
+            return self._panels[key][1]
+
+
+    def _build_price(self, board:str, fingerprint:str) -> PANEL:
+        path = self.root / 'price' / board / fingerprint
+        if not (path / 'dates.npy').is_file():
+            data = load_price(board=board, root=self.price_root)
+            panel = PANEL.from_data(data)
+            del data
+            arrays = {f'field_{name}': arr for name, arr in panel.fields.items()}
+            arrays['dates'] = panel.dates.to_numpy(dtype='datetime64[ns]')
+            arrays['symbols'] = panel.symbols.to_numpy(dtype=str)
+            self._save(path, arrays)
+        fields = {
+            f.stem[len('field_'):]: np.load(f, mmap_mode='r')
+            for f in sorted(path.glob('field_*.npy'))
+        }
+        return PANEL(np.load(path / 'dates.npy'), np.load(path / 'symbols.npy'), fields)
+
+
+    def _build_factor(self, factor_type:str, factor_name:str, board:str, fingerprint:str) -> np.ndarray:
+        path = self.root / 'factors' / factor_type / factor_name / board / fingerprint
+        if not (path / 'values.npy').is_file():
+            panel = self.price(board)
+            factor_df = load_factor(factor_type, factor_name, root=self.factor_root)
+            values = panel.align(factor_df) if len(factor_df) else np.full(panel.shape, np.nan)
+            self._save(path, {'values': values})
+        return np.load(path / 'values.npy', mmap_mode='r')
+
+
+    @staticmethod
+    def _save(path:Path, arrays:Dict[str, np.ndarray]):
+        """写入临时目录后整体替换, 并清理同级的旧版本"""
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        for name, arr in arrays.items():
+            np.save(tmp_path / f'{name}.npy', arr)
+        for old in path.parent.iterdir():
+            if old.name != path.name and not old.name.endswith('.tmp'):
+                shutil.rmtree(old, ignore_errors=True)       # 仍被映射的旧文件在 Windows 上删除失败, 下次再清理
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)     # 其他进程已写入同一指纹
+
+
+    @staticmethod
+    def _fingerprint(*parts:str) -> str:
+        return hashlib.blake2b('|'.join(parts).encode(), digest_size=8).hexdigest()
+
+
+    @staticmethod
+    def _rows(dates:pd.DatetimeIndex, start_date:str=None, end_date:str=None) -> slice:
+        """日期区间对应的行切片 (切片保证返回视图)"""
+        lo = dates.searchsorted(pd.Timestamp(start_date)) if start_date is not None else 0
+        hi = dates.searchsorted(pd.Timestamp(end_date), side='right') if end_date is not None else len(dates)
+        return slice(lo, hi)
+
+
+
+DATA_SERVICE = PANEL_SERVICE()      # 进程内共享
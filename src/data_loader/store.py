@@ -0,0 +1,262 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : store.py
+@Date    : 2026-10-18 15:10:27
+@Author  : DDB
+@Version : 1.1
+@Desc    : 按年/月分区、追加写入的 parquet 数据存储
+'''
+
+import os
+import json
+import time
+from pathlib import Path
+
+import pandas as pd
+from typing import *
+
+
+
+class PARQUET_STORE:
+    '''目录形式的 parquet 存储
+
+    目录结构为 `year=YYYY/month=MM/part-<纳秒时间戳>.parquet`, 分片内按 (date, symbol) 排序,
+    按 row_group_size 切分 row group 并写入统计信息, 读取时先按分区目录裁剪, 再由 pyarrow
+    根据 row group 统计信息下推日期/symbol 过滤.
+
+    每次写入生成新的分片文件, 先写临时文件再原子替换; 读取时按写入顺序合并,
+    同一 (date, symbol) 出现多次时以最新写入为准.
+    '''
+    def __init__(self, root:str | Path, row_group_size:int=200_000):
+        self.root = Path(root)
+        self.row_group_size = row_group_size
+
+
+    def files(self, start_date:str=None, end_date:str=None) -> List[Path]:
+        """按写入顺序返回分片文件, 可按日期裁剪分区"""
+        if not self.root.is_dir():
+            return []
+        files = list(self.root.glob('part-*.parquet')) + list(self.root.glob('year=*/month=*/part-*.parquet'))
+        if start_date is not None or end_date is not None:
+            lo = pd.Timestamp(start_date).to_period('M') if start_date is not None else None
+            hi = pd.Timestamp(end_date).to_period('M') if end_date is not None else None
+            files = [f for f in files if self._in_range(f, lo, hi)]
+        return sorted(files, key=lambda f: f.name)
+
+
+    def exists(self) -> bool:
+        return len(self.files()) > 0
+
+
+    def read(
+        self,
+        start_date:str = None,
+        end_date:str = None,
+        symbols:List[str] = None,
+        columns:List[str] = None,
+        filters:List[Tuple] = None
+    ) -> pd.DataFrame:
+        """读取数据, 日期/symbol/列过滤下推到 parquet 读取
+
+        Args:
+            start_date (str, optional): 起始日期 (含).
+            end_date (str, optional): 结束日期 (含).
+            symbols (List[str], optional): 只读取的 symbol.
+            columns (List[str], optional): 只读取的列.
+            filters (List[Tuple], optional): 额外的 pyarrow 过滤条件.
+        """
+        files = self.files(start_date, end_date)
+        if not files:
+            return pd.DataFrame()
+
+        filters = list(filters or [])
+        if start_date is not None:
+            filters.append(('date', '>=', pd.Timestamp(start_date)))
+        if end_date is not None:
+            filters.append(('date', '<=', pd.Timestamp(end_date)))
+        if symbols is not None:
+            filters.append(('symbol', 'in', list(symbols)))
+
+        pieces = [pd.read_parquet(f, columns=columns, filters=filters or None) for f in files]
+        data = pd.concat(pieces, axis=0)
+        if not data.index.is_unique:
+            data = data[~data.index.duplicated(keep='last')]
+        return data.sort_index()
+
+
+    def last_dates(self) -> pd.Series:
+        """每个 symbol 已存储的最后日期"""
+        files = self.files()
+        if not files:
+            return pd.Series(dtype='datetime64[ns]')
+        index = pd.concat([pd.read_parquet(f, columns=[]).index.to_frame(index=False) for f in files])
+        return index.groupby('symbol')['date'].max()
+
+
+    def dates(self, start_date:str=None, end_date:str=None) -> pd.DatetimeIndex:
+        """已存储的交易日"""
+        return self._read_dates(self.files(start_date, end_date), start_date, end_date)
+
+
+    def date_range(self, start_date:str=None, end_date:str=None) -> Tuple[pd.Timestamp | None, pd.Timestamp | None]:
+        """区间内已存储的首个与最后一个交易日 (无数据时为 None); 只读取首尾有数据的月份分区"""
+        partitions = {}
+        for f in self.files(start_date, end_date):
+            partitions.setdefault(self._period(f), []).append(f)
+        legacy = self._read_dates(partitions.pop(None, []), start_date, end_date)     # 未分区的旧文件总是读取
+        edges = [legacy[0], legacy[-1]] if len(legacy) else []
+        periods = sorted(partitions)
+        for ordered, pick in [(periods, 0), (periods[::-1], -1)]:
+            for period in ordered:
+                dates = self._read_dates(partitions[period], start_date, end_date)
+                if len(dates):
+                    edges.append(dates[pick])
+                    break
+        if not edges:
+            return None, None
+        return min(edges), max(edges)
+
+
+    def symbols(self) -> pd.Index:
+        """已存储的全部 symbol"""
+        return self.last_dates().index
+
+
+    def append(self, data:pd.DataFrame) -> List[Path]:
+        """原子地追加数据, 按年/月拆分到各分区"""
+        if data is None or data.empty:
+            return []
+        name = f'part-{time.time_ns()}.parquet'
+        data = data.sort_index()
+        dates = data.index.get_level_values('date')
+        paths = []
+        for (year, month), piece in data.groupby([dates.year, dates.month], sort=True):
+            partition = self.root / f'year={year}' / f'month={month:02d}'
+            partition.mkdir(parents=True, exist_ok=True)
+            self._atomic_write(piece, partition / name)
+            paths.append(partition / name)
+        return paths
+
+
+    def write(self, data:pd.DataFrame) -> List[Path]:
+        """整体覆盖写入: 先写新分片, 再删除旧分片"""
+        old_files = self.files()
+        paths = self.append(data)
+        for f in old_files:
+            os.remove(f)
+        return paths
+
+
+    def replace_symbols(self, data:pd.DataFrame, symbols:List[str]):
+        """用 data 整体替换指定 symbol 的全部历史 (如复权因子变化后)
+
+        先追加新分片, 再从旧分片中剔除这些 symbol; 中途中断时
+        新旧数据并存, 读取时以新分片为准, 结果依然正确.
+        """
+        symbols = set(symbols)
+        old_files = self.files()
+        self.append(data)
+        for f in old_files:
+            piece = pd.read_parquet(f)
+            mask = piece.index.get_level_values('symbol').isin(symbols)
+            if not mask.any():
+                continue
+            if mask.all():
+                os.remove(f)
+            else:
+                self._atomic_write(piece[~mask], f)
+
+
+    def mark_replaced(self, symbols:List[str]):
+        """记录被 replace_symbols 整体替换过历史的 symbol, 供下游 (如因子增量更新) 重算"""
+        pending = sorted(set(self.replaced_symbols()) | set(symbols))
+        self._write_log(pending)
+
+
+    def replaced_symbols(self) -> List[str]:
+        """尚未被下游确认处理的替换记录"""
+        path = self.root / 'replaced.json'
+        if not path.is_file():
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+    def clear_replaced(self, symbols:List[str]):
+        """下游处理完成后清除对应的替换记录"""
+        symbols = set(symbols)
+        self._write_log([s for s in self.replaced_symbols() if s not in symbols])
+
+
+    def _write_log(self, symbols:List[str]):
+        path = self.root / 'replaced.json'
+        if not symbols:
+            path.unlink(missing_ok=True)
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(symbols, f)
+        os.replace(tmp_path, path)
+
+
+    def compact(self):
+        """将全部分片重写为每个分区一个文件"""
+        if len(self.files()) > 1:
+            self.write(self.read())
+
+
+    def migrate_from(self, legacy_path:str | Path):
+        """从旧的单文件 parquet (如 data/raw/all.parquet) 导入"""
+        legacy_path = Path(legacy_path)
+        if not self.exists() and legacy_path.is_file():
+            self.append(pd.read_parquet(legacy_path))
+
+
+    def _atomic_write(self, data:pd.DataFrame, path:Path):
+        tmp_path = path.with_suffix('.tmp')
+        data.to_parquet(tmp_path, row_group_size=self.row_group_size, write_statistics=True)
+        os.replace(tmp_path, path)
+
+
+    @staticmethod
+    def _read_dates(files:List[Path], start_date:str=None, end_date:str=None) -> pd.DatetimeIndex:
+        """若干分片中 [start_date, end_date] 内的交易日 (升序), 只读取索引"""
+        dates = [pd.read_parquet(f, columns=[]).index.get_level_values('date').unique() for f in files]
+        dates = pd.DatetimeIndex(sorted(set().union(*dates)))
+        if start_date is not None:
+            dates = dates[dates >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            dates = dates[dates <= pd.Timestamp(end_date)]
+        return dates
+
+
+    @staticmethod
+    def _period(path:Path) -> pd.Period | None:
+        """分片所在的月份分区, 未分区的旧文件为 None"""
+        if not path.parent.name.startswith('month='):
+            return None
+        return pd.Period(year=int(path.parent.parent.name[5:]), month=int(path.parent.name[6:]), freq='M')
+
+
+    @classmethod
+    def _in_range(cls, path:Path, lo:pd.Period=None, hi:pd.Period=None) -> bool:
+        """分区目录是否与 [lo, hi] 月份区间相交, 未分区的旧文件总是读取"""
+        period = cls._period(path)
+        if period is None:
+            return True
+        return (lo is None or period >= lo) and (hi is None or period <= hi)
+
+
+
+def store_stamp(root:str | Path) -> str:
+    """存储目录的写入标记 (分片数 + 最新分片名), 数据有追加或重写时改变"""
+    root = Path(root)
+    files = PARQUET_STORE(root).files()
+    if files:
+        return f'{len(files)}:{max(f.name for f in files)}'
+    legacy_path = root.with_suffix('.parquet')
+    if legacy_path.is_file():
+        stat = legacy_path.stat()
+        return f'{stat.st_size}:{stat.st_mtime_ns}'
+    return ''
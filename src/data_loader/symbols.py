@@ -0,0 +1,73 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : symbols.py
+@Date    : 2026-10-18 16:21:40
+@Author  : DDB
+@Version : 1.0
+@Desc    : 股票元数据表（板块、上市/退市日期）的本地缓存
+'''
+
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+from typing import *
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+SYMBOL_META_PATH = BASE_DIR / "data" / "raw" / "symbols.parquet"
+SYMBOL_META_COLUMNS = ['symbol', 'sec_name', 'board', 'listed_date', 'delisted_date']
+
+BOARD_CODES = {
+    'main': 10100101,   # 主板
+    'cy': 10100102,     # 创业板
+    'kc': 10100103,     # 科创板
+}
+
+
+
+def is_meta_fresh(path:str | Path=SYMBOL_META_PATH, ttl:float=86400) -> bool:
+    """元数据表是否存在且未过期 (ttl 秒)"""
+    path = Path(path)
+    return path.is_file() and time.time() - path.stat().st_mtime < ttl
+
+
+def save_symbol_meta(meta:pd.DataFrame, path:str | Path=SYMBOL_META_PATH):
+    """保存元数据表 (原子替换)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = meta[[col for col in SYMBOL_META_COLUMNS if col in meta.columns]].reset_index(drop=True)
+    for col in ['listed_date', 'delisted_date']:
+        if col in meta.columns:
+            meta[col] = pd.to_datetime(meta[col]).dt.tz_localize(None)
+    tmp_path = path.with_suffix('.tmp')
+    meta.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_symbol_meta(path:str | Path=SYMBOL_META_PATH) -> pd.DataFrame:
+    """读取元数据表, 不存在时返回空表"""
+    path = Path(path)
+    if not path.is_file():
+        return pd.DataFrame(columns=SYMBOL_META_COLUMNS)
+    return pd.read_parquet(path)
+
+
+def board_symbols(
+        meta:pd.DataFrame,
+        type:Literal['all', 'main', 'cy', 'kc']='all',
+        is_trade:bool=False
+    ) -> List[str]:
+    """从元数据表中筛选板块 symbol
+
+    Args:
+        type (Literal['all', 'main', 'cy', 'kc']): ['全市', '主板', '创业', '科创']
+        is_trade (bool): 是否剔除已退市
+    """
+    if is_trade:
+        meta = meta[meta['delisted_date'] >= '2038-01-01']
+    type_lower = type.lower()
+    if type_lower != 'all':
+        meta = meta[meta['board'] == BOARD_CODES[type_lower]]
+    return meta['symbol'].tolist()
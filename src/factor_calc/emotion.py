@@ -9,9 +9,11 @@
 
 
 import numpy as np
-import pandas as pd
 from typing import *
 
+from src.factor_calc.panel import PANEL
+from src.factor_calc.rolling import rolling_sum, shift
+
 
 
 class EMOTION:
@@ -20,23 +22,20 @@ class EMOTION:
         """_summary_
 
         Args:
-            data (_type_): _description_
+            data (pd.DataFrame | PANEL): 行情数据, 传入 PANEL 时与其他因子类共享
             is_lags (bool, optional): 因子数据是否延期 1 日.
         """
-        self.data = data
+        self.data = PANEL.from_data(data)
         self.is_lags = is_lags
 
 
     def psy_n(self, days:int=12):
         '''N日的心理线'''
-        factors = self.data.close.unstack()
-        factors =(factors.diff() > 0).astype(int) # 上涨天=1, 否则=0
+        factors = self.data.up # 上涨天=1, 否则=0
         if self.is_lags:
-            factors = factors.shift(1)
-        factors = factors.rolling(days).sum() / days * 100
-        factors = pd.DataFrame(factors.stack())
-        factors.columns = [f'emotion_psy_{days}']
-        return factors
+            factors = shift(factors, 1)
+        factors = self.psy(factors, days)
+        return self.data.to_frame(factors, f'emotion_psy_{days}')
     
     def upDownCount_n(self):
         """今日的涨跌停家数
@@ -44,14 +43,23 @@ class EMOTION:
         Args:
             days (int, optional): _description_. Defaults to 10.
         """
-        factors = self.data.close.unstack()
-        factors = (factors.diff() > 0).astype(int) # 上涨天=1, 否则=0
+        factors = self.data.up # 上涨天=1, 否则=0
         if self.is_lags:
-            factors = factors.shift(1)
-        factors = factors.sum(axis=1)
-        factors = pd.DataFrame(factors)
-        factors.columns = [f'upDownCount_']
-        return factors
+            factors = shift(factors, 1)
+        factors = self.up_count(factors)
+        return self.data.to_date_frame(factors, f'upDownCount_')
+
+
+    @staticmethod
+    def psy(up:np.ndarray, days:int) -> np.ndarray:
+        """心理线: 窗口内上涨天数占比 (%), 注册表与本类共用"""
+        return rolling_sum(up, days) / days * 100
+
+
+    @staticmethod
+    def up_count(up:np.ndarray) -> np.ndarray:
+        """每日上涨家数"""
+        return np.nansum(up, axis=1)
 
 
 
@@ -9,12 +9,15 @@
 
 import os
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
-from src.factor_calc.momentum import MOMENTUM
-from src.factor_calc.emotion import EMOTION
-from src.factor_calc.volatility import VOLATILITY
-from src.factor_calc.reversal import REVERSAL
+from typing import *
+from src.factor_calc.panel import PANEL
+from src.factor_calc.registry import EXECUTOR, FACTOR_REGISTRY
+from src.data_loader.store import PARQUET_STORE
+from src.data_loader.loader import FACTOR_DIR, RAW_DIR, factor_store
 
 
 class FACTORS:
@@ -23,66 +26,177 @@ class FACTORS:
         BASE_DIR = Path(__file__).resolve().parent.parent.parent
         DATA_DIR = BASE_DIR / "data"
         self.save_path = DATA_DIR / "factors"
-        self.momentum = MOMENTUM(data_ohlcv, is_real=True)
-        self.reversal = REVERSAL(data_ohlcv, is_real=True)
-        self.emotion = EMOTION(data_ohlcv, is_lags=False)
-        self.volatility = VOLATILITY(data_ohlcv, is_lags=False)
+        self.panel = PANEL.from_data(data_ohlcv)   # 一次构建, 由 EXECUTOR 计算全部因子
 
 
     def to_save(self, factor_df, factor_type, factor_name):
-        save_path = self.save_path / factor_type / factor_name
-        factor_df.to_parquet(save_path)
+        """写入 data/factors/<type>/<name>/ 分区存储"""
+        factor_store(factor_type, factor_name, self.save_path).write(factor_df)
     
 
-    def all_to_save(self):
-
-        # 1. momentum
-        #-----------------------------
-        ## 1.1
-        i = 14
-        factor_N_slope = self.momentum.N_slope(i)
-        self.to_save(factor_N_slope, 'momentum', f'slope_{i}.parquet')
-
-        ## 1.2 
-        factor_N_slope_abs = factor_N_slope.abs()
-        self.to_save(factor_N_slope_abs, 'momentum', f'slope_{i}_abs.parquet')
-        # print(factor_N_slope)
-
-
-        # 2. reversal
-        #-----------------------------
-        ## 2.1
-        for i in [14, 28]:
-            factor_lags_pct_n_df = self.reversal.lags_pct_(i)
-            self.to_save(factor_lags_pct_n_df, 'reversal', f'lags_pct_{i}.parquet')
-
-
-        # 3. emotion
-        #-----------------------------
-        ## 3.1
-        for i in [12, 24]:
-            psy_n_df = self.emotion.psy_n(i)
-            self.to_save(psy_n_df, 'emotion', f'psy_{i}.parquet')
-        ## 3.2
-        upDownCount = self.emotion.upDownCount_n()
-        self.to_save(upDownCount, 'emotion', f'upDownCount.parquet')
-
-
-        # 4. volatility
-        #-----------------------------
-        ## 4.1
-        for i in [12, 24]:
-            hist_volatility_n_df = self.volatility.hist_volatility_n(i)
-            self.to_save(hist_volatility_n_df, 'volatility', f'hist_volatility_{i}.parquet')
-        ## 4.2 
-        for i in [10, 20]:
-            hist_vol_std_n_df = self.volatility.hist_vol_std_n(i)
-            self.to_save(hist_vol_std_n_df, 'volatility', f'hist_vol_std_n{i}.parquet')
+    def all_to_save(self, n_jobs:int=1, targets:List[str]=None) -> List[Tuple[str, str]]:
+        """计算并保存因子
+
+        Args:
+            n_jobs (int, optional): 进程数. 1 为串行 (便于调试), -1 为全部 CPU.
+                并行时行情面板只放入共享内存一次, 各子进程挂载后计算并自行写盘.
+            targets (List[str], optional): 需要输出的因子 key ('<type>/<name>'), 默认注册表中的全部因子.
+
+        Returns:
+            List[Tuple[str, str]]: 已保存的 (因子大类, 因子名)
+        """
+        targets = targets or FACTOR_REGISTRY.factors()
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+
+        saved = []
+        if n_jobs <= 1:
+            ## 串行计算, 写盘交给后台线程与后续节点的计算重叠
+            with ThreadPoolExecutor(max_workers=1) as writer:
+                futures = []
+                for (factor_type, factor_name), factor_df in EXECUTOR(self.panel).iter_run(targets):
+                    futures.append(writer.submit(self.to_save, factor_df, factor_type, factor_name))
+                    saved.append((factor_type, factor_name))
+                for future in futures:
+                    future.result()
+            return saved
+
+        ## 共享中间量的因子分在同一组, 组内由 EXECUTOR 去重计算
+        groups = FACTOR_REGISTRY.group_targets(targets)
+        meta, handles = self.panel.to_shared()
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(meta, str(self.save_path))) as pool:
+                for names in pool.map(_run_job, groups):
+                    saved += names
+        finally:
+            for shm in handles:
+                shm.close()
+                shm.unlink()
+        return saved
+
+
+
+def update_factors(
+    price_root:str | Path = RAW_DIR,
+    factor_root:str | Path = FACTOR_DIR,
+    targets:List[str] = None,
+    adjusted:List[str] = None,
+) -> Dict[Tuple[str, str], int]:
+    """增量更新因子: 只读取所需的尾部行情, 计算新增日期并追加到因子存储
+
+    每个因子的回看行数由注册表给出 (如 lags_pct_28 为 29 行, psy_24 为 24 行);
+    滚动计算只依赖窗口内数据, 因此追加的结果与全量重算逐位一致. 尚无存储的因子做全量计算.
+    因子存储的最后日期只读取最新的月份分区, 行情的交易日只读取回看窗口所需的尾部.
+
+    行情中被整体替换历史的 symbol (复权变化, 见 GOLDMINE.update_ohlcv) 在全部日期上重算,
+    替换因子存储中这些 symbol 的历史; 按日期的市场因子 (如 upDownCount) 依赖全部 symbol, 整体重算.
+
+    Args:
+        adjusted (List[str], optional): 需要重算全历史的 symbol, 默认为行情存储中尚未处理的替换记录
+            (更新全部因子后清除)
+
+    Returns:
+        Dict[Tuple[str, str], int]: 各因子追加或替换的行数
+    """
+    price_store = PARQUET_STORE(price_root)
+    targets = targets or FACTOR_REGISTRY.factors()
+    pending = price_store.replaced_symbols() if adjusted is None else list(adjusted)
+
+    ## 按各因子已存储的最后日期分组
+    last_dates = {}
+    for key in targets:
+        factor_type, factor_name = key.split('/', 1)
+        last_dates[key] = factor_store(factor_type, factor_name, factor_root).date_range()[1]
+    known = [d for d in last_dates.values() if d is not None]
+    if len(known) < len(targets):
+        dates = price_store.dates()
+    else:
+        dates = _tail_dates(price_store, min(known), max(FACTOR_REGISTRY.lookback(k) for k in targets))
+    groups = {}
+    for key, last_date in last_dates.items():
+        first_new = dates.searchsorted(last_date, side='right') if last_date is not None else 0
+        if first_new < len(dates):
+            groups.setdefault(first_new, []).append(key)
+
+    updated = {}
+    for first_new, keys in groups.items():
+        lookback = max(FACTOR_REGISTRY.lookback(k) for k in keys)
+        start = max(first_new - lookback, 0)
+        panel = PANEL.from_data(price_store.read(start_date=dates[start]))
+        for (factor_type, factor_name), factor_df in EXECUTOR(panel).iter_run(keys):
+            factor_df = factor_df[factor_df.index.get_level_values('date') >= dates[first_new]]
+            factor_store(factor_type, factor_name, factor_root).append(factor_df)
+            updated[(factor_type, factor_name)] = len(factor_df)
+
+    ## 复权变化的 symbol: 在完整日期网格上重算全历史并替换
+    history = price_store.read(symbols=pending) if pending else pd.DataFrame()
+    replaced = history.index.get_level_values('symbol').unique().tolist() if len(history) else []
+    if replaced:
+        panel = _full_dates(PANEL.from_data(history, symbols=replaced), price_store.dates())
+        market = []
+        for (factor_type, factor_name), factor_df in EXECUTOR(panel).iter_run(targets):
+            if 'symbol' not in factor_df.index.names:
+                market.append(f'{factor_type}/{factor_name}')
+                continue
+            factor_store(factor_type, factor_name, factor_root).replace_symbols(factor_df, replaced)
+            updated[(factor_type, factor_name)] = updated.get((factor_type, factor_name), 0) + len(factor_df)
+        if market:
+            panel = PANEL.from_data(price_store.read())
+            for (factor_type, factor_name), factor_df in EXECUTOR(panel).iter_run(market):
+                factor_store(factor_type, factor_name, factor_root).write(factor_df)
+                updated[(factor_type, factor_name)] = len(factor_df)
+    if pending and adjusted is None and set(FACTOR_REGISTRY.factors()) <= set(targets):
+        price_store.clear_replaced(pending)
+    return updated
+
+
+def _tail_dates(price_store:PARQUET_STORE, last_date:pd.Timestamp, rows:int) -> pd.DatetimeIndex:
+    """行情中 last_date 之后的交易日及其之前至少 rows 个交易日: 按月份分区向前逐步扩大读取范围"""
+    first_date = price_store.date_range()[0]
+    months = rows // 15 + 1
+    while True:
+        start = last_date - pd.DateOffset(months=months)
+        dates = price_store.dates(start_date=start)
+        if first_date is None or start <= first_date or dates.searchsorted(last_date, side='right') > rows:
+            return dates
+        months *= 2
+
+
+def _full_dates(panel:PANEL, dates:pd.DatetimeIndex) -> PANEL:
+    """将部分 symbol 的面板扩展到完整的日期网格 (与全量面板的行一致, 滚动窗口才相同)"""
+    rows = dates.get_indexer(panel.dates)
+    fields = {}
+    for field, arr in panel.fields.items():
+        full = np.full((len(dates), arr.shape[1]), np.nan)
+        full[rows] = arr
+        fields[field] = full
+    return PANEL(dates, panel.symbols, fields)
+
+
+
+## 子进程状态: 挂载的共享内存面板与 FACTORS 实例
+_WORKER = {}
+
+def _init_worker(meta:Dict[str, Any], save_path:str):
+    panel, handles = PANEL.from_shared(meta)
+    factors = FACTORS(panel)
+    factors.save_path = Path(save_path)
+    _WORKER['factors'] = factors
+    _WORKER['handles'] = handles    # 保持引用, 防止共享内存被提前释放
+
+def _run_job(targets:List[str]) -> List[Tuple[str, str]]:
+    factors = _WORKER['factors']
+    saved = []
+    for (factor_type, factor_name), factor_df in EXECUTOR(factors.panel).iter_run(targets):
+        factors.to_save(factor_df, factor_type, factor_name)
+        saved.append((factor_type, factor_name))
+    return saved
 
 
 if __name__ == '__main__':
 
-    data = pd.read_parquet(r'.\data\raw\all.parquet')
-    Factors = FACTORS(data)
-    Factors.all_to_save()
-    # factor1 = Factors.momentum.lags_pct_()
+    ## 日常: 增量更新; 首次或因子定义变更时全量计算
+    print(update_factors())
+    # data = PARQUET_STORE(r'.\data\raw\all').read()
+    # Factors = FACTORS(data)
+    # Factors.all_to_save(n_jobs=-1)
@@ -11,6 +11,9 @@ import numpy as np
 import pandas as pd
 from typing import *
 
+from src.factor_calc.panel import PANEL
+from src.factor_calc.rolling import rolling_ols, shift
+
 
 
 class MOMENTUM:
@@ -19,45 +22,71 @@ class MOMENTUM:
         """_summary_
 
         Args:
-            data (_type_): _description_
+            data (pd.DataFrame | PANEL): 行情数据, 传入 PANEL 时与其他因子类共享
             is_real (bool, optional): 因子数据是否延期 1 日.
         """
-        self.data = data
+        self.data = PANEL.from_data(data)
         self.is_real = is_real
 
 
 
     def N_slope(self, n:int=14):
         """前 N 日的斜率"""
-        # y
-        Close_df = self.data.close.unstack()
-        arr = Close_df.values
+        return self.N_slopes([n])[n]
+
 
-        # x
-        x = np.arange(n)
-        weights = x - x.mean()
-        denom = np.sum(weights**2)
+    def N_slopes(self, ns:Sequence[int]=(5, 10, 14, 20, 60)) -> Dict[int, pd.DataFrame]:
+        """多个窗口的斜率因子, 窗口内先标准化再回归, 一次计算全部 symbol
+
+        Returns:
+            Dict[int, pd.DataFrame]: {n: 因子}
+        """
+        stats = self.N_slope_stats(ns, stats=('slope',))
+        return {n: df.rename(columns={'slope': f'{n}d_slope'}) for n, df in stats.items()}
 
+
+    def N_slope_stats(
+        self,
+        ns:Sequence[int]=(14,),
+        stats:Tuple[str, ...]=('slope', 'intercept', 'r2', 'resid_std')
+    ) -> Dict[int, pd.DataFrame]:
+        """标准化收盘价对时间的滚动回归统计量 (斜率、截距、R²、残差波动)
+
+        Args:
+            ns (Sequence[int]): 窗口长度
+            stats (Tuple[str, ...]): 需要的统计量, 见 rolling_ols
+        """
         # 每列窗口标准化
-        y_mean = Close_df.rolling(n).mean().to_numpy()
-        y_std = Close_df.rolling(n).std(ddof=0).to_numpy()
-        y_norm = (arr - y_mean) / y_std
-
-        # 卷积计算 slope
-        slopes = np.apply_along_axis(
-            lambda col: np.convolve(col, weights[::-1], mode="valid") / denom,
-            axis=0,
-            arr=y_norm
-        )
-
-        # 对齐 index/columns
-        factors = pd.DataFrame(np.full_like(arr, np.nan, dtype=float),
-                        index=Close_df.index, columns=Close_df.columns)
-        factors.iloc[n-1:, :] = slopes
-        
-        if self.is_real:
-            factors = factors.shift(1)
-        factors = pd.DataFrame(factors.stack())
-        factors.columns = [f'{n}d_slope']
-        return factors
+        y_norms = self.window_norm(self.data.close, ns)
+
+        result = {}
+        for n in ns:
+            reg = self.norm_ols(y_norms[n], n, stats)
+            factors = {}
+            for k in stats:
+                v = reg[k]
+                if self.is_real:
+                    v = shift(v, 1)
+                factors[k] = v
+            result[n] = self._stack(factors)
+        return result
+
+
+    @staticmethod
+    def window_norm(close:np.ndarray, ns:Sequence[int]) -> Dict[int, np.ndarray]:
+        """各窗口内标准化的收盘价 (减窗口均值, 除以窗口标准差), 注册表与本类共用"""
+        norm = rolling_ols(close, ns, stats=('mean', 'std'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {n: (close - norm[n]['mean']) / norm[n]['std'] for n in ns}
+
+
+    @staticmethod
+    def norm_ols(y_norm:np.ndarray, n:int, stats:Tuple[str, ...]=('slope',)) -> Dict[str, np.ndarray]:
+        """标准化收盘价对时间的 n 日滚动回归统计量"""
+        return rolling_ols(y_norm, n, stats=stats)[n]
+
 
+    def _stack(self, factors:Dict[str, np.ndarray]) -> pd.DataFrame:
+        """多个 (T, N) 数组合并为 MultiIndex(date, symbol) 的 DataFrame"""
+        frames = [self.data.to_frame(v, k) for k, v in factors.items()]
+        return frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
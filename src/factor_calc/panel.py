@@ -0,0 +1,197 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : panel.py
+@Date    : 2026-10-19 09:40:18
+@Author  : DDB
+@Version : 1.0
+@Desc    : OHLCV 宽面板, 供各因子类共享
+'''
+
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.rolling import shift
+
+
+
+def _attach_shared(name:str) -> shared_memory.SharedMemory:
+    """挂载已有的共享内存, 不向 resource_tracker 登记
+
+    Python < 3.13 挂载时也会登记, 子进程退出或 unlink 时会误删 / 重复注销创建方的段;
+    子进程与父进程共用同一个 tracker, 事后 unregister 会连带注销父进程的登记, 故在挂载时跳过登记.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)      # Python >= 3.13
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None if rtype == 'shared_memory' else register(name, rtype)
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+
+class PANEL:
+    '''date × symbol 稠密面板
+
+    由 MultiIndex(date, symbol) 的 OHLCV 数据一次性构建, 每个字段保存为 (T, N) 的 float 数组,
+    并缓存收益率等共享的中间序列, 避免各因子重复 unstack.
+    '''
+    def __init__(self, dates:pd.DatetimeIndex, symbols:pd.Index, fields:Dict[str, np.ndarray]):
+        self.dates = pd.DatetimeIndex(dates, name='date')
+        self.symbols = pd.Index(symbols, name='symbol')
+        self.fields = dict(fields)
+        self._cache = {}
+
+
+    @classmethod
+    def from_data(cls, data:pd.DataFrame, fields:List[str]=None, symbols:List[str]=None) -> 'PANEL':
+        """由 MultiIndex(date, symbol) 的长表构建面板
+
+        Args:
+            data (pd.DataFrame): 行情数据
+            fields (List[str], optional): 需要的字段, 默认全部数值列
+            symbols (List[str], optional): 指定 symbol 全集 (列顺序), 默认为数据中出现的全部 symbol
+        """
+        if isinstance(data, cls):
+            return data
+        fields = fields or data.select_dtypes('number').columns.tolist()
+        date_codes, dates = pd.factorize(data.index.get_level_values('date'), sort=True)
+        if symbols is None:
+            sym_codes, symbols = pd.factorize(data.index.get_level_values('symbol'), sort=True)
+        else:
+            symbols = pd.Index(symbols)
+            sym_codes = symbols.get_indexer(data.index.get_level_values('symbol'))
+            keep = sym_codes >= 0
+            date_codes, sym_codes = date_codes[keep], sym_codes[keep]
+            data = data[keep]
+
+        shape = (len(dates), len(symbols))
+        arrays = {}
+        for field in fields:
+            arr = np.full(shape, np.nan)
+            arr[date_codes, sym_codes] = data[field].to_numpy(dtype=float, na_value=np.nan)
+            arrays[field] = arr
+        return cls(dates, symbols, arrays)
+
+
+    def __getattr__(self, name:str) -> np.ndarray:
+        fields = self.__dict__.get('fields', {})
+        if name in fields:
+            return fields[name]
+        raise AttributeError(name)
+
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (len(self.dates), len(self.symbols))
+
+
+    def cached(self, key:str, func:Callable[[], np.ndarray]) -> np.ndarray:
+        """共享中间结果: 同一 key 只计算一次"""
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+
+    @property
+    def prev_close(self) -> np.ndarray:
+        return self.cached('prev_close', lambda: shift(self.close, 1))
+
+    @property
+    def ret(self) -> np.ndarray:
+        """日简单收益率"""
+        return self.cached('ret', lambda: self.close / self.prev_close - 1)
+
+    @property
+    def log_ret(self) -> np.ndarray:
+        """日对数收益率"""
+        def _log_ret():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.log(self.close / self.prev_close)
+        return self.cached('log_ret', _log_ret)
+
+    @property
+    def up(self) -> np.ndarray:
+        """上涨日=1, 否则=0 (含缺失)"""
+        def _up():
+            with np.errstate(invalid='ignore'):
+                return (self.close - self.prev_close > 0).astype(float)
+        return self.cached('up', _up)
+
+
+    def to_frame(self, values:np.ndarray, name:str) -> pd.DataFrame:
+        """(T, N) 数组转为 MultiIndex(date, symbol) 的单列 DataFrame, 丢弃 NaN (同 stack)"""
+        rows, cols = np.nonzero(~np.isnan(values))
+        index = pd.MultiIndex(
+            levels=[self.dates, self.symbols], codes=[rows, cols],
+            names=['date', 'symbol'], verify_integrity=False
+        )
+        return pd.DataFrame({name: values[rows, cols]}, index=index)
+
+
+    def align(self, data:pd.DataFrame | pd.Series) -> np.ndarray:
+        """将 MultiIndex(date, symbol) 的单列数据对齐到面板网格 (T, N), 面板外的行丢弃
+
+        Raises:
+            ValueError: 数据不是截面数据 (如以 date 为索引的市场因子)
+        """
+        if 'symbol' not in data.index.names or 'date' not in data.index.names:
+            raise ValueError(f'只能对齐 MultiIndex(date, symbol) 的截面数据, 实际索引为 {list(data.index.names)}')
+        if isinstance(data, pd.DataFrame):
+            data = data.iloc[:, 0]
+        rows = self.dates.get_indexer(data.index.get_level_values('date'))
+        cols = self.symbols.get_indexer(data.index.get_level_values('symbol'))
+        keep = (rows >= 0) & (cols >= 0)
+        arr = np.full(self.shape, np.nan)
+        arr[rows[keep], cols[keep]] = data.to_numpy(dtype=float, na_value=np.nan)[keep]
+        return arr
+
+
+    def to_date_frame(self, values:np.ndarray, name:str) -> pd.DataFrame:
+        """(T,) 数组转为以 date 为索引的单列 DataFrame"""
+        return pd.DataFrame({name: values}, index=self.dates)
+
+
+    def slice(self, start:int=None, stop:int=None) -> 'PANEL':
+        """按行位置切片 (视图, 不复制)"""
+        return PANEL(
+            self.dates[start:stop], self.symbols,
+            {field: arr[start:stop] for field, arr in self.fields.items()}
+        )
+
+
+    def to_shared(self) -> Tuple[Dict[str, Any], List[shared_memory.SharedMemory]]:
+        """将各字段数组放入共享内存
+
+        Returns:
+            Tuple[Dict, List[SharedMemory]]: (可 pickle 的描述信息, 共享内存句柄).
+                调用方负责在使用完毕后 close() 并 unlink().
+        """
+        meta = {'dates': self.dates, 'symbols': self.symbols, 'fields': {}}
+        handles = []
+        for field, arr in self.fields.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+            view[:] = arr
+            meta['fields'][field] = (shm.name, arr.shape, arr.dtype.str)
+            handles.append(shm)
+        return meta, handles
+
+
+    @classmethod
+    def from_shared(cls, meta:Dict[str, Any]) -> Tuple['PANEL', List[shared_memory.SharedMemory]]:
+        """在子进程中挂载共享内存面板 (只读, 不复制); 不登记到 resource_tracker, 由创建方负责 unlink"""
+        fields, handles = {}, []
+        for field, (name, shape, dtype) in meta['fields'].items():
+            shm = _attach_shared(name)
+            arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            arr.flags.writeable = False
+            fields[field] = arr
+            handles.append(shm)
+        return cls(meta['dates'], meta['symbols'], fields), handles
@@ -0,0 +1,302 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : registry.py
+@Date    : 2026-10-19 15:26:48
+@Author  : DDB
+@Version : 1.0
+@Desc    : 声明式因子注册表与 DAG 执行器
+'''
+
+from functools import partial
+from pathlib import Path
+
+import yaml
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.factor_calc.rolling import shift
+from src.factor_calc.momentum import MOMENTUM
+from src.factor_calc.reversal import REVERSAL
+from src.factor_calc.emotion import EMOTION
+from src.factor_calc.volatility import VOLATILITY
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+DESC_PATH = BASE_DIR / "data" / "factor_desc.yaml"
+
+
+
+class NODE:
+    '''计算图节点
+
+    Args:
+        key (str): 唯一标识, 中间量如 'y_norm:14', 因子为 '<type>/<name>'
+        func (Callable): func(panel, *inputs) -> np.ndarray | Dict
+        inputs (List[str]): 依赖的节点
+        factor_type (str, optional): 因子大类, 非空即为可输出的因子
+        column (str, optional): 输出的列名
+        meta (Dict, optional): 因子描述 (name, category, description, formula, ...)
+        cheap (bool, optional): 廉价的公共节点 (如行情字段), 并行分组时不据此合并任务
+        lookback (int, optional): 计算第 t 行时需要输入的前 lookback 行 (窗口长度-1, 平移天数等)
+    '''
+    def __init__(
+        self,
+        key:str,
+        func:Callable,
+        inputs:List[str] = (),
+        factor_type:str = None,
+        column:str = None,
+        meta:Dict[str, Any] = None,
+        cheap:bool = False,
+        lookback:int = 0,
+    ):
+        self.key = key
+        self.func = func
+        self.inputs = list(inputs)
+        self.factor_type = factor_type
+        self.column = column
+        self.meta = meta or {}
+        self.cheap = cheap
+        self.lookback = lookback
+
+    @property
+    def is_factor(self) -> bool:
+        return self.factor_type is not None
+
+    @property
+    def name(self) -> str:
+        return self.key.split('/', 1)[-1]
+
+    def __repr__(self):
+        return f'NODE({self.key!r}, inputs={self.inputs})'
+
+
+
+class REGISTRY:
+    '''因子注册表'''
+    def __init__(self):
+        self.nodes: Dict[str, NODE] = {}
+
+
+    def add(self, node:NODE) -> NODE:
+        if node.key in self.nodes:
+            raise KeyError(f'重复注册的节点: {node.key}')
+        self.nodes[node.key] = node
+        return node
+
+
+    def intermediate(self, key:str, func:Callable, inputs:List[str]=(), cheap:bool=False, lookback:int=0) -> NODE:
+        return self.add(NODE(key, func, inputs, cheap=cheap, lookback=lookback))
+
+
+    def factor(
+        self,
+        factor_type:str,
+        factor_name:str,
+        func:Callable,
+        inputs:List[str],
+        column:str,
+        lookback:int = 0,
+        **meta
+    ) -> NODE:
+        """注册因子, meta 为因子描述 (name, category, description, formula, ...)"""
+        return self.add(NODE(f'{factor_type}/{factor_name}', func, inputs, factor_type=factor_type, column=column, lookback=lookback, meta=meta))
+
+
+    def factors(self, factor_type:str=None) -> List[str]:
+        """已注册的因子 key"""
+        return [k for k, node in self.nodes.items() if node.is_factor and factor_type in (None, node.factor_type)]
+
+
+    def topo_order(self, targets:List[str]) -> List[str]:
+        """targets 及其全部祖先的拓扑序"""
+        order, state = [], {}
+        def visit(key):
+            if state.get(key) == 'done':
+                return
+            if state.get(key) == 'visiting':
+                raise ValueError(f'因子依赖存在环: {key}')
+            if key not in self.nodes:
+                raise KeyError(f'未注册的节点: {key}')
+            state[key] = 'visiting'
+            for dep in self.nodes[key].inputs:
+                visit(dep)
+            state[key] = 'done'
+            order.append(key)
+        for key in targets:
+            visit(key)
+        return order
+
+
+    def lookback(self, key:str) -> int:
+        """因子的总回看行数: 依赖路径上各节点 lookback 之和的最大值"""
+        node = self.nodes[key]
+        return node.lookback + max([self.lookback(dep) for dep in node.inputs], default=0)
+
+
+    def group_targets(self, targets:List[str]=None) -> List[List[str]]:
+        """按共享的非廉价中间量将目标因子分组, 同组在同一进程内计算以复用中间量"""
+        targets = targets or self.factors()
+        parent = {t: t for t in targets}
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        owner = {}
+        for t in targets:
+            for key in self.topo_order([t]):
+                if self.nodes[key].cheap:
+                    continue
+                if key in owner:
+                    parent[find(t)] = find(owner[key])
+                else:
+                    owner[key] = t
+
+        groups = {}
+        for t in targets:
+            groups.setdefault(find(t), []).append(t)
+        return list(groups.values())
+
+
+    def describe(self, desc_path:str | Path=DESC_PATH) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """因子描述: 注册表中的元数据, 由 factor_desc.yaml 中的同名条目覆盖补充"""
+        desc = {}
+        for key in self.factors():
+            node = self.nodes[key]
+            desc.setdefault(node.factor_type, {})[node.name] = dict(node.meta)
+        desc_path = Path(desc_path)
+        if desc_path.exists():
+            with open(desc_path, 'r', encoding='utf-8') as f:
+                yaml_desc = yaml.safe_load(f) or {}
+            for factor_type, items in yaml_desc.items():
+                for name, meta in (items or {}).items():
+                    desc.setdefault(factor_type, {}).setdefault(name, {}).update(meta or {})
+        return desc
+
+
+
+class EXECUTOR:
+    '''DAG 执行器: 每个中间量只计算一次, 只输出请求的因子, 不再被依赖的中间量及时释放'''
+    def __init__(self, panel:PANEL | pd.DataFrame, registry:REGISTRY=None):
+        self.panel = PANEL.from_data(panel)
+        self.registry = registry or FACTOR_REGISTRY
+
+
+    def iter_run(self, targets:List[str]=None) -> Iterator[Tuple[Tuple[str, str], pd.DataFrame]]:
+        """按拓扑序计算, 每完成一个目标因子即产出 ((因子大类, 因子名), 因子)"""
+        targets = targets or self.registry.factors()
+        order = self.registry.topo_order(targets)
+        nodes = self.registry.nodes
+        remaining = {key: 0 for key in order}
+        for key in order:
+            for dep in nodes[key].inputs:
+                remaining[dep] += 1
+
+        values = {}
+        target_set = set(targets)
+        for key in order:
+            node = nodes[key]
+            values[key] = node.func(self.panel, *[values[dep] for dep in node.inputs])
+            for dep in node.inputs:
+                remaining[dep] -= 1
+                if remaining[dep] == 0:
+                    del values[dep]
+            if key in target_set:
+                yield (node.factor_type, node.name), self.to_frame(node, values[key])
+                if remaining[key] == 0:
+                    del values[key]
+
+
+    def run(self, targets:List[str]=None) -> Dict[Tuple[str, str], pd.DataFrame]:
+        return dict(self.iter_run(targets))
+
+
+    def to_frame(self, node:NODE, values:np.ndarray) -> pd.DataFrame:
+        if values.ndim == 1:
+            return self.panel.to_date_frame(values, node.column)
+        return self.panel.to_frame(values, node.column)
+
+
+
+## 注册表
+#--------------------------
+FACTOR_REGISTRY = REGISTRY()
+_R = FACTOR_REGISTRY
+
+
+## 0. 行情字段与公共中间量
+for _field in ['open', 'high', 'low', 'close', 'volume', 'amount']:
+    _R.intermediate(_field, partial(lambda p, field: p.fields[field], field=_field), cheap=True)
+_R.intermediate('prev_close', lambda p, close: p.prev_close, ['close'], cheap=True, lookback=1)
+_R.intermediate('up', lambda p, close: p.up, ['close'], cheap=True, lookback=1)
+_R.intermediate('log_ret', lambda p, close: p.log_ret, ['close'], cheap=True, lookback=1)
+_R.intermediate('log_volume', lambda p, volume: VOLATILITY.log_volume(volume), ['volume'], cheap=True)
+
+
+## 各因子的公式由因子类的静态方法给出 (MOMENTUM / REVERSAL / EMOTION / VOLATILITY), 注册表只声明依赖与延期
+
+## 1. momentum: 窗口内标准化后的收盘价对时间回归的斜率 (延期 1 日)
+for _n in [5, 10, 14, 20, 60]:
+    _R.intermediate(f'y_norm:{_n}', partial(lambda p, close, n: MOMENTUM.window_norm(close, [n])[n], n=_n), ['close'], lookback=_n - 1)
+    _R.factor(
+        'momentum', f'slope_{_n}',
+        partial(lambda p, y, n: shift(MOMENTUM.norm_ols(y, n)['slope'], 1), n=_n),
+        [f'y_norm:{_n}'], column=f'{_n}d_slope', lookback=_n,
+        name=f'{_n}日斜率因子', category='动量因子',
+        description=f'计算过去{_n}个交易日的收盘价线性回归斜率，用于描述价格的未来趋势', formula='',
+    )
+_R.factor(
+    'momentum', 'slope_14_abs', lambda p, slope: np.abs(slope), ['momentum/slope_14'], column='14d_slope',
+    name='14日斜率绝对值因子', category='动量因子', reference='slope_14',
+    description='计算过去14个交易日的收盘价线性回归斜率绝对值，用于描述价格的未来趋势', formula='',
+)
+
+
+## 2. reversal: N 日收益率 (延期 1 日)
+for _n in [14, 28]:
+    _R.factor(
+        'reversal', f'lags_pct_{_n}',
+        partial(lambda p, close, n: shift(REVERSAL.pct_change(close, n), 1), n=_n),
+        ['close'], column=f'lags_{_n}_pct', lookback=_n + 1,
+        name=f'{_n}日历史收益率', category='反转因子',
+        description=f'计算过去{_n}个交易日的累计收益率，用于刻画价格趋势的反转。',
+        formula=f'r_t = \\frac{{P_t}}{{P_{{t-{_n}}}}} - 1',
+    )
+
+
+## 3. emotion
+for _n in [12, 24]:
+    _R.factor(
+        'emotion', f'psy_{_n}',
+        partial(lambda p, up, n: EMOTION.psy(up, n), n=_n),
+        ['up'], column=f'emotion_psy_{_n}', lookback=_n - 1,
+        name=f'{_n}日心理线', category='情绪因子',
+        description=f'过去{_n}个交易日中上涨天数的占比 (%)', formula=f'PSY_t = \\frac{{\\#\\{{r > 0\\}}}}{{{_n}}} \\times 100',
+    )
+_R.factor(
+    'emotion', 'upDownCount', lambda p, up: EMOTION.up_count(up), ['up'], column='upDownCount_',
+    name='上涨家数', category='情绪因子', description='当日全市场上涨的股票数量', formula='',
+)
+
+
+## 4. volatility
+for _n in [12, 24]:
+    _R.factor(
+        'volatility', f'hist_volatility_{_n}',
+        partial(lambda p, log_ret, n: VOLATILITY.rolling_vol(log_ret, n), n=_n),
+        ['log_ret'], column=f'hist_volatility_{_n}', lookback=_n - 1,
+        name=f'{_n}日历史波动率', category='波动因子',
+        description=f'过去{_n}个交易日对数收益率的标准差', formula='\\sigma = std(\\ln \\frac{P_t}{P_{t-1}})',
+    )
+for _n in [10, 20]:
+    _R.factor(
+        'volatility', f'hist_vol_std_n{_n}',
+        partial(lambda p, log_volume, n: VOLATILITY.rolling_vol(log_volume, n), n=_n),
+        ['log_volume'], column=f'hist_vol_std_{_n}', lookback=_n - 1,
+        name=f'{_n}日成交量波动率', category='波动因子',
+        description=f'过去{_n}个交易日对数成交量的标准差', formula='\\sigma = std(\\ln V_t)',
+    )
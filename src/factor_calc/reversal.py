@@ -8,28 +8,33 @@
 '''
 
 import numpy as np
-import pandas as pd
 from typing import *
 
+from src.factor_calc.panel import PANEL
+from src.factor_calc.rolling import shift
+
 class REVERSAL:
     '''反转因子类'''
     def __init__(self, data, is_real:bool=False):
         """_summary_
 
         Args:
-            data (_type_): _description_
+            data (pd.DataFrame | PANEL): 行情数据, 传入 PANEL 时与其他因子类共享
             is_real (bool, optional): 因子数据是否延期 1 日.
         """
-        self.data = data
+        self.data = PANEL.from_data(data)
         self.is_real = is_real
 
 
     def lags_pct_(self, lags:int=14):
         '''前N日的收益率'''
-        factors = self.data.close.unstack()
-        factors = factors.pct_change(lags, fill_method=None)
+        factors = self.pct_change(self.data.close, lags)
         if self.is_real:
-            factors = factors.shift(1)
-        factors = pd.DataFrame(factors.stack())
-        factors.columns = [f'lags_{lags}_pct']
-        return factors
\ No newline at end of file
+            factors = shift(factors, 1)
+        return self.data.to_frame(factors, f'lags_{lags}_pct')
+
+
+    @staticmethod
+    def pct_change(close:np.ndarray, lags:int) -> np.ndarray:
+        """lags 日收益率, 注册表与本类共用"""
+        return close / shift(close, lags) - 1
@@ -0,0 +1,144 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : rolling.py
+@Date    : 2026-10-19 09:12:30
+@Author  : DDB
+@Version : 1.0
+@Desc    : date × symbol 二维数组的滚动窗口计算 (沿 axis=0)
+'''
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import *
+
+
+## 单次处理的窗口元素上限, 控制 (rows, symbols, window) 临时数组的内存
+CHUNK_ELEMENTS = 1 << 24
+
+
+
+def shift(arr:np.ndarray, n:int=1) -> np.ndarray:
+    """沿日期方向平移, 同 DataFrame.shift(n)"""
+    out = np.full(arr.shape, np.nan)
+    if n == 0:
+        out[:] = arr
+    elif n > 0:
+        out[n:] = arr[:-n]
+    else:
+        out[:n] = arr[-n:]
+    return out
+
+
+def rolling_apply(arr:np.ndarray, window:int, func:Callable) -> np.ndarray:
+    """按行分块对滑动窗口应用 func
+
+    窗口内任一值为 NaN 时结果为 NaN (同 pandas rolling 的 min_periods=window).
+    每个输出只依赖其窗口内的输入, 因此对尾部数据单独计算与全历史计算结果逐位一致.
+
+    Args:
+        arr (np.ndarray): (T, N) 数组
+        window (int): 窗口长度
+        func (Callable): 输入 (rows, N, window) 的窗口视图, 返回 (rows, N)
+    """
+    arr = np.asarray(arr, dtype=float)
+    out = np.full(arr.shape, np.nan)
+    T = arr.shape[0]
+    if T < window:
+        return out
+    width = int(np.prod(arr.shape[1:])) * window
+    step = max(CHUNK_ELEMENTS // max(width, 1), 1)
+    for start in range(window - 1, T, step):
+        stop = min(start + step, T)
+        windows = sliding_window_view(arr[start - window + 1:stop], window, axis=0)
+        out[start:stop] = func(windows)
+    return out
+
+
+def rolling_sum(arr:np.ndarray, window:int) -> np.ndarray:
+    return rolling_apply(arr, window, lambda w: w.sum(axis=-1))
+
+
+def rolling_mean(arr:np.ndarray, window:int) -> np.ndarray:
+    return rolling_apply(arr, window, lambda w: w.mean(axis=-1))
+
+
+def rolling_std(arr:np.ndarray, window:int, ddof:int=1) -> np.ndarray:
+    """两遍法计算滚动标准差, 数值上比累加平方和更稳定"""
+    def _std(w):
+        with np.errstate(invalid='ignore'):
+            dev = w - w.mean(axis=-1, keepdims=True)
+            return np.sqrt((dev * dev).sum(axis=-1) / (window - ddof))
+    return rolling_apply(arr, window, _std)
+
+
+def rolling_ols(
+    arr:np.ndarray,
+    windows:int | List[int],
+    stats:Tuple[str, ...] = ('slope', 'intercept', 'r2', 'resid_std')
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """滚动一元回归 y = a + b·x (x = 0, 1, ..., n-1), 所有 symbol 同时计算
+
+    多个窗口共用同一次分块读取; 窗口内含 NaN (停牌等) 时结果为 NaN.
+
+    Args:
+        arr (np.ndarray): (T, N) 数组
+        windows (int | List[int]): 一个或多个窗口长度
+        stats (Tuple[str, ...]): 需要的统计量, 可选
+            'mean', 'std' (ddof=0), 'slope', 'intercept', 'r2', 'resid_std'
+
+    Returns:
+        Dict[int, Dict[str, np.ndarray]]: {window: {stat: (T, N) 数组}}
+    """
+    arr = np.asarray(arr, dtype=float)
+    windows = sorted({windows} if isinstance(windows, int) else set(windows))
+    out = {n: {k: np.full(arr.shape, np.nan) for k in stats} for n in windows}
+    T = arr.shape[0]
+    w_min, w_max = windows[0], windows[-1]
+    if T < w_min:
+        return out
+
+    width = int(np.prod(arr.shape[1:])) * w_max
+    step = max(CHUNK_ELEMENTS // max(width, 1), 1)
+    for start in range(w_min - 1, T, step):
+        stop = min(start + step, T)
+        block_start = max(start - w_max + 1, 0)
+        block = arr[block_start:stop]
+        for n in windows:
+            first = max(start, n - 1)
+            if first >= stop:
+                continue
+            w = sliding_window_view(block[first - n + 1 - block_start:], n, axis=0)
+            for k, v in _ols_stats(w, n, stats).items():
+                out[n][k][first:stop] = v
+    return out
+
+
+def _ols_stats(w:np.ndarray, n:int, stats:Tuple[str, ...]) -> Dict[str, np.ndarray]:
+    """对窗口视图 (rows, N, n) 计算回归统计量"""
+    x = np.arange(n, dtype=float)
+    weights = x - x.mean()
+    sxx = np.sum(weights**2)
+    res = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = w.mean(axis=-1)
+        sxy = (w * weights).sum(axis=-1)
+        slope = sxy / sxx
+        if {'std', 'r2', 'resid_std'} & set(stats):
+            dev = w - mean[..., None]
+            syy = (dev * dev).sum(axis=-1)
+        for k in stats:
+            if k == 'mean':
+                res[k] = mean
+            elif k == 'std':
+                res[k] = np.sqrt(syy / n)
+            elif k == 'slope':
+                res[k] = slope
+            elif k == 'intercept':
+                res[k] = mean - slope * x.mean()
+            elif k == 'r2':
+                res[k] = sxy**2 / (sxx * syy)
+            elif k == 'resid_std':
+                res[k] = np.sqrt(np.maximum(syy - sxy**2 / sxx, 0) / (n - 2)) if n > 2 else np.full(mean.shape, np.nan)
+            else:
+                raise ValueError(f'未知的统计量: {k}')
+    return res
@@ -0,0 +1,217 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : streaming.py
+@Date    : 2026-10-20 10:05:12
+@Author  : DDB
+@Version : 1.0
+@Desc    : 流式因子引擎: 逐 bar O(1) 更新全市场因子
+'''
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+
+
+
+class ROLLING_WINDOW:
+    '''全市场 (N,) 的定长滑动窗口状态
+
+    环形缓冲区保存窗口内的原始值, 并维护:
+    - 非有限值 (NaN/inf) 计数: 窗口内存在缺失时输出 NaN, 与批量计算一致
+    - 滑动和 S0 与位置加权和 S1 = Σ k·y_k (k = 0..n-1), 用于滚动回归
+    - Welford 均值与二阶中心矩 M2, 用于方差
+    每 resync 次更新从缓冲区重新计算一次, 消除累积误差.
+    '''
+    def __init__(self, n:int, size:int, resync:int=10000):
+        self.n = n
+        self.buf = np.full((n, size), np.nan)
+        self.pos = 0
+        self.resync = resync
+        self.steps = 0
+        self.nan_count = np.full(size, n)
+        self.s0 = np.zeros(size)
+        self.s1 = np.zeros(size)
+        self.count = np.zeros(size)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+
+
+    def push(self, x:np.ndarray):
+        n = self.n
+        old = self.buf[self.pos].copy()
+        self.buf[self.pos] = x
+        self.pos = (self.pos + 1) % n
+
+        valid_old = np.isfinite(old)
+        valid_new = np.isfinite(x)
+        old0 = np.where(valid_old, old, 0.0)
+        new0 = np.where(valid_new, x, 0.0)
+        self.nan_count += (~valid_new).astype(int) - (~valid_old).astype(int)
+
+        ## 滑动和与位置加权和
+        self.s1 += -(self.s0 - old0) + (n - 1) * new0
+        self.s0 += new0 - old0
+
+        ## Welford: 先移除旧值, 再加入新值
+        m = valid_old & (self.count > 1)
+        k = np.where(m, self.count, 2)
+        mean_old = self.mean
+        mean_new = np.where(m, (k * mean_old - old0) / (k - 1), mean_old)
+        self.m2 = np.where(m, self.m2 - (old0 - mean_old) * (old0 - mean_new), self.m2)
+        self.mean = mean_new
+        reset = valid_old & (self.count <= 1)
+        self.mean = np.where(reset, 0.0, self.mean)
+        self.m2 = np.where(reset, 0.0, self.m2)
+        self.count -= valid_old
+
+        self.count += valid_new
+        d = new0 - self.mean
+        self.mean = np.where(valid_new, self.mean + d / np.maximum(self.count, 1), self.mean)
+        self.m2 = np.where(valid_new, self.m2 + d * (new0 - self.mean), self.m2)
+
+        self.steps += 1
+        if self.steps % self.resync == 0:
+            self._resync()
+
+
+    def _resync(self):
+        """从缓冲区重新计算全部统计量"""
+        ordered = np.roll(self.buf, -self.pos, axis=0)
+        valid = np.isfinite(ordered)
+        y0 = np.where(valid, ordered, 0.0)
+        self.s0 = y0.sum(axis=0)
+        self.s1 = (np.arange(self.n)[:, None] * y0).sum(axis=0)
+        self.count = valid.sum(axis=0).astype(float)
+        self.mean = self.s0 / np.maximum(self.count, 1)
+        self.m2 = (np.where(valid, ordered - self.mean, 0.0) ** 2).sum(axis=0)
+
+
+    @property
+    def full(self) -> np.ndarray:
+        return self.nan_count == 0
+
+    def sum(self) -> np.ndarray:
+        return np.where(self.full, self.s0, np.nan)
+
+    def var(self, ddof:int=1) -> np.ndarray:
+        ## 常数序列的 M2 在浮点上可能略偏离 0, 低于相对精度时视为 0
+        m2 = np.where(self.m2 <= 1e-12 * self.mean**2 * self.n, 0.0, self.m2)
+        return np.where(self.full, np.maximum(m2, 0) / (self.n - ddof), np.nan)
+
+    def slope(self) -> np.ndarray:
+        x_mean = (self.n - 1) / 2
+        sxx = self.n * (self.n**2 - 1) / 12
+        return np.where(self.full, (self.s1 - x_mean * self.s0) / sxx, np.nan)
+
+
+
+class STREAM_ENGINE:
+    '''流式因子引擎
+
+    对全市场逐 bar 增量更新因子, 定义与 registry 中的同名因子一致:
+    psy_n (滑动计数), hist_volatility_n / hist_vol_std_n (Welford 方差),
+    slope_n (窗口标准化 + 滑动回归和), lags_pct_n (环形缓冲区), upDownCount.
+    每个 bar 的计算量与历史长度无关.
+    '''
+    def __init__(
+        self,
+        symbols:List[str],
+        psy_ns:List[int] = (12, 24),
+        vol_ns:List[int] = (12, 24),
+        vol_std_ns:List[int] = (10, 20),
+        slope_ns:List[int] = (5, 10, 14, 20, 60),
+        lags:List[int] = (14, 28),
+        resync:int = 10000,
+    ):
+        self.symbols = pd.Index(symbols, name='symbol')
+        N = len(self.symbols)
+        self.lags = list(lags)
+        self.prev_close = np.full(N, np.nan)
+        self.closes = np.full((max(self.lags, default=0) + 1, N), np.nan)   # 收盘价环形缓冲区
+        self.close_pos = 0
+
+        self.psy = {n: ROLLING_WINDOW(n, N, resync) for n in psy_ns}
+        self.vol = {n: ROLLING_WINDOW(n, N, resync) for n in vol_ns}
+        self.vol_std = {n: ROLLING_WINDOW(n, N, resync) for n in vol_std_ns}
+        self.close_win = {n: ROLLING_WINDOW(n, N, resync) for n in slope_ns}
+        self.y_norm_win = {n: ROLLING_WINDOW(n, N, resync) for n in slope_ns}
+        self._lagged = {}   # 延期 1 bar 输出的因子 (与 registry 的 shift(1) 一致)
+
+
+    def update(self, close:np.ndarray, volume:np.ndarray) -> Dict[str, np.ndarray]:
+        """输入一个 bar 的全市场收盘价与成交量 (N,), 返回各因子的最新值 (N,)"""
+        close = np.asarray(close, dtype=float)
+        volume = np.asarray(volume, dtype=float)
+        out = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            up = (close - self.prev_close > 0).astype(float)
+            log_ret = np.log(close / self.prev_close)
+            log_vol = np.log(volume)
+
+            # 1. momentum
+            current = {}
+            for n, win in self.close_win.items():
+                win.push(close)
+                std = np.sqrt(win.var(ddof=0))
+                y_norm = (close - win.mean) / std
+                self.y_norm_win[n].push(y_norm)
+                current[f'momentum/slope_{n}'] = self.y_norm_win[n].slope()
+
+            # 2. reversal
+            self.closes[self.close_pos] = close
+            for n in self.lags:
+                past = self.closes[(self.close_pos - n) % len(self.closes)]
+                current[f'reversal/lags_pct_{n}'] = close / past - 1
+            self.close_pos = (self.close_pos + 1) % len(self.closes)
+
+        for key, value in current.items():
+            out[key] = self._lagged.get(key, np.full(len(self.symbols), np.nan))
+        self._lagged = current
+        if 'momentum/slope_14' in out:
+            out['momentum/slope_14_abs'] = np.abs(out['momentum/slope_14'])
+
+        # 3. emotion
+        for n, win in self.psy.items():
+            win.push(up)
+            out[f'emotion/psy_{n}'] = win.sum() / n * 100
+        out['emotion/upDownCount'] = np.array([up.sum()])
+
+        # 4. volatility
+        for n, win in self.vol.items():
+            win.push(log_ret)
+            out[f'volatility/hist_volatility_{n}'] = np.sqrt(win.var(ddof=1))
+        for n, win in self.vol_std.items():
+            win.push(log_vol)
+            out[f'volatility/hist_vol_std_n{n}'] = np.sqrt(win.var(ddof=1))
+
+        self.prev_close = close
+        return out
+
+
+    def replay(self, bars:str | Path | pd.DataFrame) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """回放 parquet 中的分钟 bar (MultiIndex(date, symbol), 含 close/volume)
+
+        Returns:
+            Tuple[Dict[str, np.ndarray], np.ndarray]: ({因子: (T, N)}, 每个 bar 的耗时 (微秒))
+        """
+        if not isinstance(bars, pd.DataFrame):
+            bars = pd.read_parquet(bars, columns=['close', 'volume'])
+        panel = PANEL.from_data(bars, fields=['close', 'volume'], symbols=self.symbols)
+        T = panel.shape[0]
+
+        result, latency = {}, np.empty(T)
+        for t in range(T):
+            t0 = time.perf_counter_ns()
+            out = self.update(panel.close[t], panel.volume[t])
+            latency[t] = (time.perf_counter_ns() - t0) / 1e3
+            for key, value in out.items():
+                if key not in result:
+                    result[key] = np.full((T, len(value)), np.nan)
+                result[key][t] = value
+        return result, latency
+
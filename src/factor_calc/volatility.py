@@ -8,9 +8,11 @@
 '''
 
 import numpy as np
-import pandas as pd
 from typing import *
 
+from src.factor_calc.panel import PANEL
+from src.factor_calc.rolling import rolling_std, shift
+
 
 
 class VOLATILITY:
@@ -19,23 +21,20 @@ class VOLATILITY:
         """_summary_
 
         Args:
-            data (_type_): _description_
+            data (pd.DataFrame | PANEL): 行情数据, 传入 PANEL 时与其他因子类共享
             is_lags (bool, optional): 因子数据是否延期 1 日.
         """
-        self.data = data
+        self.data = PANEL.from_data(data)
         self.is_lags = is_lags
 
 
     def hist_volatility_n(self, days:int=24):
         '''N日的历史对数收益率的波动率'''
-        close_df = self.data.close.unstack()
-        ln_rt_df = np.log(close_df / close_df.shift(1))
+        ln_rt = self.data.log_ret
         if self.is_lags:
-            ln_rt_df = ln_rt_df.shift(1)
-        std_df = ln_rt_df.rolling(days).std(ddof=1)
-        factors = pd.DataFrame(std_df.stack())
-        factors.columns = [f'hist_volatility_{days}']
-        return factors
+            ln_rt = shift(ln_rt, 1)
+        std = self.rolling_vol(ln_rt, days)
+        return self.data.to_frame(std, f'hist_volatility_{days}')
     
     def hist_vol_std_n(self, days:int=10):
         """N日成交量的历史波动率
@@ -43,11 +42,21 @@ class VOLATILITY:
         Args:
             days (int, optional): _description_. Defaults to 10.
         """
-        vol_df = self.data.volume.unstack()
-        ln_vol_df = np.log(vol_df)
+        ln_vol = self.data.cached('log_volume', lambda: self.log_volume(self.data.volume))
         if self.is_lags:
-            ln_vol_df = ln_vol_df.shift(1)
-        std_df = ln_vol_df.rolling(days).std(ddof=1)
-        factors = pd.DataFrame(std_df.stack())
-        factors.columns = [f'hist_vol_std_{days}']
-        return factors
+            ln_vol = shift(ln_vol, 1)
+        std = self.rolling_vol(ln_vol, days)
+        return self.data.to_frame(std, f'hist_vol_std_{days}')
+
+
+    @staticmethod
+    def log_volume(volume:np.ndarray) -> np.ndarray:
+        """对数成交量 (成交量为 0 时为 -inf), 注册表与本类共用"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.log(volume)
+
+
+    @staticmethod
+    def rolling_vol(x:np.ndarray, days:int) -> np.ndarray:
+        """days 日滚动样本标准差"""
+        return rolling_std(x, days, ddof=1)
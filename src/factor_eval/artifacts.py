@@ -0,0 +1,294 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : artifacts.py
+@Date    : 2026-10-21 14:02:17
+@Author  : DDB
+@Version : 1.0
+@Desc    : 离线因子评价结果 (IC / 分组收益 / 分组分布) 的版本化存储, 供看板直接读取
+'''
+
+import os
+import json
+import shutil
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.data_loader.store import store_stamp
+from src.data_loader.loader import DATA_DIR, FACTOR_DIR, RAW_DIR, list_factors, load_factor, load_price
+from src.factor_eval.get_eval import EVALUATION
+from src.factor_eval.forward_ret import FORWARD_RET, panel_fingerprint
+
+
+EVAL_DIR = DATA_DIR / "eval"
+ARTIFACT_VERSION = 'v1'     # 评价口径变化时递增, 旧版本结果自动失效
+DEFAULT_RET_ND = [1, 5, 10, 22]
+DEFAULT_QUANTILE = 10
+
+
+
+class EVAL_ARTIFACTS:
+    '''离线评价结果存储
+
+    目录结构为 `<root>/<version>/<board>/<type>/<name>/`:
+    - ic.parquet / rank_ic.parquet: 逐日 IC, 列为 IC_{nd}d
+    - grouped.parquet: MultiIndex(grouped, date) 的分组平均收益, 列为 {nd}d; counts.parquet 为对应样本数
+    - describe.parquet: 全区间的分组因子分布
+    - labels.npy / dates.npy: (T, N) int8 组号 (0 起, -1 无效), 用于任意日期区间的分组分布
+    - meta.json: 参数、symbol 列表与行情/因子的写入标记, 最后写入
+    逐日结果按截面计算, 按日期切片即得到子区间的结果; 区间末尾的未来收益使用区间之后的行情.
+    '''
+    def __init__(self, root:str | Path=EVAL_DIR, version:str=ARTIFACT_VERSION):
+        self.root = Path(root)
+        self.version = version
+
+
+    def path(self, factor_type:str, factor_name:str, board:str='all') -> Path:
+        return self.root / self.version / board / factor_type / factor_name
+
+
+    def meta(self, factor_type:str, factor_name:str, board:str='all') -> Dict[str, Any] | None:
+        meta_path = self.path(factor_type, factor_name, board) / 'meta.json'
+        if not meta_path.is_file():
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+    def covers(
+        self,
+        factor_type:str,
+        factor_name:str,
+        board:str = 'all',
+        ret_nd:List[int] = None,
+        quantile:int = None,
+        bins:int = None,
+        price_root:str | Path = RAW_DIR,
+        factor_root:str | Path = FACTOR_DIR,
+    ) -> bool:
+        """已有结果是否满足所需参数且未过期: 行情与因子的写入标记须与当前存储一致, 收益周期为其子集;
+        指定 quantile / bins 时分组方式也须相同"""
+        meta = self.meta(factor_type, factor_name, board)
+        if meta is None:
+            return False
+        if meta['price_stamp'] != store_stamp(price_root) \
+                or meta['factor_stamp'] != store_stamp(Path(factor_root) / factor_type / factor_name):
+            return False
+        ret_nd = ret_nd or DEFAULT_RET_ND
+        if not set(ret_nd) <= set(meta['ret_nd']):
+            return False
+        return (quantile is None and bins is None) or (quantile == meta['quantile'] and bins == meta['bins'])
+
+
+    def read(
+        self,
+        kind:Literal['ic', 'rank_ic', 'grouped', 'counts', 'describe'],
+        factor_type:str,
+        factor_name:str,
+        board:str = 'all',
+        start_date:str = None,
+        end_date:str = None,
+        columns:List[str] = None,
+    ) -> pd.DataFrame:
+        """读取评价结果, 日期区间下推到 parquet 读取"""
+        filters = []
+        if kind != 'describe':
+            if start_date is not None:
+                filters.append(('date', '>=', pd.Timestamp(start_date)))
+            if end_date is not None:
+                filters.append(('date', '<=', pd.Timestamp(end_date)))
+        return pd.read_parquet(self.path(factor_type, factor_name, board) / f'{kind}.parquet', columns=columns, filters=filters or None)
+
+
+    def read_describe(
+        self,
+        factor_df:pd.DataFrame,
+        factor_type:str,
+        factor_name:str,
+        board:str = 'all',
+        start_date:str = None,
+        end_date:str = None,
+    ) -> pd.DataFrame:
+        """区间内的分组因子分布: 覆盖全部已存日期时直接读取, 否则由已存组号与因子值计算 (无需重新分组)"""
+        path = self.path(factor_type, factor_name, board)
+        meta = self.meta(factor_type, factor_name, board)
+        dates = pd.DatetimeIndex(np.load(path / 'dates.npy'))
+        lo = dates.searchsorted(pd.Timestamp(start_date)) if start_date is not None else 0
+        hi = dates.searchsorted(pd.Timestamp(end_date), side='right') if end_date is not None else len(dates)
+        if lo == 0 and hi == len(dates):
+            return self.read('describe', factor_type, factor_name, board)
+
+        labels = np.load(path / 'labels.npy', mmap_mode='r')[lo:hi]
+        factor = PANEL(dates[lo:hi], meta['symbols'], {}).align(factor_df)
+        labelled = labels >= 0
+        return EVALUATION._group_describe(labels[labelled].astype(np.int64), factor[labelled], meta['n_groups'])
+
+
+    def read_labels(
+        self,
+        factor_type:str,
+        factor_name:str,
+        board:str = 'all',
+        start_date:str = None,
+        end_date:str = None,
+    ) -> Tuple[pd.DatetimeIndex, pd.Index, np.ndarray, int]:
+        """区间内的组号: (日期, symbol, (T, N) 组号 (0 起, -1 无效), 组数)"""
+        path = self.path(factor_type, factor_name, board)
+        meta = self.meta(factor_type, factor_name, board)
+        dates = pd.DatetimeIndex(np.load(path / 'dates.npy'), name='date')
+        lo = dates.searchsorted(pd.Timestamp(start_date)) if start_date is not None else 0
+        hi = dates.searchsorted(pd.Timestamp(end_date), side='right') if end_date is not None else len(dates)
+        labels = np.load(path / 'labels.npy', mmap_mode='r')[lo:hi]
+        return dates[lo:hi], pd.Index(meta['symbols'], name='symbol'), labels.astype(np.int64), meta['n_groups']
+
+
+    def write(
+        self,
+        factor_type:str,
+        factor_name:str,
+        board:str,
+        frames:Dict[str, pd.DataFrame],
+        arrays:Dict[str, np.ndarray],
+        meta:Dict[str, Any],
+    ) -> Path:
+        """写入一个因子的全部结果: 先写临时目录, 再整体替换"""
+        path = self.path(factor_type, factor_name, board)
+        tmp_path = path.with_name(f'{path.name}.tmp-{os.getpid()}')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        for kind, df in frames.items():
+            df.to_parquet(tmp_path / f'{kind}.parquet')
+        for kind, arr in arrays.items():
+            np.save(tmp_path / f'{kind}.npy', arr)
+        with open(tmp_path / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        old_path = path.with_name(f'{path.name}.old-{os.getpid()}')
+        if path.exists():
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return path
+
+
+
+def evaluate_artifacts(
+    panel:PANEL,
+    factor_df:pd.DataFrame,
+    ret_nd:List[int] = DEFAULT_RET_ND,
+    quantile:int = DEFAULT_QUANTILE,
+    bins:int = None,
+    fingerprint:str = None,
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, np.ndarray]]:
+    """计算单个因子的全部评价结果"""
+    evaluator = EVALUATION(panel, factor_df, ret_nd, fingerprint=fingerprint)
+    describe, grouped, counts = evaluator.calc_grouped(quantile, bins, return_counts=True)
+    labels, _ = evaluator.group_labels(quantile, bins)
+    frames = {
+        'ic': evaluator.calc_daily_IC('pearson'),
+        'rank_ic': evaluator.calc_daily_IC('spearman'),
+        'grouped': grouped,
+        'counts': counts,
+        'describe': describe,
+    }
+    arrays = {'labels': labels.astype(np.int8), 'dates': panel.dates.values}
+    return frames, arrays
+
+
+def build_artifacts(
+    factors:List[Tuple[str, str]] = None,
+    board:str = 'all',
+    ret_nd:List[int] = DEFAULT_RET_ND,
+    quantile:int = DEFAULT_QUANTILE,
+    bins:int = None,
+    start_date:str = None,
+    n_jobs:int = 1,
+    force:bool = False,
+    artifacts:EVAL_ARTIFACTS = None,
+    price_root:str | Path = RAW_DIR,
+    factor_root:str | Path = FACTOR_DIR,
+) -> List[Tuple[str, str]]:
+    """离线计算并保存因子评价结果, 行情与因子均未变化的因子跳过
+
+    Args:
+        factors (List[Tuple[str, str]], optional): (因子大类, 因子名), 默认因子库中的全部因子
+        n_jobs (int, optional): 进程数. 1 为串行, -1 为全部 CPU.
+        force (bool, optional): 忽略写入标记, 全部重算
+
+    Returns:
+        List[Tuple[str, str]]: 本次写入的因子
+    """
+    artifacts = artifacts or EVAL_ARTIFACTS()
+    if factors is None:
+        factors = [(t, n) for t, names in list_factors(factor_root, cross_section=True).items() for n in names]
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    price_stamp = store_stamp(price_root)
+    todo = []
+    for factor_type, factor_name in factors:
+        stamp = store_stamp(Path(factor_root) / factor_type / factor_name)
+        meta = artifacts.meta(factor_type, factor_name, board)
+        fresh = meta is not None and meta['price_stamp'] == price_stamp and meta['factor_stamp'] == stamp \
+            and meta['ret_nd'] == list(ret_nd) and meta['quantile'] == quantile and meta['bins'] == bins
+        if force or not fresh:
+            todo.append((factor_type, factor_name, stamp))
+    if not todo:
+        return []
+
+    data = load_price(start_date, columns=['close'], board=board, root=price_root)
+    panel = PANEL.from_data(data, fields=['close'])
+    fingerprint = panel_fingerprint(panel)
+    FORWARD_RET.get(panel, ret_nd, fingerprint)     # 写入磁盘缓存, 子进程直接 mmap 读取
+    params = dict(
+        board=board, ret_nd=list(ret_nd), quantile=quantile, bins=bins, start_date=start_date,
+        fingerprint=fingerprint, price_stamp=price_stamp, root=str(artifacts.root), version=artifacts.version,
+        factor_root=str(factor_root),
+    )
+
+    if n_jobs <= 1 or len(todo) <= 1:
+        return [_build_one(panel, params, job) for job in todo]
+
+    meta, handles = panel.to_shared()
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(meta, params)) as pool:
+            return list(pool.map(_run_job, todo))
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+
+
+def _build_one(panel:PANEL, params:Dict[str, Any], job:Tuple[str, str, str]) -> Tuple[str, str]:
+    factor_type, factor_name, stamp = job
+    factor_df = load_factor(factor_type, factor_name, params['start_date'], root=params['factor_root'])
+    frames, arrays = evaluate_artifacts(panel, factor_df, params['ret_nd'], params['quantile'], params['bins'], params['fingerprint'])
+    meta = {
+        'version': params['version'], 'board': params['board'], 'ret_nd': params['ret_nd'],
+        'quantile': params['quantile'], 'bins': params['bins'], 'n_groups': params['quantile'] or params['bins'],
+        'price_stamp': params['price_stamp'], 'factor_stamp': stamp, 'symbols': panel.symbols.tolist(),
+    }
+    EVAL_ARTIFACTS(params['root'], params['version']).write(factor_type, factor_name, params['board'], frames, arrays, meta)
+    return factor_type, factor_name
+
+
+
+## 子进程状态: 挂载的共享内存行情面板
+_WORKER = {}
+
+def _init_worker(meta:Dict[str, Any], params:Dict[str, Any]):
+    panel, handles = PANEL.from_shared(meta)
+    _WORKER['panel'] = panel
+    _WORKER['params'] = params
+    _WORKER['handles'] = handles    # 保持引用, 防止共享内存被提前释放
+
+def _run_job(job:Tuple[str, str, str]) -> Tuple[str, str]:
+    return _build_one(_WORKER['panel'], _WORKER['params'], job)
+
+
+if __name__ == '__main__':
+    print(build_artifacts(n_jobs=-1))
@@ -0,0 +1,163 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : batch.py
+@Date    : 2026-10-21 09:12:36
+@Author  : DDB
+@Version : 1.0
+@Desc    : 因子库批量评价: 全部因子 × 全部收益周期的 IC / RankIC / ICIR / 胜率 / 分组收益汇总表
+'''
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.data_loader.loader import FACTOR_DIR, list_factors, load_factor, load_price
+from src.factor_eval.cross_section import group_mean, quantile_labels, rowwise_corr, rowwise_spearman
+from src.factor_eval.forward_ret import FORWARD_RET
+
+
+
+def _ic_stats(ic:np.ndarray, prefix:str) -> Dict[str, float]:
+    """IC 序列 (T,) 的均值、标准差、ICIR 与胜率 (IC > 0 的天数占比)"""
+    ic = ic[~np.isnan(ic)]
+    n = len(ic)
+    mean = ic.mean() if n else np.nan
+    std = ic.std(ddof=1) if n > 1 else np.nan
+    return {
+        f'{prefix}_mean': mean,
+        f'{prefix}_std': std,
+        f'{prefix}IR': mean / std if std else np.nan,
+        f'{prefix}_win_rate': (ic > 0).mean() if n else np.nan,
+    }
+
+
+def evaluate_factor(factor:np.ndarray, rets:np.ndarray, ret_nd:List[int], quantile:int=10) -> List[Dict[str, Any]]:
+    """单个因子对全部收益周期的评价指标
+
+    Args:
+        factor (np.ndarray): (T, N) 因子
+        rets (np.ndarray): (K, T, N) 各周期未来收益, 与 ret_nd 对应
+        quantile (int, optional): 分组数
+
+    Returns:
+        List[Dict]: 每个周期一行: IC / RankIC 统计, 各组平均收益 G1..Gq 与多空收益 (Gq - G1)
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)     # 全 NaN 的日期 / 分组
+        ic = rowwise_corr(factor, rets)
+        rank_ic = rowwise_spearman(factor, rets)
+        group_ret, _ = group_mean(quantile_labels(factor, quantile), rets, quantile)   # (K, T, G)
+        group_avg = np.nanmean(group_ret, axis=1)
+        long_short = np.nanmean(group_ret[:, :, -1] - group_ret[:, :, 0], axis=1)
+
+    rows = []
+    for k, nd in enumerate(ret_nd):
+        row = {'horizon': nd, 'n_days': int((~np.isnan(ic[k])).sum())}
+        row.update(_ic_stats(ic[k], 'IC'))
+        row.update(_ic_stats(rank_ic[k], 'RankIC'))
+        row.update({f'G{g + 1}': group_avg[k, g] for g in range(quantile)})
+        row['long_short'] = long_short[k]
+        rows.append(row)
+    return rows
+
+
+
+class BATCH_EVALUATION:
+    '''因子库批量评价
+
+    行情只读取收盘价并对齐一次, 各周期未来收益共享 (并行时放入共享内存);
+    每个因子读取后对齐到同一 date × symbol 网格, 全部周期一次向量化计算.
+
+    Args:
+        data (pd.DataFrame | PANEL, optional): 行情数据, 默认按 start_date / end_date 读取全市场收盘价
+        ret_nd (List[int], optional): 未来收益周期
+        quantile (int, optional): 分组数
+        factor_root (str, optional): 因子库目录
+    '''
+    def __init__(
+        self,
+        data:pd.DataFrame | PANEL = None,
+        ret_nd:List[int] = None,
+        quantile:int = 10,
+        start_date:str = None,
+        end_date:str = None,
+        factor_root:str = FACTOR_DIR,
+    ):
+        if data is None:
+            data = load_price(start_date, end_date, columns=['close'])
+        self.panel = PANEL.from_data(data, fields=['close'])
+        self.ret_nd = ret_nd if ret_nd else [1, 5, 10, 22]
+        self.quantile = quantile
+        self.start_date = start_date
+        self.end_date = end_date
+        self.factor_root = factor_root
+        forward_returns = FORWARD_RET.get(self.panel, self.ret_nd)
+        self.rets = PANEL(self.panel.dates, self.panel.symbols, {str(nd): forward_returns[nd] for nd in self.ret_nd})
+
+
+    def evaluate(self, factor_type:str, factor_name:str) -> List[Dict[str, Any]]:
+        """读取并评价单个因子"""
+        factor_df = load_factor(factor_type, factor_name, self.start_date, self.end_date, root=self.factor_root)
+        factor = self.rets.align(factor_df) if len(factor_df) else np.full(self.rets.shape, np.nan)
+        rets = np.stack([self.rets.fields[str(nd)] for nd in self.ret_nd])
+        rows = evaluate_factor(factor, rets, self.ret_nd, self.quantile)
+        return [{'factor_type': factor_type, 'factor_name': factor_name, **row} for row in rows]
+
+
+    def run(self, factors:List[Tuple[str, str]]=None, n_jobs:int=1) -> pd.DataFrame:
+        """批量评价
+
+        Args:
+            factors (List[Tuple[str, str]], optional): (因子大类, 因子名), 默认因子库中的全部因子
+            n_jobs (int, optional): 进程数. 1 为串行, -1 为全部 CPU.
+
+        Returns:
+            pd.DataFrame: 汇总表, 每行一个 (因子, 收益周期)
+        """
+        if factors is None:
+            factors = [(t, n) for t, names in list_factors(self.factor_root, cross_section=True).items() for n in names]
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+
+        rows = []
+        if n_jobs <= 1 or len(factors) <= 1:
+            for factor_type, factor_name in factors:
+                rows += self.evaluate(factor_type, factor_name)
+        else:
+            meta, handles = self.rets.to_shared()
+            params = (self.ret_nd, self.quantile, self.start_date, self.end_date, str(self.factor_root))
+            try:
+                with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(meta, params)) as pool:
+                    for result in pool.map(_run_job, factors):
+                        rows += result
+            finally:
+                for shm in handles:
+                    shm.close()
+                    shm.unlink()
+        return pd.DataFrame(rows)
+
+
+
+## 子进程状态: 挂载共享内存中的未来收益
+_WORKER = {}
+
+def _init_worker(meta:Dict[str, Any], params:Tuple):
+    rets, handles = PANEL.from_shared(meta)
+    batch = BATCH_EVALUATION.__new__(BATCH_EVALUATION)
+    batch.ret_nd, batch.quantile, batch.start_date, batch.end_date, batch.factor_root = params
+    batch.rets = rets
+    _WORKER['batch'] = batch
+    _WORKER['handles'] = handles    # 保持引用, 防止共享内存被提前释放
+
+def _run_job(factor:Tuple[str, str]) -> List[Dict[str, Any]]:
+    return _WORKER['batch'].evaluate(*factor)
+
+
+if __name__ == '__main__':
+    summary = BATCH_EVALUATION(start_date='2020-01-01').run(n_jobs=-1)
+    print(summary.sort_values(['horizon', 'RankICIR'], ascending=[True, False]).to_string())
@@ -0,0 +1,192 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : chunked.py
+@Date    : 2026-10-24 10:12:37
+@Author  : DDB
+@Version : 1.0
+@Desc    : 按日期分块的流式因子评价 (行情/因子超过内存时), 结果与 EVALUATION 一致
+'''
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.data_loader.store import PARQUET_STORE
+from src.data_loader.loader import FACTOR_DIR, RAW_DIR, load_factor, load_price
+from src.factor_eval.cross_section import bin_labels, group_mean, quantile_labels, rowwise_corr, rowwise_spearman, sorted_quantiles
+from src.factor_eval.forward_ret import calc_forward_return
+from src.factor_eval.get_eval import EVALUATION
+
+
+MEMORY_BUDGET = 2 * 1024 ** 3
+BYTES_PER_CELL = 8 * 24         # 每个 (date, symbol) 格在一个块内的峰值字节数估计 (读取开销 + 对齐 + 排名临时数组)
+
+
+
+class CHUNKED_EVALUATION:
+    '''分块流式因子评价
+
+    按日期分块读取行情与因子存储, 每块额外读入 max(ret_nd) 个交易日用于计算未来收益 (不超过 end_date),
+    逐块累积逐日 IC / RankIC 与分组收益; 各组因子值写入临时文件, 最后逐组计算分布统计.
+    所有统计都是逐日截面的, 因此与 EVALUATION 一次载入的结果一致.
+
+    memory_budget 只用于估计块大小: 按首个分片的截面宽度与每格 BYTES_PER_CELL 字节的经验值换算为交易日数,
+    并不测量或限制实际内存, 是估计而非上限; 内存紧张时应留有余量或直接指定 chunk_days.
+
+    Args:
+        factor_type, factor_name (str): 因子
+        ret_nd (List[int], optional): 未来收益周期
+        board (str, optional): 股票池
+        memory_budget (int, optional): 单块峰值内存预算 (字节, 估计值)
+        chunk_days (int, optional): 直接指定每块交易日数, 优先于 memory_budget
+    '''
+    def __init__(
+        self,
+        factor_type:str,
+        factor_name:str,
+        ret_nd:List[int] = None,
+        start_date:str = None,
+        end_date:str = None,
+        board:str = 'all',
+        memory_budget:int = MEMORY_BUDGET,
+        chunk_days:int = None,
+        price_root:str | Path = RAW_DIR,
+        factor_root:str | Path = FACTOR_DIR,
+    ):
+        self.factor_type = factor_type
+        self.factor_name = factor_name
+        self.ret_nd:List = ret_nd if ret_nd else [1,5,10,22]
+        self.start_date = start_date
+        self.end_date = end_date
+        self.board = board
+        self.memory_budget = memory_budget
+        self.price_root = price_root
+        self.factor_root = factor_root
+
+        self.dates = PARQUET_STORE(price_root).dates(start_date, end_date)
+        self.lookahead = max(self.ret_nd)
+        self.chunk_days = chunk_days or self._chunk_days()
+        self._results = {}
+
+
+    def _chunk_days(self) -> int:
+        """按预算估计每块交易日数: 以首个分片的平均每日 symbol 数估计截面宽度"""
+        files = PARQUET_STORE(self.price_root).files(self.start_date, self.end_date)
+        if not files:
+            return 1
+        index = pd.read_parquet(files[0], columns=[]).index
+        width = len(index) / max(index.get_level_values('date').nunique(), 1)
+        per_day = width * BYTES_PER_CELL * (len(self.ret_nd) + 1)
+        return max(int(self.memory_budget // per_day) - self.lookahead, 1)
+
+
+    def chunks(self) -> Iterator[Tuple[PANEL, np.ndarray, Dict[int, np.ndarray], int]]:
+        """逐块产出 (行情面板, 因子 (T, N), 未来收益 {nd: (T, N)}, 本块自有的行数); 面板末尾为前视的重叠行"""
+        for i in range(0, len(self.dates), self.chunk_days):
+            own = self.dates[i:i + self.chunk_days]
+            last = self.dates[min(i + self.chunk_days + self.lookahead, len(self.dates)) - 1]
+            data = load_price(own[0], last, columns=['close'], board=self.board, root=self.price_root)
+            if data.empty:
+                continue
+            panel = PANEL.from_data(data, fields=['close'])
+            factor_df = load_factor(self.factor_type, self.factor_name, own[0], own[-1], root=self.factor_root)
+            factor = panel.align(factor_df) if len(factor_df) else np.full(panel.shape, np.nan)
+            forward_returns = {nd: calc_forward_return(panel.close, nd) for nd in self.ret_nd}
+            del data, factor_df
+            yield panel, factor, forward_returns, int((panel.dates <= own[-1]).sum())
+
+
+    def evaluate(self, quantile:int=10, bins:int=None) -> Dict[str, pd.DataFrame]:
+        """一次遍历全部数据
+
+        Returns:
+            Dict[str, pd.DataFrame]: 'IC', 'RankIC' (逐日), 'describe', 'grouped', 'counts', 与 EVALUATION 的对应结果同格式
+        """
+        key = (quantile, bins)
+        if key in self._results:
+            return self._results[key]
+
+        n_groups = quantile if quantile else bins
+        ic, rank_ic, grouped, counts = [], [], [], []
+        with tempfile.TemporaryDirectory() as spill_dir:
+            spill = [Path(spill_dir) / f'{g}.bin' for g in range(n_groups)]
+            for panel, factor, forward_returns, n_own in self.chunks():
+                dates = panel.dates[:n_own]
+                factor = factor[:n_own]
+                rets = np.stack([forward_returns[nd][:n_own] for nd in self.ret_nd])
+                columns = [f'IC_{nd}d' for nd in self.ret_nd]
+                ic.append(pd.DataFrame(rowwise_corr(factor, rets).T, index=dates, columns=columns))
+                rank_ic.append(pd.DataFrame(rowwise_spearman(factor, rets).T, index=dates, columns=columns))
+
+                labels = quantile_labels(factor, quantile) if quantile else bin_labels(factor, bins)
+                means, group_counts = group_mean(labels, rets, n_groups)
+                group_idx, dates_idx = np.nonzero(group_counts.T > 0)
+                index = pd.MultiIndex.from_arrays([(group_idx + 1).astype(float), dates[dates_idx]], names=['grouped', 'date'])
+                grouped.append(pd.DataFrame(means[:, dates_idx, group_idx].T, index=index, columns=[f'{nd}d' for nd in self.ret_nd]))
+                counts.append(pd.DataFrame({'count': group_counts[dates_idx, group_idx]}, index=index))
+
+                labelled = labels >= 0
+                flat_labels, flat_values = labels[labelled], factor[labelled]
+                for g in np.unique(flat_labels):
+                    with open(spill[g], 'ab') as f:
+                        flat_values[flat_labels == g].tofile(f)
+
+            describe = self._spilled_describe(spill)
+
+        columns = [f'IC_{nd}d' for nd in self.ret_nd]
+        empty_grouped = pd.DataFrame(columns=[f'{nd}d' for nd in self.ret_nd], index=pd.MultiIndex.from_arrays([[], []], names=['grouped', 'date']))
+        result = {
+            'IC': pd.concat(ic).dropna(how='all') if ic else pd.DataFrame(columns=columns),
+            'RankIC': pd.concat(rank_ic).dropna(how='all') if rank_ic else pd.DataFrame(columns=columns),
+            'describe': describe,
+            'grouped': pd.concat(grouped).sort_index(level=['grouped', 'date'], sort_remaining=False) if grouped else empty_grouped,
+            'counts': pd.concat(counts).sort_index(level=['grouped', 'date'], sort_remaining=False) if counts else pd.DataFrame(columns=['count']),
+        }
+        self._results[key] = result
+        return result
+
+
+    @staticmethod
+    def _spilled_describe(spill:List[Path]) -> pd.DataFrame:
+        """逐组读取溢写的因子值, 计算 describe 统计 (峰值内存为单组数据量)"""
+        rows = {}
+        for g, path in enumerate(spill):
+            if not path.is_file():
+                continue
+            values = np.sort(np.fromfile(path, dtype=float))
+            n = len(values)
+            mean = values.mean()
+            std = np.sqrt(((values - mean) ** 2).sum() / (n - 1)) if n > 1 else np.nan
+            pct = sorted_quantiles(values, np.array([0]), np.array([n]), [0, 0.25, 0.5, 0.75, 1])[0]
+            rows[float(g + 1)] = {'count': float(n), 'mean': mean, 'std': std, 'min': pct[0],
+                                  '25%': pct[1], '50%': pct[2], '75%': pct[3], 'max': pct[4]}
+        describe = pd.DataFrame.from_dict(rows, orient='index', columns=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
+        describe.index.name = 'grouped'
+        return describe
+
+
+    def calc_daily_IC(self, method:Literal['pearson', 'spearman']='pearson') -> pd.DataFrame:
+        """逐日 IC, 与分组参数无关, 已遍历过时直接复用"""
+        result = next(iter(self._results.values())) if self._results else self.evaluate()
+        return result['IC' if method == 'pearson' else 'RankIC']
+
+
+    def calc_IC(self, method:Literal['pearson', 'spearman']='pearson') -> pd.DataFrame:
+        return EVALUATION.monthly_IC(self.calc_daily_IC(method))
+
+
+    def calc_grouped(self, quantile:int=10, bins:int=None, return_counts:bool=False):
+        result = self.evaluate(quantile, bins)
+        if return_counts:
+            return result['describe'], result['grouped'], result['counts']
+        return result['describe'], result['grouped']
+
+
+
+if __name__ == '__main__':
+    EVAL = CHUNKED_EVALUATION('momentum', 'lags_pct_14', [1, 5, 10, 22], memory_budget=512 * 1024 ** 2)
+    print(EVAL.calc_IC())
@@ -0,0 +1,198 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : composite.py
+@Date    : 2026-10-23 15:06:12
+@Author  : DDB
+@Version : 1.0
+@Desc    : 复合因子: 等权、滚动 ICIR 加权、最大化 ICIR 加权, 结果写入 data/factors/composite/
+'''
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.data_loader.loader import FACTOR_DIR, RAW_DIR, factor_store, list_factors, load_factor, load_price
+from src.factor_eval.cross_section import rowwise_corr
+from src.factor_eval.forward_ret import FORWARD_RET
+from src.factor_eval.preprocess import zscore
+
+
+COMPOSITE_TYPE = 'composite'
+METHODS = ('equal', 'icir', 'max_icir')
+
+
+
+def rolling_sum(x:np.ndarray, window:int) -> np.ndarray:
+    """沿第 0 维的滚动窗口和 (含当前行), 由累计和相减得到, 每步 O(1) 更新"""
+    c = np.concatenate([np.zeros((1, *x.shape[1:])), np.cumsum(x, axis=0)])
+    T = x.shape[0]
+    lo = np.maximum(np.arange(1, T + 1) - window, 0)
+    return c[1:] - c[lo]
+
+
+def rolling_ic_stats(ic:np.ndarray, window:int, lag:int, min_periods:int) -> Tuple[np.ndarray, np.ndarray]:
+    """各日期可用的 IC 均值与协方差 (窗口内两两有效样本)
+
+    第 s 日的 IC 用到 s + lag 日的收盘价, 因此第 t 日只使用 s ≤ t - lag 的 IC.
+    窗口和由累计和差分得到 (一阶、二阶矩与样本数), 不对每个窗口重新拟合.
+
+    Args:
+        ic (np.ndarray): (T, K) 逐日 IC, NaN 为缺失
+        window (int): 窗口长度
+        lag (int): IC 的收益周期
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 均值 (T, K), 协方差 (T, K, K); 样本不足时为 NaN
+    """
+    T, K = ic.shape
+    valid = ~np.isnan(ic)
+    x = np.where(valid, ic, 0.0)
+    m = valid.astype(float)
+
+    n = rolling_sum(m, window)
+    sx = rolling_sum(x, window)
+    n_pair = rolling_sum(m[:, :, None] * m[:, None, :], window)
+    s_pair = rolling_sum(x[:, :, None] * m[:, None, :], window)     # [i, j]: i 在 i, j 均有效时的和
+    s_prod = rolling_sum(x[:, :, None] * x[:, None, :], window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(n >= min_periods, sx / n, np.nan)
+        cov = (s_prod - s_pair * s_pair.transpose(0, 2, 1) / n_pair) / (n_pair - 1)
+    cov = np.where(n_pair >= min_periods, cov, np.nan)
+
+    ## 平移 lag 行: 第 t 行为截至 t - lag 的窗口
+    out_mean = np.full((T, K), np.nan)
+    out_cov = np.full((T, K, K), np.nan)
+    out_mean[lag:] = mean[:T - lag]
+    out_cov[lag:] = cov[:T - lag]
+    return out_mean, out_cov
+
+
+def _normalize(w:np.ndarray) -> np.ndarray:
+    """权重按绝对值之和归一"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return w / np.abs(w).sum(axis=1, keepdims=True)
+
+
+
+class COMPOSITE:
+    '''复合因子
+
+    各成分因子先对齐到行情网格并逐日截面标准化 (z-score), 再按逐日权重线性组合, 组合后再次标准化;
+    当日缺失的成分因子按 0 (截面均值) 计入.
+
+    - equal: 等权
+    - icir: 权重为各因子过去 window 日的 ICIR
+    - max_icir: 权重为 (Σ + shrink · tr(Σ)/K · I)⁻¹ μ, μ、Σ 为过去 window 日 IC 的均值与协方差
+
+    IC 为 horizon 日未来收益的截面相关, 第 t 日的权重只用到 t - horizon 日及以前的 IC, 不含未来信息.
+
+    Args:
+        factors (List[Tuple[str, str]]): 成分因子 (type, name)
+        horizon (int, optional): IC 的未来收益周期
+        window (int, optional): 权重估计窗口
+        min_periods (int, optional): 窗口内最少有效 IC 数, 默认 window // 2
+        shrink (float, optional): max_icir 协方差的收缩强度
+    '''
+    def __init__(
+        self,
+        factors:List[Tuple[str, str]],
+        start_date:str = None,
+        end_date:str = None,
+        board:str = 'all',
+        horizon:int = 1,
+        window:int = 120,
+        min_periods:int = None,
+        shrink:float = 0.1,
+        price_root:str | Path = RAW_DIR,
+        factor_root:str | Path = FACTOR_DIR,
+    ):
+        self.factors = list(factors)
+        self.horizon = horizon
+        self.window = window
+        self.min_periods = min_periods or max(window // 2, 2)
+        self.shrink = shrink
+        self.factor_root = factor_root
+
+        data = load_price(start_date, end_date, columns=['close'], board=board, root=price_root)
+        self.panel = PANEL.from_data(data, fields=['close'])
+        self.keys = [f'{t}/{n}' for t, n in self.factors]
+        ## (K, T, N) float32, 各方法共用
+        self.values = np.stack([
+            zscore(self.panel.align(load_factor(t, n, start_date, end_date, root=factor_root))).astype(np.float32)
+            for t, n in self.factors
+        ])
+        self._ic = None
+
+
+    @property
+    def ic(self) -> pd.DataFrame:
+        """成分因子的逐日 IC (T × K)"""
+        if self._ic is None:
+            forward_ret = FORWARD_RET.get(self.panel, [self.horizon])[self.horizon]
+            ic = np.stack([rowwise_corr(v, forward_ret) for v in self.values], axis=1)
+            self._ic = pd.DataFrame(ic, index=self.panel.dates, columns=self.keys)
+        return self._ic
+
+
+    def weights(self, method:Literal['equal', 'icir', 'max_icir']='icir') -> pd.DataFrame:
+        """逐日权重 (T × K), 绝对值之和为 1; 样本不足的日期为 NaN"""
+        if method not in METHODS:
+            raise KeyError(f'未知的组合方法: {method}')
+        T, K = len(self.panel.dates), len(self.keys)
+        if method == 'equal':
+            w = np.full((T, K), 1 / K)
+        else:
+            mean, cov = rolling_ic_stats(self.ic.to_numpy(), self.window, self.horizon, self.min_periods)
+            if method == 'icir':
+                std = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    w = np.where(std > 0, mean / std, np.nan)
+            else:
+                w = np.full((T, K), np.nan)
+                ok = np.isfinite(mean).all(axis=1) & np.isfinite(cov).all(axis=(1, 2))
+                if ok.any():
+                    sigma = cov[ok]
+                    ridge = self.shrink * np.trace(sigma, axis1=1, axis2=2) / K
+                    sigma = sigma + ridge[:, None, None] * np.eye(K)
+                    w[ok] = np.linalg.solve(sigma, mean[ok][..., None])[..., 0]
+            w = _normalize(w)
+        return pd.DataFrame(w, index=self.panel.dates, columns=self.keys)
+
+
+    def build(self, method:Literal['equal', 'icir', 'max_icir']='icir', name:str=None) -> pd.DataFrame:
+        """计算复合因子, 返回 MultiIndex(date, symbol) 的单列 DataFrame"""
+        w = self.weights(method).to_numpy()
+        T, N = self.panel.shape
+        composite = np.zeros((T, N))
+        covered = np.zeros((T, N), dtype=bool)
+        for k, v in enumerate(self.values):
+            valid = ~np.isnan(v)
+            composite += w[:, k:k + 1] * np.where(valid, v, 0.0)
+            covered |= valid
+        composite[~covered | ~np.isfinite(w).all(axis=1, keepdims=True)] = np.nan
+        return self.panel.to_frame(zscore(composite), name or self.default_name(method))
+
+
+    def save(self, method:Literal['equal', 'icir', 'max_icir']='icir', name:str=None, root:str | Path=None) -> str:
+        """计算并写入 data/factors/composite/<name>/, 返回因子名"""
+        name = name or self.default_name(method)
+        factor_df = self.build(method, name).dropna()
+        factor_store(COMPOSITE_TYPE, name, root or self.factor_root).write(factor_df)
+        return name
+
+
+    def default_name(self, method:str) -> str:
+        if method == 'equal':
+            return f'equal_{len(self.keys)}f'
+        return f'{method}_{len(self.keys)}f_{self.window}w_{self.horizon}d'
+
+
+
+if __name__ == '__main__':
+    factors = [(t, n) for t, names in list_factors(cross_section=True).items() if t != COMPOSITE_TYPE for n in names]
+    composite = COMPOSITE(factors, start_date='2020-01-01', horizon=5)
+    for method in METHODS:
+        print(method, composite.save(method))
@@ -0,0 +1,273 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : correlation.py
+@Date    : 2026-10-23 09:44:21
+@Author  : DDB
+@Version : 1.0
+@Desc    : 多因子相关性: 截面相关 (Pearson / 排名) 的时序均值与 IC 序列相关, 增量缓存
+'''
+
+import os
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.data_loader.store import PARQUET_STORE, store_stamp
+from src.data_loader.loader import DATA_DIR, FACTOR_DIR, RAW_DIR, list_factors, load_factor, load_price
+from src.factor_eval.cross_section import rowwise_corr
+from src.factor_eval.forward_ret import FORWARD_RET
+from src.factor_eval.preprocess import rank_normalize
+
+
+CORR_DIR = DATA_DIR / "cache" / "factor_corr"
+
+
+
+def block_corr(a:np.ndarray, b:np.ndarray, chunk:int=32) -> Tuple[np.ndarray, np.ndarray]:
+    """两组因子逐日截面 Pearson 相关 (样本两两有效) 之和与有效天数
+
+    每个日期的全部因子对由批量矩阵乘得到: 以掩码 M 与补零后的值 X 计算
+    n = M_a M_bᵀ, Σx = X_a M_bᵀ, Σy = M_a X_bᵀ, Σxy = X_a X_bᵀ, Σx² = X_a² M_bᵀ, Σy² = M_a (X_b²)ᵀ.
+
+    Args:
+        a (np.ndarray): (Ka, T, N)
+        b (np.ndarray): (Kb, T, N)
+        chunk (int, optional): 每批计算的日期数
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (相关系数之和 (Ka, Kb), 有效天数 (Ka, Kb))
+    """
+    Ka, T, _ = a.shape
+    Kb = b.shape[0]
+    total = np.zeros((Ka, Kb))
+    days = np.zeros((Ka, Kb))
+    for start in range(0, T, chunk):
+        xa = np.asarray(a[:, start:start + chunk], dtype=float).transpose(1, 0, 2)     # (t, Ka, N)
+        xb = np.asarray(b[:, start:start + chunk], dtype=float).transpose(1, 2, 0)     # (t, N, Kb)
+        ma = ~np.isnan(xa)
+        mb = ~np.isnan(xb)
+        xa = np.where(ma, xa, 0.0)
+        xb = np.where(mb, xb, 0.0)
+        ma = ma.astype(float)
+        mb = mb.astype(float)
+
+        n = ma @ mb
+        sx, sy = xa @ mb, ma @ xb
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = xa @ xb - sx * sy / n
+            vx = (xa * xa) @ mb - sx * sx / n
+            vy = ma @ (xb * xb) - sy * sy / n
+            corr = cov / np.sqrt(vx * vy)
+        valid = (n >= 2) & (vx > 0) & (vy > 0)
+        total += np.where(valid, np.clip(corr, -1, 1), 0.0).sum(axis=0)
+        days += valid.sum(axis=0)
+    return total, days
+
+
+
+class FACTOR_CORR:
+    '''多因子相关性引擎
+
+    全部因子对齐到同一 date × symbol 网格 (行情收盘价的网格), 计算:
+    - pearson: 逐日截面 Pearson 相关的时序均值
+    - rank: 逐日截面百分位排名 (各因子在自身有效样本上排名) 的 Pearson 相关均值
+    - ic: 各因子逐日 IC (对 horizon 日未来收益) 序列之间的相关
+
+    对齐后的因子值与排名以 float32 保存为 .npy (mmap 读取), 因子对结果与 IC 序列按因子写入标记增量缓存:
+    新增或更新一个因子只计算它与其余因子的一行. 缓存目录以实际的首尾交易日 (而非输入的日期) 为键,
+    只保留最近使用的 keep_versions 个.
+
+    Args:
+        start_date, end_date (str, optional): 日期区间
+        board (str, optional): 股票池
+        horizon (int, optional): IC 的未来收益周期
+        block (int, optional): 每批载入内存的因子数
+        keep_versions (int, optional): 保留的缓存目录数
+    '''
+    def __init__(
+        self,
+        start_date:str = None,
+        end_date:str = None,
+        board:str = 'all',
+        horizon:int = 1,
+        block:int = 32,
+        keep_versions:int = 3,
+        root:str | Path = CORR_DIR,
+        price_root:str | Path = RAW_DIR,
+        factor_root:str | Path = FACTOR_DIR,
+    ):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.board = board
+        self.horizon = horizon
+        self.block = block
+        self.keep_versions = keep_versions
+        self.root = Path(root)
+        self.price_root = price_root
+        self.factor_root = factor_root
+        self._panel = None
+        self._dir = None
+
+
+    @property
+    def dir(self) -> Path:
+        """缓存目录 `<board>_<首个交易日>_<最后交易日>_<horizon>d`: 输入区间不同但数据相同 (如结束日期取今天) 时共用"""
+        if self._dir is None:
+            first, last = PARQUET_STORE(self.price_root).date_range(self.start_date, self.end_date)
+            span = f'{first:%Y%m%d}_{last:%Y%m%d}' if first is not None else 'empty'
+            self._dir = self.root / f'{self.board}_{span}_{self.horizon}d'
+        return self._dir
+
+
+    @property
+    def panel(self) -> PANEL:
+        if self._panel is None:
+            data = load_price(self.start_date, self.end_date, columns=['close'], board=self.board, root=self.price_root)
+            self._panel = PANEL.from_data(data, fields=['close'])
+        return self._panel
+
+
+    def run(self, factors:List[Tuple[str, str]]=None) -> Dict[str, pd.DataFrame]:
+        """计算 (或从缓存读取) 相关矩阵
+
+        Returns:
+            Dict[str, pd.DataFrame]: {'pearson', 'rank', 'ic': 相关矩阵 (K × K), 'ic_series': 逐日 IC (T × K)},
+                因子以 '<type>/<name>' 标识
+        """
+        if factors is None:
+            factors = [(t, n) for t, names in list_factors(self.factor_root, cross_section=True).items() for n in names]
+        keys = [f'{t}/{n}' for t, n in factors]
+        state, pairs, ic_series = self._load_state()
+
+        ## 1. 新增或更新的因子: 对齐、排名、IC, 并作废其全部因子对
+        stamps = {key: store_stamp(Path(self.factor_root) / key) for key in keys}
+        stale = [key for key in keys if state['stamps'].get(key) != stamps[key]]
+        for key in stale:
+            ic_series[key] = self._prepare(key)
+            state['stamps'][key] = stamps[key]
+        if stale:
+            pairs = pairs[~pairs['a'].isin(stale) & ~pairs['b'].isin(stale)]
+
+        ## 2. 只计算缺失的因子对 (无序对, 每对只算一次; 含对角线)
+        done = {frozenset(pair) for pair in zip(pairs['a'], pairs['b'])}
+        order = {key: i for i, key in enumerate(keys)}
+        todo = {}
+        for i, a in enumerate(keys):
+            for b in keys[i:]:
+                if frozenset((a, b)) not in done:
+                    todo.setdefault(a, set()).add(b)
+        rows = self._compute_pairs(todo, keys)
+        if rows:
+            pairs = pd.concat([pairs, pd.DataFrame(rows)], ignore_index=True)
+        if stale or rows:
+            self._save_state(state, pairs, ic_series)
+
+        ## 3. 组装矩阵
+        result = {}
+        sub = pairs[pairs['a'].isin(keys) & pairs['b'].isin(keys)]
+        ia = sub['a'].map(order).to_numpy()
+        ib = sub['b'].map(order).to_numpy()
+        for name in ['pearson', 'rank']:
+            mat = np.full((len(keys), len(keys)), np.nan)
+            mat[ia, ib] = sub[name].to_numpy()
+            mat[ib, ia] = sub[name].to_numpy()
+            result[name] = pd.DataFrame(mat, index=keys, columns=keys)
+        result['ic_series'] = ic_series[keys]
+        result['ic'] = result['ic_series'].corr()
+        return result
+
+
+    def _prepare(self, key:str) -> pd.Series:
+        """对齐单个因子, 保存因子值与排名, 返回逐日 IC"""
+        factor_type, factor_name = key.split('/', 1)
+        panel = self.panel
+        factor_df = load_factor(factor_type, factor_name, self.start_date, self.end_date, root=self.factor_root)
+        values = panel.align(factor_df) if len(factor_df) else np.full(panel.shape, np.nan)
+        for kind, arr in [('values', values), ('ranks', rank_normalize(values))]:
+            path = self._array_path(kind, key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, arr.astype(np.float32))
+            os.replace(tmp_path, path)
+
+        forward_ret = FORWARD_RET.get(panel, [self.horizon])[self.horizon]
+        return pd.Series(rowwise_corr(values, forward_ret), index=panel.dates, name=key)
+
+
+    def _compute_pairs(self, todo:Dict[str, set], keys:List[str]) -> List[Dict[str, Any]]:
+        """按块计算因子对: 每批左侧因子与右侧因子各载入 block 个"""
+        rows = {}
+        left = [key for key in keys if key in todo]
+        for i in range(0, len(left), self.block):
+            left_keys = left[i:i + self.block]
+            right = sorted(set().union(*[todo[k] for k in left_keys]), key=keys.index)
+            for kind, column in [('values', 'pearson'), ('ranks', 'rank')]:
+                a = self._load_arrays(kind, left_keys)
+                for j in range(0, len(right), self.block):
+                    right_keys = right[j:j + self.block]
+                    total, days = block_corr(a, self._load_arrays(kind, right_keys))
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        mean = total / days
+                    for p, ka in enumerate(left_keys):
+                        for q, kb in enumerate(right_keys):
+                            if kb in todo[ka]:
+                                row = rows.setdefault((ka, kb), {'a': ka, 'b': kb})
+                                row[column] = mean[p, q]
+                                row['n_days'] = days[p, q]
+        return list(rows.values())
+
+
+    def _array_path(self, kind:str, key:str) -> Path:
+        return self.dir / kind / f"{key.replace('/', '__')}.npy"
+
+
+    def _load_arrays(self, kind:str, keys:List[str]) -> np.ndarray:
+        return np.stack([np.load(self._array_path(kind, key), mmap_mode='r') for key in keys])
+
+
+    def _load_state(self) -> Tuple[Dict[str, Any], pd.DataFrame, pd.DataFrame]:
+        """读取缓存; 行情有变化 (网格可能不同) 时清空"""
+        price_stamp = store_stamp(self.price_root)
+        state_path = self.dir / 'state.json'
+        if state_path.is_file():
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state['price_stamp'] == price_stamp:
+                os.utime(self.dir)      # 记录最近使用, 清理时保留
+                return state, pd.read_parquet(self.dir / 'pairs.parquet'), pd.read_parquet(self.dir / 'ic.parquet')
+            shutil.rmtree(self.dir, ignore_errors=True)
+        state = {'price_stamp': price_stamp, 'stamps': {}}
+        pairs = pd.DataFrame({'a': pd.Series(dtype=str), 'b': pd.Series(dtype=str), 'pearson': pd.Series(dtype=float),
+                              'rank': pd.Series(dtype=float), 'n_days': pd.Series(dtype=float)})
+        return state, pairs, pd.DataFrame(index=self.panel.dates)
+
+
+    def _save_state(self, state:Dict[str, Any], pairs:pd.DataFrame, ic_series:pd.DataFrame):
+        """先写结果, 最后写 state.json"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        pairs.reset_index(drop=True).to_parquet(self.dir / 'pairs.parquet')
+        ic_series.to_parquet(self.dir / 'ic.parquet')
+        tmp_path = self.dir / f'state.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.dir / 'state.json')
+        self.prune()
+
+
+    def prune(self):
+        """只保留最近使用的 keep_versions 个缓存目录"""
+        versions = sorted((p for p in self.root.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime, reverse=True)
+        for p in versions[self.keep_versions:]:
+            if p != self.dir:
+                shutil.rmtree(p, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    result = FACTOR_CORR(start_date='2024-01-01').run()
+    print(result['pearson'].round(2).to_string())
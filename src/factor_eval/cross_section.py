@@ -0,0 +1,178 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : cross_section.py
+@Date    : 2026-10-20 14:30:51
+@Author  : DDB
+@Version : 1.0
+@Desc    : date × symbol 数组的截面 (按行) 统计: 排名、相关系数、分组
+'''
+
+import warnings
+
+import numpy as np
+from typing import *
+
+
+
+def rank_rows(x:np.ndarray) -> np.ndarray:
+    """按行排名 (1 起), 并列取平均名次, NaN 保持 NaN (同 rank(axis=1, method='average'))"""
+    x = np.asarray(x, dtype=float)
+    T, N = x.shape
+    ranks = np.full(x.shape, np.nan)
+    if N == 0:
+        return ranks
+
+    order = np.argsort(x, axis=1, kind='stable')          # NaN 排在最后
+    sorted_x = np.take_along_axis(x, order, axis=1)
+    valid = ~np.isnan(sorted_x)
+
+    ## 并列区间: 区间起点的位置向后传播, 终点的位置向前传播
+    pos = np.broadcast_to(np.arange(N), (T, N))
+    new_run = np.ones((T, N), dtype=bool)
+    new_run[:, 1:] = sorted_x[:, 1:] != sorted_x[:, :-1]
+    end_run = np.ones((T, N), dtype=bool)
+    end_run[:, :-1] = new_run[:, 1:]
+    start = np.maximum.accumulate(np.where(new_run, pos, 0), axis=1)
+    end = np.minimum.accumulate(np.where(end_run, pos, N - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    avg_rank = np.where(valid, (start + end) / 2 + 1, np.nan)
+    np.put_along_axis(ranks, order, avg_rank, axis=1)
+    return ranks
+
+
+def rowwise_corr(x:np.ndarray, y:np.ndarray, min_periods:int=2) -> np.ndarray:
+    """按行 Pearson 相关系数, 只使用两者均有效的样本 (pairwise complete)
+
+    Args:
+        x, y (np.ndarray): (T, N) 数组, y 也可为 (K, T, N) 以一次计算多个目标
+
+    Returns:
+        np.ndarray: (T,) 或 (K, T)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = np.isfinite(x) & np.isfinite(y)
+    n = mask.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x0 = np.where(mask, x, 0.0)
+        y0 = np.where(mask, y, 0.0)
+        mx = x0.sum(axis=-1) / n
+        my = y0.sum(axis=-1) / n
+        dx = np.where(mask, x - mx[..., None], 0.0)
+        dy = np.where(mask, y - my[..., None], 0.0)
+        cov = (dx * dy).sum(axis=-1)
+        corr = cov / np.sqrt((dx * dx).sum(axis=-1) * (dy * dy).sum(axis=-1))
+    corr = np.where(n >= min_periods, corr, np.nan)
+    return np.clip(corr, -1, 1)
+
+
+def rowwise_spearman(x:np.ndarray, y:np.ndarray, min_periods:int=2) -> np.ndarray:
+    """按行 Spearman 相关系数: 在两者均有效的样本上排名 (并列取平均) 后计算 Pearson"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x, y = np.broadcast_arrays(x, y)
+    mask = np.isfinite(x) & np.isfinite(y)
+    shape = x.shape
+    rx = rank_rows(np.where(mask, x, np.nan).reshape(-1, shape[-1])).reshape(shape)
+    ry = rank_rows(np.where(mask, y, np.nan).reshape(-1, shape[-1])).reshape(shape)
+    return rowwise_corr(rx, ry, min_periods)
+
+
+def sorted_quantiles(sorted_x:np.ndarray, start:np.ndarray, n:np.ndarray, q:np.ndarray) -> np.ndarray:
+    """多个已升序片段的分位数, 与 Series.quantile (线性插值) 一致
+
+    Args:
+        sorted_x (np.ndarray): 一维数组, 第 i 段为 sorted_x[start[i] : start[i] + n[i]], 段内升序
+        start, n (np.ndarray): (R,) 各段起点与长度
+        q (np.ndarray): (K,) 分位点
+
+    Returns:
+        np.ndarray: (R, K), 空段为 NaN
+    """
+    q = np.asarray(q, dtype=float) * 100 / 100                 # 同 pandas → np.percentile 的换算
+    n = np.asarray(n)[:, None]
+    last = np.maximum(n - 1, 0)
+    virtual = last * q[None, :]
+    prev = np.floor(virtual)
+    gamma = virtual - prev
+    prev = np.minimum(prev.astype(np.int64), last)
+    nxt = np.minimum(prev + 1, last)
+    start = np.asarray(start)[:, None]
+    a = sorted_x[start + prev] if len(sorted_x) else np.full(prev.shape, np.nan)
+    b = sorted_x[start + nxt] if len(sorted_x) else np.full(prev.shape, np.nan)
+    diff = b - a
+    out = np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+    return np.where(n > 0, out, np.nan)
+
+
+def _edge_labels(x:np.ndarray, edges:np.ndarray) -> np.ndarray:
+    """按每行的升序边界 (T, K) 划分右闭区间, 重复边界合并, 首个区间含左端点; 返回组号 (0 起), 无效为 -1"""
+    distinct = np.ones(edges.shape, dtype=bool)
+    distinct[:, 1:] = edges[:, 1:] != edges[:, :-1]
+    below = np.zeros(x.shape, dtype=np.int64)
+    with np.errstate(invalid='ignore'):
+        for j in range(edges.shape[1]):
+            below += distinct[:, j, None] & (edges[:, j, None] < x)
+    labels = np.maximum(below - 1, 0)
+    invalid = np.isnan(x) | (distinct.sum(axis=1) < 2)[:, None]
+    return np.where(invalid, -1, labels)
+
+
+def quantile_labels(x:np.ndarray, q:int) -> np.ndarray:
+    """按行等分位分组, 同逐行 pd.qcut(q, labels=False, duplicates='drop')
+
+    一次排序得到全部截面的分位边界, 再按边界计数得到组号 (0 起), NaN 为 -1.
+    """
+    x = np.asarray(x, dtype=float)
+    T, N = x.shape
+    quantiles = np.linspace(0, 1, q + 1)
+    np.putmask(quantiles, q * quantiles != np.arange(q + 1), np.nextafter(quantiles, 1))
+    sorted_x = np.sort(x, axis=1)                           # NaN 排在最后
+    n = (~np.isnan(x)).sum(axis=1)
+    edges = sorted_quantiles(sorted_x.ravel(), np.arange(T) * N, n, quantiles)
+    return _edge_labels(x, edges)
+
+
+def bin_labels(x:np.ndarray, bins:int) -> np.ndarray:
+    """按行等宽分箱, 同逐行 pd.cut(bins, labels=False, duplicates='drop'); 组号 0 起, NaN 为 -1"""
+    x = np.asarray(x, dtype=float)
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)     # 全 NaN 行
+        mn = np.nanmin(x, axis=1)
+        mx = np.nanmax(x, axis=1)
+    same = mn == mx
+    pad = np.where(mn != 0, np.abs(mn) * 0.001, 0.001)
+    lo = np.where(same, mn - pad, mn)
+    hi = np.where(same, mx + pad, mx)
+    edges = np.linspace(lo, hi, bins + 1, endpoint=True, axis=1)
+    edges[:, 0] -= np.where(same, 0, (mx - mn) * 0.001)
+    return _edge_labels(x, edges)
+
+
+def group_mean(labels:np.ndarray, values:np.ndarray, n_groups:int) -> Tuple[np.ndarray, np.ndarray]:
+    """按行分组均值 (bincount)
+
+    Args:
+        labels (np.ndarray): (T, N) 组号, -1 为无效
+        values (np.ndarray): (T, N) 或 (K, T, N), NaN 不参与均值
+        n_groups (int): 组数上限
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (均值 (T, G) 或 (K, T, G), 各组样本数 (T, G))
+    """
+    T = labels.shape[0]
+    values = np.asarray(values, dtype=float)
+    labelled = labels >= 0
+    codes = (np.arange(T)[:, None] * n_groups + labels)
+    size = T * n_groups
+    counts = np.bincount(codes[labelled], minlength=size).reshape(T, n_groups)
+
+    means = []
+    for v in values.reshape(-1, *labels.shape):
+        m = labelled & ~np.isnan(v)
+        s = np.bincount(codes[m], weights=v[m], minlength=size)
+        c = np.bincount(codes[m], minlength=size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means.append((s / c).reshape(T, n_groups))
+    means = np.stack(means)
+    return (means if values.ndim == 3 else means[0]), counts
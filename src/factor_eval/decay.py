@@ -0,0 +1,104 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : decay.py
+@Date    : 2026-10-22 10:18:05
+@Author  : DDB
+@Version : 1.0
+@Desc    : 因子衰减与换手: 截面排名自相关、首尾组换手率、IC 衰减曲线
+'''
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.factor_eval.cross_section import bin_labels, quantile_labels, rank_rows, rowwise_corr
+
+
+
+class DECAY:
+    '''因子衰减与换手分析
+
+    Args:
+        data (pd.DataFrame | PANEL): 行情数据 (需含 close)
+        factor_df (pd.DataFrame): 因子数据
+    '''
+    def __init__(self, data, factor_df):
+        self.panel = PANEL.from_data(data, fields=['close'])
+        self.factor = self.panel.align(factor_df)
+        self._ranks = None
+
+
+    @property
+    def ranks(self) -> np.ndarray:
+        """截面百分位排名 (T, N), 全部滞后期共用"""
+        if self._ranks is None:
+            n = (~np.isnan(self.factor)).sum(axis=1, keepdims=True)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self._ranks = rank_rows(self.factor) / n
+        return self._ranks
+
+
+    def rank_autocorr(self, lags:List[int]=(1, 5, 10, 20)) -> pd.DataFrame:
+        """截面排名自相关: 第 t 日与第 t-lag 日因子排名的相关系数, 列为 lag_{n}"""
+        ranks = self.ranks
+        out = {}
+        for lag in lags:
+            ac = np.full(self.panel.shape[0], np.nan)
+            ac[lag:] = rowwise_corr(ranks[lag:], ranks[:-lag])
+            out[f'lag_{lag}'] = ac
+        return pd.DataFrame(out, index=self.panel.dates).dropna(how='all')
+
+
+    def group_turnover(self, lags:List[int]=(1, 5, 10, 20), quantile:int=10, bins:int=None) -> pd.DataFrame:
+        """首尾组换手率: 第 t 日组内股票中, 第 t-lag 日不在该组的占比
+
+        Returns:
+            pd.DataFrame: 列为 MultiIndex(组别 top / bottom, lag_{n})
+        """
+        labels = quantile_labels(self.factor, quantile) if quantile else bin_labels(self.factor, bins)
+        ## 首尾组按当日实际出现的组号确定 (bins / 重复边界时组数可能不足)
+        top = np.where(labels >= 0, labels, -1).max(axis=1, keepdims=True)
+        bottom = np.where(labels >= 0, labels, np.iinfo(labels.dtype).max).min(axis=1, keepdims=True)
+
+        out = {}
+        for name, edge in [('top', top), ('bottom', bottom)]:
+            member = (labels == edge) & (labels >= 0)
+            count = member.sum(axis=1)
+            for lag in lags:
+                new = np.zeros(self.panel.shape[0])
+                prev_member = (labels[:-lag] == edge[:-lag]) & (labels[:-lag] >= 0)
+                new[lag:] = (member[lag:] & ~prev_member).sum(axis=1)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    turnover = np.where(count > 0, new / count, np.nan)
+                turnover[:lag] = np.nan
+                out[(name, f'lag_{lag}')] = turnover
+        return pd.DataFrame(out, index=self.panel.dates).dropna(how='all')
+
+
+    def ic_decay(self, horizons:List[int]=range(1, 61), chunk:int=10) -> pd.DataFrame:
+        """IC 衰减曲线: 各持有期的逐日 IC 均值、标准差与 IR
+
+        持有期 h 的未来收益直接由收盘价 (累计收益) 相除得到, 每增加一个持有期只需 O(1) / 格;
+        多个持有期分块一次向量化计算.
+
+        Returns:
+            pd.DataFrame: index 为 horizon, 列为 IC_mean, IC_std, ICIR
+        """
+        close = self.panel.close
+        T = close.shape[0]
+        horizons = [h for h in horizons if h < T]
+        rows = []
+        for i in range(0, len(horizons), chunk):
+            block = horizons[i:i + chunk]
+            rets = np.full((len(block), *close.shape), np.nan)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                for k, h in enumerate(block):
+                    rets[k, :-h] = close[h:] / close[:-h] - 1
+            ic = rowwise_corr(self.factor, rets)
+            for h, ic_h in zip(block, ic):
+                ic_h = ic_h[~np.isnan(ic_h)]
+                mean = ic_h.mean() if len(ic_h) else np.nan
+                std = ic_h.std(ddof=1) if len(ic_h) > 1 else np.nan
+                rows.append({'horizon': h, 'IC_mean': mean, 'IC_std': std, 'ICIR': mean / std if std else np.nan})
+        return pd.DataFrame(rows).set_index('horizon')
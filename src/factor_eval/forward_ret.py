@@ -0,0 +1,122 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : forward_ret.py
+@Date    : 2026-10-20 16:48:03
+@Author  : DDB
+@Version : 1.0
+@Desc    : 未来收益率的内存 + 磁盘缓存, 按行情数据指纹与周期复用
+'''
+
+import os
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+import numpy as np
+from typing import *
+
+from src.factor_calc.panel import PANEL
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+CACHE_DIR = BASE_DIR / "data" / "cache" / "forward_ret"
+
+
+
+def panel_fingerprint(panel:PANEL, field:str='close') -> str:
+    """行情面板的内容指纹 (日期、symbol 与价格)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(panel.dates.asi8).tobytes())
+    h.update('\x1f'.join(map(str, panel.symbols)).encode())
+    h.update(np.ascontiguousarray(panel.fields[field]).tobytes())
+    return h.hexdigest()
+
+
+def calc_forward_return(close:np.ndarray, nd:int) -> np.ndarray:
+    """第 t 行为 t → t+nd 的收益率 (同 pct_change(nd).shift(-nd)), nd >= 1"""
+    if nd < 1:
+        raise ValueError(f'收益率周期须为正整数, 实际为 {nd}')
+    ret = np.full(close.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret[:-nd] = close[nd:] / close[:-nd] - 1
+    return ret
+
+
+
+class FORWARD_RET_CACHE:
+    '''未来收益率缓存
+
+    以 (行情指纹, 周期) 为键: 先查进程内 LRU, 再查磁盘 `<cache_dir>/<指纹>/<nd>.npy`
+    (只读 mmap 加载), 都未命中时计算并写回. 新增周期只计算该周期.
+    '''
+    def __init__(self, cache_dir:str | Path=CACHE_DIR, max_items:int=32, keep_versions:int=3):
+        self.cache_dir = Path(cache_dir)
+        self.max_items = max_items
+        self.keep_versions = keep_versions
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, panel:PANEL, ret_nd:List[int], fingerprint:str=None) -> Dict[int, np.ndarray]:
+        """获取多个周期的未来收益率 {nd: (T, N)} (只读)
+
+        Args:
+            fingerprint (str, optional): 行情数据指纹, 不传时按内容计算
+        """
+        fingerprint = fingerprint or panel_fingerprint(panel)
+        return {nd: self._get_one(panel, nd, fingerprint) for nd in ret_nd}
+
+
+    def _get_one(self, panel:PANEL, nd:int, fingerprint:str) -> np.ndarray:
+        key = (fingerprint, nd)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self.cache_dir / fingerprint / f'{nd}.npy'
+        if path.is_file():
+            ret = np.load(path, mmap_mode='r')
+        else:
+            ret = calc_forward_return(panel.close, nd)
+            ret.flags.writeable = False
+            self._save(ret, path)
+
+        with self._lock:
+            self._memory[key] = ret
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+        return ret
+
+
+    def _save(self, ret:np.ndarray, path:Path):
+        try:
+            new_version = not path.parent.exists()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, ret)
+            os.replace(tmp_path, path)
+            if new_version:
+                self.prune()
+        except OSError:
+            pass    # 磁盘缓存只是加速, 写入失败不影响计算结果
+
+
+    def prune(self):
+        """只保留最近的 keep_versions 个行情版本"""
+        versions = sorted((p for p in self.cache_dir.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime, reverse=True)
+        for p in versions[self.keep_versions:]:
+            shutil.rmtree(p, ignore_errors=True)
+
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+
+
+## 进程内共享的缓存实例
+FORWARD_RET = FORWARD_RET_CACHE()
@@ -11,87 +11,152 @@ import numpy as np
 import pandas as pd
 from typing import *
 
+from src.factor_calc.panel import PANEL
+from src.factor_eval.cross_section import bin_labels, group_mean, quantile_labels, rowwise_corr, rowwise_spearman, sorted_quantiles
+from src.factor_eval.forward_ret import FORWARD_RET, FORWARD_RET_CACHE, calc_forward_return
+
 
 class EVALUATION:
 
-    def __init__(self, data, factor_df, ret_nd):
+    def __init__(self, data, factor_df, ret_nd, fingerprint:str=None, cache:FORWARD_RET_CACHE=FORWARD_RET):
+        """_summary_
+
+        Args:
+            data (pd.DataFrame | PANEL): 行情数据
+            factor_df (pd.DataFrame): 因子数据
+            ret_nd (List[int]): 未来收益周期
+            fingerprint (str, optional): 行情数据指纹, 用于未来收益缓存; 不传时按内容计算
+            cache (FORWARD_RET_CACHE, optional): 未来收益缓存, None 表示不缓存
+        """
         self.data = data
         self.factor_df = factor_df
-        self.ret_nd:List = ret_nd
+        self.ret_nd:List = ret_nd if ret_nd else [1,5,10,22]
+        self.fingerprint = fingerprint
+        self.cache = cache
 
         self.__init_calc__()
     
     
     def __init_calc__(self):
-        """初始计算
+        """初始计算: 行情与因子对齐到同一 date × symbol 网格
+        """
+        self.panel = PANEL.from_data(self.data, fields=['close'])
+        self.factor = self.panel.align(self.factor_df)
+        self.forward_returns = self.calc_forward_returns()
+        self._forward_return_data = None
+
+
+    def calc_forward_returns(self) -> Dict[int, np.ndarray]:
+        """计算未来收益率 {nd: (T, N)}, 第 t 行为 t → t+nd 的收益
+        同一份行情的各周期结果经 FORWARD_RET_CACHE 跨实例复用
         """
-        self.forward_return_data = self.calc_forward_ret_data()
+        if self.cache is None:
+            return {nd: calc_forward_return(self.panel.close, nd) for nd in self.ret_nd}
+        return self.cache.get(self.panel, self.ret_nd, self.fingerprint)
+
+
+    @property
+    def forward_return_data(self) -> pd.DataFrame:
+        if self._forward_return_data is None:
+            self._forward_return_data = self.calc_forward_ret_data()
+        return self._forward_return_data
 
 
     def calc_forward_ret_data(self):
-        """计算未来收益率
+        """计算未来收益率 (MultiIndex(date, symbol) 长表)
         """
-        ## params init
-        ret_nd = self.ret_nd if self.ret_nd else [1,5,10,22]
-
-        return_data_lst = []
-        for nd in ret_nd:
-            forward_return_data = (
-                self.data.close
-                .unstack()
-                .pct_change(nd, fill_method=None)
-                .shift(-nd)     # 计算已知的未来收益
-                .stack()
-            )
-            return_data_lst.append(forward_return_data)
-        forward_return_data = pd.concat(return_data_lst, axis=1).sort_index()
-        forward_return_data.columns = [f'forward_ret_{nd}d' for nd in ret_nd]
+        stacked = np.stack([self.forward_returns[nd] for nd in self.ret_nd])
+        rows, cols = np.nonzero(~np.isnan(stacked).all(axis=0))
+        index = pd.MultiIndex(
+            levels=[self.panel.dates, self.panel.symbols], codes=[rows, cols],
+            names=['date', 'symbol'], verify_integrity=False
+        )
+        forward_return_data = pd.DataFrame(stacked[:, rows, cols].T, index=index)
+        forward_return_data.columns = [f'forward_ret_{nd}d' for nd in self.ret_nd]
         return forward_return_data
 
 
+    def calc_daily_IC(self, method:Literal['pearson', 'spearman']='pearson') -> pd.DataFrame:
+        """逐日截面 IC, 全部收益周期一次向量化计算
+        """
+        rets = np.stack([self.forward_returns[nd] for nd in self.ret_nd])
+        corr = rowwise_corr if method == 'pearson' else rowwise_spearman
+        ic = corr(self.factor, rets)
+        factor_IC = pd.DataFrame(ic.T, index=self.panel.dates, columns=[f'IC_{nd}d' for nd in self.ret_nd])
+        return factor_IC.dropna(how='all')
+
+
     def calc_IC(self, method:Literal['pearson', 'spearman']='pearson'):
 
         ## 获取因子值
-        factor_ret_data = pd.concat([self.factor_df, self.forward_return_data], axis=1)
-        factor_IC = factor_ret_data.groupby('date').apply(
-            lambda x: x.corr(method=method).iloc[1:, 0]
-        ).dropna(how='all')
+        factor_IC = self.calc_daily_IC(method)
 
         ## 计算当月因子均值
-        monthly_factor_IC = factor_IC.groupby(pd.Grouper(level=0, freq='MS')).mean()
-        monthly_factor_IC.columns = [f'IC_{col.split('_')[-1]}' for col in monthly_factor_IC.columns]
-        return monthly_factor_IC
+        return self.monthly_IC(factor_IC)
 
 
-    def calc_grouped(self, quantile:int=10, bins:int=None):
+    @staticmethod
+    def monthly_IC(factor_IC:pd.DataFrame) -> pd.DataFrame:
+        """逐日 IC 按月取均值"""
+        return factor_IC.groupby(pd.Grouper(level=0, freq='MS')).mean()
+
+
+    def calc_grouped(self, quantile:int=10, bins:int=None, return_counts:bool=False):
         """计算分组收益
-        """
-        cut = pd.qcut if quantile else pd.cut
-        lens = quantile if quantile else bins
-        factor_df = self.factor_df.copy()
 
-        factor_df['grouped'] = factor_df.groupby('date')[factor_df.columns[0]].transform(
-            lambda s: cut(s, lens, labels=False, duplicates='drop')
-        )
-        ## 组号从 1 开始
-        factor_df['grouped'] += 1
+        全部截面一次性分组 (同逐日 qcut / cut, duplicates='drop'), 分组收益与分布统计均由数组归约得到.
+
+        Returns:
+            factor_describe (pd.DataFrame): 各组因子值的 describe 统计, index 为组号
+            factor_grouped_forward_ret (pd.DataFrame): MultiIndex(grouped, date), 列为 '1d', '5d', ...
+            group_counts (pd.DataFrame, optional): return_counts=True 时返回, 与上者同索引的各组样本数
+        """
+        labels, n_groups = self.group_labels(quantile, bins)
+        labelled = labels >= 0
 
         # 因子分组分布 - data
-        factor_describe = factor_df.groupby('grouped').describe()
-        factor_describe.columns = [col[-1] for col in factor_describe.columns]
+        factor_describe = self._group_describe(labels[labelled], self.factor[labelled], n_groups)
 
         # 因子分组收益率
-        forward_ret_data = self.forward_return_data.copy()
-        forward_ret_data.columns = [f'{col.split('_')[-1]}' for col in forward_ret_data.columns]
-        factor_grouped_forward_ret = pd.concat(
-            [forward_ret_data, factor_df['grouped']], axis=1
-        ).dropna(how='all')
-        factor_grouped_forward_ret = factor_grouped_forward_ret.groupby(
-            ['grouped', factor_grouped_forward_ret.index.get_level_values(0)]
-        ).mean()
+        rets = np.stack([self.forward_returns[nd] for nd in self.ret_nd])
+        means, counts = group_mean(labels, rets, n_groups)
+        group_idx, dates_idx = np.nonzero(counts.T > 0)        # 按 (组, 日期) 排序
+        index = pd.MultiIndex.from_arrays(
+            [(group_idx + 1).astype(float), self.panel.dates[dates_idx]], names=['grouped', 'date']    # 组号从 1 开始
+        )
+        factor_grouped_forward_ret = pd.DataFrame(
+            means[:, dates_idx, group_idx].T, index=index, columns=[f'{nd}d' for nd in self.ret_nd]
+        )
+        if return_counts:
+            group_counts = pd.DataFrame({'count': counts[dates_idx, group_idx]}, index=index)
+            return factor_describe, factor_grouped_forward_ret, group_counts
+        return factor_describe, factor_grouped_forward_ret
 
 
-        return factor_describe, factor_grouped_forward_ret
+    def group_labels(self, quantile:int=10, bins:int=None) -> Tuple[np.ndarray, int]:
+        """逐日截面分组: (组号 (T, N), 0 起, 无效为 -1; 组数)"""
+        if quantile:
+            return quantile_labels(self.factor, quantile), quantile
+        return bin_labels(self.factor, bins), bins
+
+
+    @staticmethod
+    def _group_describe(labels:np.ndarray, values:np.ndarray, n_groups:int) -> pd.DataFrame:
+        """各组的 describe 统计 (count, mean, std, min, 25%, 50%, 75%, max), 一次排序得到"""
+        order = np.lexsort((values, labels))
+        sorted_values = values[order]
+        count = np.bincount(labels, minlength=n_groups)
+        start = np.concatenate([[0], np.cumsum(count)[:-1]])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.bincount(labels, weights=values, minlength=n_groups) / count
+            std = np.sqrt(np.bincount(labels, weights=(values - mean[labels]) ** 2, minlength=n_groups) / (count - 1))
+        pct = sorted_quantiles(sorted_values, start, count, [0, 0.25, 0.5, 0.75, 1])
+        factor_describe = pd.DataFrame(
+            {'count': count.astype(float), 'mean': mean, 'std': std, 'min': pct[:, 0],
+             '25%': pct[:, 1], '50%': pct[:, 2], '75%': pct[:, 3], 'max': pct[:, 4]},
+            index=pd.Index(np.arange(1, n_groups + 1, dtype=float), name='grouped'),
+        )
+        return factor_describe[count > 0]
         
 
 
@@ -99,6 +164,6 @@ if __name__ == '__main__':
     data = pd.read_parquet(r'E:\repo\stocks_dashborads\data\raw\all.parquet')
     factor_df = pd.read_parquet(r'E:\repo\stocks_dashborads\data\factors\momentum\lags_pct_14.parquet')
 
-    EVAL = EVALUATION(data, factor_df)
+    EVAL = EVALUATION(data, factor_df, [1, 5, 10, 22])
     factor_IC = EVAL.calc_IC()
     print(factor_IC)
\ No newline at end of file
@@ -0,0 +1,297 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : jobs.py
+@Date    : 2026-10-25 10:21:44
+@Author  : DDB
+@Version : 1.0
+@Desc    : 看板的后台评价任务: 进程池执行, 按参数键去重, 进度回报与取消
+'''
+
+import time
+import queue
+import threading
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from typing import *
+
+from src.data_loader.loader import load_factor
+from src.data_loader.service import DATA_SERVICE
+from src.factor_eval.decay import DECAY
+from src.factor_eval.get_eval import EVALUATION
+from src.factor_eval.portfolio import simulate_groups
+from src.factor_eval.preprocess import PREPROCESS
+
+
+MAX_WORKERS = 2
+MAX_FINISHED = 32       # 保留的已完成任务数 (结果供各会话复用)
+
+
+
+class JOB_CANCELLED(Exception):
+    '''任务已被取消'''
+
+
+
+## 子进程
+#--------------------------
+_WORKER = {}
+
+
+def _init_worker(progress_queue:mp.Queue, cancel_flags:Any):
+    _WORKER['queue'] = progress_queue
+    _WORKER['cancel'] = cancel_flags
+
+
+def _run_job(slot:int, func:Callable, kwargs:Dict[str, Any]) -> Any:
+    _WORKER['slot'] = slot
+    return func(**kwargs)
+
+
+def report(progress:float, stage:str=''):
+    """在任务函数中回报进度; 任务已被取消时抛出 JOB_CANCELLED (在主进程直接调用时不做任何事)"""
+    if 'slot' not in _WORKER:
+        return
+    slot = _WORKER['slot']
+    if _WORKER['cancel'][slot]:
+        raise JOB_CANCELLED()
+    _WORKER['queue'].put((slot, float(progress), stage))
+
+
+
+## 任务函数 (须可在子进程中按模块路径导入)
+#--------------------------
+def _load_factor(factor_type:str, factor_name:str, board:str, start_date:str, end_date:str, steps:List, panel) -> pd.DataFrame:
+    factor_df = load_factor(factor_type, factor_name, start_date, end_date)
+    if board != 'all':
+        factor_df = factor_df[factor_df.index.get_level_values('symbol').isin(panel.symbols)]
+    if steps and not factor_df.empty:
+        report(0.15, '因子预处理')
+        factor_df = PREPROCESS(steps).run(factor_df, factor_type, factor_name, board)
+    return factor_df
+
+
+def evaluate_job(
+    factor_type:str,
+    factor_name:str,
+    board:str,
+    start_date:str,
+    end_date:str,
+    ret_nd:List[int],
+    quantile:int = 10,
+    bins:int = None,
+    steps:List = (),
+    fingerprint:str = None,
+) -> Dict[str, Any]:
+    """单因子评价: 月度 IC / Rank-IC, 分组分布与收益, 各持有期的分组组合 (未扣费, 看板按成本调整)
+
+    fingerprint 为行情数据集键的摘要, 作为未来收益缓存的键, 避免每个任务对收盘价重新求哈希
+    """
+    report(0.0, '加载行情')
+    panel = DATA_SERVICE.price(board, start_date, end_date)
+    report(0.1, '加载因子')
+    factor_df = _load_factor(factor_type, factor_name, board, start_date, end_date, list(steps), panel)
+    if factor_df.empty:
+        return {'empty': True}
+
+    report(0.25, '计算未来收益')
+    evaluator = EVALUATION(panel, factor_df, ret_nd, fingerprint=fingerprint)
+    ic = {}
+    for i, method in enumerate(['pearson', 'spearman']):
+        report(0.35 + 0.15 * i, f'计算 IC ({method})')
+        ic[method] = evaluator.calc_IC(method)
+
+    report(0.65, '分组回测')
+    describe, grouped = evaluator.calc_grouped(quantile, bins)
+    labels, n_groups = evaluator.group_labels(quantile, bins)
+
+    report(0.8, '组合模拟')
+    sims = simulate_groups(labels, panel.ret, n_groups, ret_nd, cost=0.0)
+    portfolio = {nd: {'returns': sim['returns'], 'turnover': sim['turnover']} for nd, sim in sims.items()}
+    report(1.0, '完成')
+    return {
+        'empty': False, 'head': factor_df.head(10), 'ic': ic, 'describe': describe, 'grouped': grouped,
+        'portfolio': portfolio, 'dates': panel.dates,
+    }
+
+
+def decay_job(
+    factor_type:str,
+    factor_name:str,
+    board:str,
+    start_date:str,
+    end_date:str,
+    max_horizon:int = 60,
+    quantile:int = 10,
+    bins:int = None,
+    steps:List = (),
+    lags:Tuple[int, ...] = (1, 5, 10, 20),
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """IC 衰减曲线、排名自相关与首尾组换手率"""
+    report(0.0, '加载数据')
+    panel = DATA_SERVICE.price(board, start_date, end_date, ['close'])
+    factor_df = _load_factor(factor_type, factor_name, board, start_date, end_date, list(steps), panel)
+    decay = DECAY(panel, factor_df)
+    ## IC 衰减分段计算, 每段回报进度
+    horizons = list(range(1, max_horizon + 1))
+    step = 10
+    parts = []
+    for i in range(0, len(horizons), step):
+        report(0.2 + 0.6 * i / len(horizons), f'IC 衰减 ({horizons[i]}d~)')
+        parts.append(decay.ic_decay(horizons[i:i + step]))
+    report(0.85, '排名自相关与换手')
+    return pd.concat(parts), decay.rank_autocorr(lags), decay.group_turnover(lags, quantile, bins)
+
+
+
+## 主进程
+#--------------------------
+class JOB_MANAGER:
+    '''后台任务管理 (进程内共享)
+
+    同一参数键的任务只执行一次, 结果供所有提交者复用; 每个提交者 (如看板会话) 参数变化时
+    release 旧的键, 无人需要的任务被取消: 尚未开始的直接撤销, 运行中的在下一次 report() 时中止.
+    子进程以 spawn 启动, 进度经队列回传, 取消标志放在共享数组中.
+
+    Args:
+        max_workers (int, optional): 进程数
+        max_finished (int, optional): 保留的已完成任务数
+    '''
+    def __init__(self, max_workers:int=MAX_WORKERS, max_finished:int=MAX_FINISHED):
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self.n_slots = max_workers * 8 + 32     # 同时排队/运行的任务上限
+        self._jobs = {}
+        self._finished = []
+        self._lock = threading.RLock()
+        self._executor = None
+
+
+    def _start(self):
+        if self._executor is None:
+            ctx = mp.get_context('spawn')
+            self._queue = ctx.Queue()
+            self._cancel = ctx.Array('b', self.n_slots, lock=False)
+            self._free = list(range(self.n_slots))
+            self._executor = ProcessPoolExecutor(
+                self.max_workers, mp_context=ctx, initializer=_init_worker, initargs=(self._queue, self._cancel)
+            )
+
+
+    def submit(self, key:str, func:Callable, owner:str=None, **kwargs) -> str:
+        """提交任务; 相同键的任务排队、运行中或已完成时直接复用 (已请求取消的撤回取消), 失败的任务重新执行"""
+        with self._lock:
+            self._start()
+            job = self._jobs.get(key)
+            if job is not None and job['state'] in ('pending', 'running', 'done'):
+                if job['state'] != 'done':
+                    self._cancel[job['slot']] = 0
+                job['owners'].add(owner)
+                return key
+            if job is not None and key in self._finished:
+                self._finished.remove(key)
+            if not self._free:
+                raise RuntimeError(f'后台任务过多 (同时最多 {self.n_slots} 个)')
+            slot = self._free.pop()
+            self._cancel[slot] = 0
+            job = {'state': 'pending', 'progress': 0.0, 'stage': '排队中', 'owners': {owner}, 'slot': slot,
+                   'result': None, 'error': None, 'submitted': time.time()}
+            self._jobs[key] = job
+            job['future'] = self._executor.submit(_run_job, slot, func, kwargs)
+            job['future'].add_done_callback(lambda future, key=key: self._on_done(key, future))
+            return key
+
+
+    def release(self, key:str, owner:str=None):
+        """提交者不再需要该任务; 无人需要且未完成时取消"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                return
+            job['owners'].discard(owner)
+            if not job['owners'] and job['state'] in ('pending', 'running'):
+                self.cancel(key)
+
+
+    def cancel(self, key:str):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job['state'] not in ('pending', 'running'):
+                return
+            self._cancel[job['slot']] = 1
+            if job['future'].cancel():
+                self._on_done(key, job['future'])
+
+
+    def status(self, key:str) -> Dict[str, Any]:
+        """{'state': pending / running / done / failed / cancelled / missing, 'progress', 'stage', 'error'}"""
+        with self._lock:
+            self._drain()
+            job = self._jobs.get(key)
+            if job is None:
+                return {'state': 'missing', 'progress': 0.0, 'stage': '', 'error': None}
+            return {k: job[k] for k in ('state', 'progress', 'stage', 'error')}
+
+
+    def result(self, key:str) -> Any:
+        """已完成任务的结果 (各提交者共享, 只读使用)"""
+        with self._lock:
+            job = self._jobs.get(key)
+            return job['result'] if job is not None and job['state'] == 'done' else None
+
+
+    def _drain(self):
+        """读取子进程回报的进度"""
+        slots = {job['slot']: job for job in self._jobs.values() if job['state'] in ('pending', 'running')}
+        while True:
+            try:
+                slot, progress, stage = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            job = slots.get(slot)
+            if job is not None:
+                job.update(state='running', progress=progress, stage=stage)
+
+
+    def _on_done(self, key:str, future):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job['future'] is not future or job['state'] in ('done', 'failed', 'cancelled'):
+                return
+            if future.cancelled():
+                job['state'] = 'cancelled'
+            else:
+                error = future.exception()
+                if error is None:
+                    job.update(state='done', progress=1.0, stage='完成', result=future.result())
+                elif isinstance(error, JOB_CANCELLED):
+                    job['state'] = 'cancelled'
+                else:
+                    job.update(state='failed', error=''.join(traceback.format_exception_only(type(error), error)).strip())
+            self._free.append(job['slot'])
+            if job['state'] == 'cancelled':
+                del self._jobs[key]
+            else:
+                self._finished.append(key)
+                self._evict()
+
+
+    def _evict(self):
+        """按完成顺序清理超出数量的已完成任务"""
+        while len(self._finished) > self.max_finished:
+            self._jobs.pop(self._finished.pop(0), None)
+
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                for key in list(self._jobs):
+                    self.cancel(key)
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+
+JOBS = JOB_MANAGER()
@@ -0,0 +1,135 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : portfolio.py
+@Date    : 2026-10-21 17:26:40
+@Author  : DDB
+@Version : 1.0
+@Desc    : 分组多空组合模拟: n 日持有期的交错子组合、换手率与交易成本
+'''
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+
+
+def lagged_group_returns(labels:np.ndarray, returns:np.ndarray, n_groups:int, max_lag:int) -> np.ndarray:
+    """第 t 日各组的等权日收益, 分组取自 t-k 日 (k = 1..max_lag)
+
+    Args:
+        labels (np.ndarray): (T, N) 组号, 0 起, -1 为无效
+        returns (np.ndarray): (T, N) 日收益, 第 t 行为 t-1 → t 的收益, NaN (停牌等) 不参与均值
+        n_groups (int): 组数
+
+    Returns:
+        np.ndarray: (max_lag, T, n_groups), 组为空或无持仓时为 NaN
+    """
+    T = labels.shape[0]
+    width = n_groups + 1
+    size = T * width
+    ## 编码 (形成日, 组号) 只算一次, 无效组号归入每行末尾的空位; 各滞后期只是收益行的平移
+    codes = np.arange(T)[:, None] * width + np.where(labels >= 0, labels, n_groups)
+    members = np.bincount(codes.ravel(), minlength=size)
+    missing = np.isnan(returns)
+    filled = np.where(missing, 0.0, returns)
+    miss_rows, miss_cols = np.nonzero(missing)       # 按行有序
+
+    out = np.full((max_lag, T, n_groups), np.nan)
+    for k in range(1, min(max_lag, T - 1) + 1):
+        sums = np.bincount(codes[:-k].ravel(), weights=filled[k:].ravel(), minlength=size)
+        first = np.searchsorted(miss_rows, k)
+        counts = members - np.bincount(codes[miss_rows[first:] - k, miss_cols[first:]], minlength=size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[k - 1, k:] = (sums / counts).reshape(T, width)[:T - k, :n_groups]
+    return out
+
+
+def group_turnover(labels:np.ndarray, n_groups:int, horizons:List[int]) -> Dict[int, np.ndarray]:
+    """交错组合各组的日换手率 {持有期: (T, n_groups)}
+
+    第 s 日收盘时, s-n 日建立的子组合 (资金占 1/n) 换为 s 日的新分组;
+    换手率为 Σ|w_new - w_old| / n (买卖双边, 组内等权), 首个持有期内 w_old 为 0.
+    """
+    T = labels.shape[0]
+    width = n_groups + 1
+    size = T * width
+    labelled = labels >= 0
+    codes = np.arange(T)[:, None] * width + np.where(labelled, labels, n_groups)
+    counts = np.bincount(codes.ravel(), minlength=size)
+    with np.errstate(divide='ignore'):
+        weights = np.where(labelled, 1 / counts[codes], 0.0)
+
+    result = {}
+    for n in horizons:
+        ## 买入新分组 (与旧分组相同的股票只调整权重差), 卖出 n 日前的分组
+        same = labelled[n:] & (labels[n:] == labels[:-n])
+        new_trade = weights.copy()
+        new_trade[n:] = np.where(same, np.abs(weights[n:] - weights[:-n]), weights[n:])
+        old_trade = np.where(same, 0.0, weights[:-n])
+        turnover = np.bincount(codes.ravel(), weights=new_trade.ravel(), minlength=size).reshape(T, width)
+        sold = np.bincount(codes[:-n].ravel(), weights=old_trade.ravel(), minlength=size).reshape(T, width)
+        turnover[n:] += sold[:T - n]      # 按形成日编码, 平移到卖出日
+        result[n] = turnover[:, :n_groups] / n
+    return result
+
+
+def simulate_groups(
+    labels:np.ndarray,
+    returns:np.ndarray,
+    n_groups:int,
+    horizons:List[int] = (1,),
+    cost:float = 0.0,
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """分组组合模拟
+
+    持有期为 n 日时, 资金均分为 n 个子组合, 第 k 个子组合在 t ≡ k (mod n) 的交易日收盘时按当日分组调仓,
+    持有 n 日; 组合日收益为各子组合日收益的均值 (子组合内等权, 尚未建仓的资金视为现金).
+    各持有期共用同一组滞后分组收益.
+
+    Args:
+        labels (np.ndarray): (T, N) 形成日的组号, 0 起, -1 为无效
+        returns (np.ndarray): (T, N) 日收益, 第 t 行为 t-1 → t 的收益
+        n_groups (int): 组数
+        horizons (List[int], optional): 持有期
+        cost (float, optional): 单位换手的交易成本 (如 0.001 即换手 100% 扣 0.1%)
+
+    Returns:
+        Dict[int, Dict[str, np.ndarray]]: {持有期: {'returns': 扣费后日收益, 'turnover': 日换手率, 'nav': 净值}}, 均为 (T, n_groups)
+    """
+    lagged = lagged_group_returns(labels, returns, n_groups, max(horizons))
+    turnovers = group_turnover(labels, n_groups, horizons)
+    result = {}
+    for n in horizons:
+        gross = np.nansum(lagged[:n], axis=0) / n
+        result[n] = apply_cost({'returns': gross, 'turnover': turnovers[n]}, cost)
+    return result
+
+
+def apply_cost(sim:Dict[str, np.ndarray], cost:float) -> Dict[str, np.ndarray]:
+    """由未扣费的模拟结果 (cost=0) 得到给定交易成本下的结果, 调整成本时无需重新模拟"""
+    net = (1 + sim['returns']) * (1 - cost * sim['turnover']) - 1
+    return {'returns': net, 'turnover': sim['turnover'], 'nav': np.cumprod(1 + net, axis=0)}
+
+
+def long_short_nav(
+    sim:Dict[str, np.ndarray],
+    dates:pd.DatetimeIndex,
+    direction:Literal['L-S', 'S-L'] = 'L-S',
+) -> pd.DataFrame:
+    """各组净值与多空对冲净值, 列为组号 (1 起) 与 '<多头>-<空头>', 首行为建仓前一日的 1.0
+
+    多空对冲的日收益为多头组与空头组 (扣费后) 日收益之差; 从未有成分股的组不输出, 全部组都没有时返回空表.
+    """
+    present = np.flatnonzero(sim['turnover'].sum(axis=0) > 0)
+    if len(present) == 0 or len(dates) == 0:
+        return pd.DataFrame(index=pd.DatetimeIndex([]))
+    groups = (present + 1).astype(float)
+    nav = pd.DataFrame(sim['nav'][:, present], index=dates, columns=groups)
+
+    long_i, short_i = (-1, 0) if direction == 'L-S' else (0, -1)
+    hedged_ret = sim['returns'][:, present[long_i]] - sim['returns'][:, present[short_i]]
+    nav[f'{groups[long_i]}-{groups[short_i]}'] = np.cumprod(1 + hedged_ret)
+
+    start_date = dates[0] - pd.Timedelta(days=1)
+    initial_row = pd.DataFrame(1.0, index=[start_date], columns=nav.columns)
+    return pd.concat([initial_row, nav]).round(4)
@@ -0,0 +1,261 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : preprocess.py
+@Date    : 2026-10-22 15:37:52
+@Author  : DDB
+@Version : 1.0
+@Desc    : 因子预处理: 去极值、标准化、中性化 (按日截面批量计算), 各阶段结果缓存到 data/processed
+'''
+
+import os
+import json
+import hashlib
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.factor_calc.panel import PANEL
+from src.factor_calc.rolling import rolling_apply
+from src.data_loader.store import store_stamp
+from src.data_loader.loader import DATA_DIR, FACTOR_DIR, RAW_DIR, load_price
+from src.data_loader.symbols import SYMBOL_META_PATH, load_symbol_meta
+from src.factor_eval.cross_section import rank_rows, sorted_quantiles
+
+
+PROCESSED_DIR = DATA_DIR / "processed"
+SIZE_WINDOW = 20
+
+
+
+## 截面算子: 输入输出均为 (T, N), NaN 保持 NaN
+#--------------------------
+def _row_quantiles(x:np.ndarray, q:List[float]) -> np.ndarray:
+    """按行分位数 (T, K), 一次排序"""
+    T, N = x.shape
+    n = (~np.isnan(x)).sum(axis=1)
+    return sorted_quantiles(np.sort(x, axis=1).ravel(), np.arange(T) * N, n, q)
+
+
+def winsorize_mad(x:np.ndarray, n:float=3.0) -> np.ndarray:
+    """MAD 去极值: 截断到 median ± n × 1.4826 × MAD"""
+    median = _row_quantiles(x, [0.5])
+    mad = _row_quantiles(np.abs(x - median), [0.5]) * 1.4826
+    return np.clip(x, median - n * mad, median + n * mad)
+
+
+def winsorize_quantile(x:np.ndarray, lower:float=0.01, upper:float=0.99) -> np.ndarray:
+    """分位数去极值: 截断到 [lower, upper] 分位"""
+    bounds = _row_quantiles(x, [lower, upper])
+    return np.clip(x, bounds[:, :1], bounds[:, 1:])
+
+
+def zscore(x:np.ndarray) -> np.ndarray:
+    """截面 z-score (ddof=1)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)     # 全 NaN 或单个样本的日期
+        mean = np.nanmean(x, axis=1, keepdims=True)
+        std = np.nanstd(x, axis=1, ddof=1, keepdims=True)
+        return (x - mean) / std
+
+
+def rank_normalize(x:np.ndarray) -> np.ndarray:
+    """截面百分位排名, 映射到 (0, 1]"""
+    n = (~np.isnan(x)).sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return rank_rows(x) / n
+
+
+def neutralize(x:np.ndarray, numeric:List[np.ndarray]=(), categories:np.ndarray=None, chunk:int=256) -> np.ndarray:
+    """截面回归中性化, 返回残差
+
+    每个日期对 [数值暴露, 类别哑变量 (无类别时为截距)] 做 OLS, 只使用因子与暴露均有效的样本;
+    各日期的正规方程按块批量求解 (伪逆, 某类别当日无样本时同样适用).
+
+    Args:
+        x (np.ndarray): (T, N) 因子
+        numeric (List[np.ndarray], optional): (T, N) 数值暴露, 如市值代理
+        categories (np.ndarray, optional): (N,) 类别编码 (0 起), 如板块
+    """
+    T, N = x.shape
+    if categories is None:
+        dummies = np.ones((N, 1))
+    else:
+        dummies = np.eye(categories.max() + 1)[categories]
+    out = np.full(x.shape, np.nan)
+    for start in range(0, T, chunk):
+        rows = slice(start, min(start + chunk, T))
+        y = x[rows]
+        X = np.concatenate(
+            [np.stack([v[rows] for v in numeric], axis=-1) if len(numeric) else np.empty((*y.shape, 0)),
+             np.broadcast_to(dummies, (*y.shape, dummies.shape[1]))], axis=-1
+        )
+        valid = ~np.isnan(y) & np.isfinite(X).all(axis=-1)
+        Xm = np.where(valid[..., None], X, 0.0)
+        ym = np.where(valid, y, 0.0)
+        beta = np.linalg.pinv(np.einsum('tnk,tnl->tkl', Xm, Xm)) @ np.einsum('tnk,tn->tk', Xm, ym)[..., None]
+        out[rows] = np.where(valid, y - np.einsum('tnk,tk->tn', Xm, beta[..., 0]), np.nan)
+    return out
+
+
+
+## 暴露
+#--------------------------
+def size_proxy(panel:PANEL, window:int=SIZE_WINDOW) -> np.ndarray:
+    """市值代理: 过去 window 日平均成交额的对数 (无 amount 时以 close × volume 近似), 截面标准化"""
+    amount = panel.fields['amount'] if 'amount' in panel.fields else panel.close * panel.volume
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean_amount = rolling_apply(amount, window, lambda w: np.nanmean(w, axis=-1))
+        return zscore(np.log(np.where(mean_amount > 0, mean_amount, np.nan)))
+
+
+def board_codes(symbols:pd.Index, meta:pd.DataFrame=None) -> np.ndarray:
+    """各 symbol 的板块编码 (0 起), 元数据中缺失的 symbol 单独一类"""
+    meta = load_symbol_meta() if meta is None else meta
+    boards = pd.Series(meta['board'].to_numpy(), index=meta['symbol']).reindex(symbols)
+    return pd.factorize(boards.fillna(-1), sort=True)[0]
+
+
+
+## 流水线
+#--------------------------
+STEPS = {
+    'mad': winsorize_mad,
+    'quantile': winsorize_quantile,
+    'zscore': zscore,
+    'rank': rank_normalize,
+    'neutralize': None,     # 需要行情与元数据, 由 PREPROCESS 处理
+}
+
+
+class PREPROCESS:
+    '''因子预处理流水线
+
+    Args:
+        steps (List[Tuple[str, Dict]]): 依次执行的步骤与参数, 如
+            [('mad', {'n': 3}), ('zscore', {}), ('neutralize', {'size': True, 'board': True})]
+        root (str, optional): 阶段缓存目录, None 表示不缓存
+
+    各阶段的结果按 (因子, 股票池, 因子写入标记, 行情写入标记, 输入的日期区间, 前 i 个步骤的配置) 缓存为
+    `<root>/<type>/<name>/<board>-<因子标记>-<行情标记>-<区间>-<配置>.parquet`; 行情标记只计入
+    中性化及其后的阶段 (之前的阶段为 '0'), 开关中性化不影响前面阶段的缓存. 只改动后面的步骤时,
+    前面的阶段直接读取缓存. 数据更新后, 同股票池下过期的缓存在下次写入时清理.
+    '''
+    def __init__(
+        self,
+        steps:List[Tuple[str, Dict[str, Any]]],
+        root:str | Path = PROCESSED_DIR,
+        price_root:str | Path = RAW_DIR,
+        factor_root:str | Path = FACTOR_DIR,
+    ):
+        for name, _ in steps:
+            if name not in STEPS:
+                raise KeyError(f'未知的预处理步骤: {name}')
+        self.steps = [(name, dict(params)) for name, params in steps]
+        self.root = Path(root) if root is not None else None
+        self.price_root = price_root
+        self.factor_root = factor_root
+
+
+    def stage_key(self, i:int) -> str:
+        """前 i 个步骤的配置摘要"""
+        config = json.dumps(self.steps[:i], sort_keys=True)
+        return hashlib.blake2b(config.encode(), digest_size=8).hexdigest()
+
+
+    def run(
+        self,
+        factor_df:pd.DataFrame,
+        factor_type:str = None,
+        factor_name:str = None,
+        board:str = 'all',
+        price:pd.DataFrame | PANEL = None,
+    ) -> pd.DataFrame:
+        """执行预处理
+
+        Args:
+            factor_df (pd.DataFrame): 因子
+            factor_type, factor_name (str, optional): 给出时启用阶段缓存
+            board (str, optional): 股票池, 影响截面统计, 计入缓存键
+            price (pd.DataFrame | PANEL, optional): 中性化所需的行情 (amount 或 close/volume), 默认按因子日期读取
+
+        Returns:
+            pd.DataFrame: 与 factor_df 同列名的 MultiIndex(date, symbol) 因子
+        """
+        if not self.steps or factor_df.empty:
+            return factor_df
+        column = factor_df.columns[0]
+        cache_dir = self.root / factor_type / factor_name if self.root is not None and factor_type and factor_name else None
+        if cache_dir is not None:
+            dates = factor_df.index.get_level_values('date')
+            factor_stamp = self._stamp(Path(self.factor_root) / factor_type / factor_name)
+            price_stamp = self._stamp(self.price_root)
+            span = hashlib.blake2b(f'{dates.min()}|{dates.max()}|{len(factor_df)}'.encode(), digest_size=6).hexdigest()
+            stage_path = lambda i: cache_dir / f'{board}-{factor_stamp}-{self._price_tag(i, price_stamp)}-{span}-{self.stage_key(i)}.parquet'
+
+        ## 从最长的已缓存前缀开始
+        done, result = 0, factor_df
+        if cache_dir is not None:
+            for i in range(len(self.steps), 0, -1):
+                path = stage_path(i)
+                if path.is_file():
+                    done, result = i, pd.read_parquet(path)
+                    break
+        if done == len(self.steps):
+            return result
+
+        panel = PANEL.from_data(result, fields=[column])
+        values = panel.fields[column]
+        for i in range(done, len(self.steps)):
+            name, params = self.steps[i]
+            if name == 'neutralize':
+                values = self._neutralize(values, panel, price, **params)
+            else:
+                values = STEPS[name](values, **params)
+            if cache_dir is not None:
+                self._save(panel.to_frame(values, column), stage_path(i + 1), board, factor_stamp, price_stamp)
+        return panel.to_frame(values, column)
+
+
+    def _neutralize(self, values:np.ndarray, panel:PANEL, price:pd.DataFrame | PANEL=None, size:bool=True, board:bool=True) -> np.ndarray:
+        numeric = []
+        if size:
+            if price is None:
+                lookback_start = panel.dates[0] - pd.Timedelta(days=SIZE_WINDOW * 2)
+                price = load_price(lookback_start, panel.dates[-1], symbols=panel.symbols.tolist(), root=self.price_root)
+            price_panel = PANEL.from_data(price, symbols=panel.symbols)
+            exposure = size_proxy(price_panel)
+            ## 对齐到因子日期
+            rows = price_panel.dates.get_indexer(panel.dates)
+            aligned = np.full(values.shape, np.nan)
+            aligned[rows >= 0] = exposure[rows[rows >= 0]]
+            numeric.append(aligned)
+        categories = board_codes(panel.symbols) if board and SYMBOL_META_PATH.exists() else None
+        return neutralize(values, numeric, categories)
+
+
+    def _price_tag(self, i:int, price_stamp:str) -> str:
+        """前 i 个步骤含中性化时依赖行情, 缓存键计入行情标记; 否则为 '0' (行情更新不影响这些阶段)"""
+        return price_stamp if any(name == 'neutralize' for name, _ in self.steps[:i]) else '0'
+
+
+    @staticmethod
+    def _stamp(root:str | Path) -> str:
+        """存储写入标记的摘要"""
+        return hashlib.blake2b(store_stamp(root).encode(), digest_size=6).hexdigest()
+
+
+    @staticmethod
+    def _save(df:pd.DataFrame, path:Path, board:str, factor_stamp:str, price_stamp:str):
+        """写入阶段缓存, 并清理同股票池下已过期的文件 (因子标记不同, 或依赖行情且行情标记不同); 仍有效的其他配置保留"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for old in path.parent.glob(f'{board}-*.parquet'):
+            parts = old.stem.split('-')
+            if len(parts) != 5 or parts[1] != factor_stamp or parts[2] not in ('0', price_stamp):
+                old.unlink(missing_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
@@ -0,0 +1,166 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    : downsample.py
+@Date    : 2026-10-26 09:37:52
+@Author  : DDB
+@Version : 1.0
+@Desc    : 图表序列降采样: 折线 LTTB, K 线 OHLC 聚合; 可见区间内提高分辨率, 点数与序列长度无关
+'''
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+
+MAX_POINTS = 1000       # 折线图每个区间 (可见区间 / 其余部分) 的横轴点数上限
+MAX_CANDLES = 500       # K 线图每个区间的 K 线数上限
+
+## ECharts 缩放事件 -> 可见范围的百分比 [start, end] (滑动条与内置缩放的事件格式不同)
+ZOOM_EVENTS = {
+    'datazoom': "function (params) { var z = params.batch ? params.batch[0] : params; return [z.start, z.end]; }"
+}
+
+
+
+def lttb(y:np.ndarray, n_out:int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets 降采样 (横轴为等距位置)
+
+    首尾点保留, 中间等分为 n_out - 2 个桶, 每桶选与上一个选中点、下一桶均值构成三角形面积最大的点,
+    保留峰谷形态. y 不能含 NaN.
+
+    Returns:
+        np.ndarray: 选中点的位置 (升序)
+    """
+    n = len(y)
+    n_out = max(n_out, 3)
+    if n <= n_out:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)       # 第 i 桶为 [edges[i], edges[i + 1])
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def select_rows(values:np.ndarray, budget:int) -> np.ndarray:
+    """多条序列共用横轴时的行选择: 各序列以 budget // K 个点做 LTTB (跳过 NaN) 后取并集
+
+    Args:
+        values (np.ndarray): (T, K)
+        budget (int): 行数上限
+
+    Returns:
+        np.ndarray: 行位置 (升序, 含首尾)
+    """
+    T, K = values.shape
+    per_series = max(budget // max(K, 1), 3)
+    picks = [np.array([0, T - 1])]
+    for k in range(K):
+        valid = np.flatnonzero(np.isfinite(values[:, k]))
+        if len(valid):
+            picks.append(valid[lttb(values[valid, k], per_series)])
+    return np.unique(np.concatenate(picks))
+
+
+def _window(index:pd.DatetimeIndex, window:Tuple=None) -> Tuple[int, int]:
+    """日期区间 [start, end) 对应的行位置; 未指定或与数据不相交时为全部"""
+    if window is None:
+        return 0, len(index)
+    start, end = window
+    lo = index.searchsorted(pd.Timestamp(start)) if start is not None else 0
+    hi = index.searchsorted(pd.Timestamp(end)) if end is not None else len(index)
+    if hi <= lo:
+        return 0, len(index)
+    return int(lo), int(hi)
+
+
+def downsample_lines(df:pd.DataFrame, budget:int=MAX_POINTS, window:Tuple=None) -> pd.DataFrame:
+    """折线降采样 (各列共用日期轴)
+
+    可见区间 window 内不超过 budget 行时保留全部原始点 (放大后为全分辨率), 否则做 LTTB;
+    区间外按全序列 LTTB 的结果保留, 缩小时仍有完整轮廓. 返回不超过约 2 × budget 行.
+
+    Args:
+        df (pd.DataFrame): 日期索引, 各列为序列
+        window (Tuple, optional): 可见日期区间 [start, end), 端点为 None 表示不限
+    """
+    T = len(df)
+    lo, hi = _window(df.index, window)
+    if hi - lo <= budget and (lo, hi) == (0, T):
+        return df
+
+    values = df.to_numpy(dtype=float)
+    outside = select_rows(values, budget)
+    outside = outside[(outside < lo) | (outside >= hi)]
+    if hi - lo <= budget:
+        inside = np.arange(lo, hi)
+    else:
+        inside = lo + select_rows(values[lo:hi], budget)
+    boundary = [hi] if hi < T else []       # 区间后的首行, 使 zoom_window 能还原出相同的区间终点
+    return df.iloc[np.union1d(np.union1d(outside, inside), boundary).astype(int)]
+
+
+def resample_ohlc(df:pd.DataFrame, k:int) -> pd.DataFrame:
+    """每连续 k 行聚合为一根 K 线 (开 / 收取首尾, 高 / 低取极值), 以桶内首日为索引"""
+    columns = ['open', 'high', 'low', 'close']
+    n = len(df)
+    if k <= 1 or n == 0:
+        return df[columns]
+    starts = np.arange(0, n, k)
+    ends = np.minimum(starts + k, n) - 1
+    return pd.DataFrame({
+        'open': df['open'].to_numpy()[starts],
+        'high': np.fmax.reduceat(df['high'].to_numpy(dtype=float), starts),
+        'low': np.fmin.reduceat(df['low'].to_numpy(dtype=float), starts),
+        'close': df['close'].to_numpy()[ends],
+    }, index=df.index[starts])
+
+
+def downsample_ohlc(df:pd.DataFrame, budget:int=MAX_CANDLES, window:Tuple=None) -> pd.DataFrame:
+    """K 线降采样: 可见区间与区间外分别按 budget 选择聚合周期 (可见区间不超过 budget 行时为日线)
+
+    Args:
+        df (pd.DataFrame): 日期索引, 含 open / high / low / close
+        window (Tuple, optional): 可见日期区间 [start, end)
+    """
+    lo, hi = _window(df.index, window)
+    k_in = -(-(hi - lo) // budget)
+    k_out = -(-(len(df) - (hi - lo)) // budget)
+    parts = [resample_ohlc(df.iloc[:lo], k_out), resample_ohlc(df.iloc[lo:hi], k_in), resample_ohlc(df.iloc[hi:], k_out)]
+    return pd.concat([part for part in parts if len(part)]) if len(df) else df[['open', 'high', 'low', 'close']]
+
+
+def zoom_window(shown:pd.DatetimeIndex, zoom:Sequence[float]) -> Optional[Tuple]:
+    """类目轴图表的缩放百分比换算为日期区间 [start, end); 显示全部时为 None
+
+    Args:
+        shown (pd.DatetimeIndex): 图表当前的横轴日期 (降采样后)
+        zoom (Sequence[float]): ZOOM_EVENTS 返回的 [start, end] 百分比
+    """
+    n = len(shown)
+    if n < 2 or zoom is None or None in zoom:
+        return None
+    start, end = zoom
+    if start <= 0 and end >= 100:
+        return None
+    lo = int(round(start / 100 * (n - 1)))       # 与 zoom_range 互逆, 重新渲染后区间不漂移
+    hi = int(round(end / 100 * (n - 1)))
+    return shown[lo], shown[hi + 1] if hi + 1 < n else None
+
+
+def zoom_range(shown:pd.DatetimeIndex, window:Tuple=None) -> Tuple[float, float]:
+    """日期区间在降采样后横轴上的百分比位置, 用于重新渲染后保持缩放"""
+    n = len(shown)
+    lo, hi = _window(shown, window)
+    if n < 2 or (lo, hi) == (0, n):
+        return 0.0, 100.0
+    return 100 * lo / (n - 1), 100 * (hi - 1) / (n - 1)
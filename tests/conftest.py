@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _make_price(n_dates=150, n_symbols=8, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-01-01', periods=n_dates, name='date')
+    symbols = pd.Index([f's{i}' for i in range(n_symbols)], name='symbol')
+    index = pd.MultiIndex.from_product([dates, symbols])
+    close = 10 * np.exp(0.02 * rng.standard_normal((n_dates, n_symbols)).cumsum(axis=0)).ravel()
+    data = pd.DataFrame({
+        'open': close * (1 + 0.01 * rng.standard_normal(len(close))),
+        'high': close * 1.02,
+        'low': close * 0.98,
+        'close': close,
+        'volume': rng.integers(1_000, 10_000, len(close)).astype(float),
+    }, index=index)
+    ## s1 停牌一段时间, s0 晚上市
+    dates_level = data.index.get_level_values('date')
+    symbols_level = data.index.get_level_values('symbol')
+    drop = ((symbols_level == 's1') & (dates_level >= dates[40]) & (dates_level < dates[50])) | \
+           ((symbols_level == 's0') & (dates_level < dates[20]))
+    return data[~drop]
+
+
+@pytest.fixture
+def make_price():
+    """合成行情 (MultiIndex(date, symbol), OHLCV), 含停牌与晚上市的 symbol"""
+    return _make_price
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from src.data_loader.loader import factor_store
+from src.data_loader.store import PARQUET_STORE, store_stamp
+from src.factor_eval.artifacts import EVAL_ARTIFACTS
+
+
+def make_stores(tmp_path, n_dates=20, n_symbols=5):
+    index = pd.MultiIndex.from_product(
+        [pd.bdate_range('2024-01-01', periods=n_dates), [f's{i}' for i in range(n_symbols)]], names=['date', 'symbol']
+    )
+    price = pd.DataFrame({'close': np.linspace(10, 20, len(index))}, index=index)
+    factor_df = pd.DataFrame({'f': np.arange(len(index), dtype=float)}, index=index)
+    PARQUET_STORE(tmp_path / 'raw').write(price)
+    factor_store('t', 'f', tmp_path / 'factors').write(factor_df)
+    return price, factor_df
+
+
+def test_covers_requires_current_store_stamps(tmp_path):
+    price, factor_df = make_stores(tmp_path)
+    roots = dict(price_root=tmp_path / 'raw', factor_root=tmp_path / 'factors')
+    artifacts = EVAL_ARTIFACTS(tmp_path / 'eval')
+    meta = {
+        'ret_nd': [1, 5], 'quantile': 10, 'bins': None, 'n_groups': 10, 'symbols': [],
+        'price_stamp': store_stamp(tmp_path / 'raw'), 'factor_stamp': store_stamp(tmp_path / 'factors' / 't' / 'f'),
+    }
+    artifacts.write('t', 'f', 'all', {}, {}, meta)
+    assert artifacts.covers('t', 'f', 'all', [1], quantile=10, **roots)
+    assert not artifacts.covers('t', 'f', 'all', [1, 10], **roots)
+
+    ## 追加新日期后, 行情或因子任一写入标记变化即视为过期
+    new_dates = pd.MultiIndex.from_product([[pd.Timestamp('2024-02-01')], ['s0']], names=['date', 'symbol'])
+    factor_store('t', 'f', tmp_path / 'factors').append(pd.DataFrame({'f': [0.0]}, index=new_dates))
+    assert not artifacts.covers('t', 'f', 'all', [1], **roots)
+    artifacts.write('t', 'f', 'all', {}, {}, dict(meta, factor_stamp=store_stamp(tmp_path / 'factors' / 't' / 'f')))
+    assert artifacts.covers('t', 'f', 'all', [1], **roots)
+    PARQUET_STORE(tmp_path / 'raw').append(pd.DataFrame({'close': [10.0]}, index=new_dates))
+    assert not artifacts.covers('t', 'f', 'all', [1], **roots)
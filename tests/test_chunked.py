@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader.loader import factor_store
+from src.data_loader.store import PARQUET_STORE
+from src.factor_eval.chunked import CHUNKED_EVALUATION
+from src.factor_eval.get_eval import EVALUATION
+
+
+RET_ND = [1, 5, 10]
+
+
+@pytest.fixture
+def stores(tmp_path, make_price):
+    price = make_price(n_dates=120, n_symbols=30)
+    rng = np.random.default_rng(1)
+    factor = pd.DataFrame({'f': rng.standard_normal(len(price))}, index=price.index)
+    factor = factor[rng.random(len(factor)) > 0.05]         # 部分缺失
+    PARQUET_STORE(tmp_path / 'raw').write(price)
+    factor_store('t', 'f', tmp_path / 'factors').write(factor)
+    return price, factor, dict(price_root=tmp_path / 'raw', factor_root=tmp_path / 'factors')
+
+
+@pytest.mark.parametrize('chunk_days', [7, 30, 1000])
+@pytest.mark.parametrize('group', [dict(quantile=5, bins=None), dict(quantile=None, bins=4)])
+def test_chunked_matches_in_memory(stores, chunk_days, group):
+    price, factor, roots = stores
+    expected = EVALUATION(price[['close']], factor, RET_ND, cache=None)
+    chunked = CHUNKED_EVALUATION('t', 'f', RET_ND, chunk_days=chunk_days, **roots)
+
+    for method in ['pearson', 'spearman']:
+        pd.testing.assert_frame_equal(chunked.calc_daily_IC(method), expected.calc_daily_IC(method))
+    describe, grouped, counts = chunked.calc_grouped(**group, return_counts=True)
+    expected_describe, expected_grouped, expected_counts = expected.calc_grouped(**group, return_counts=True)
+    pd.testing.assert_frame_equal(describe, expected_describe)
+    pd.testing.assert_frame_equal(grouped, expected_grouped)
+    pd.testing.assert_frame_equal(counts, expected_counts)
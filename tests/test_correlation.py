@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader.loader import factor_store
+from src.data_loader.store import PARQUET_STORE
+from src.factor_eval.correlation import FACTOR_CORR
+from src.factor_eval.forward_ret import FORWARD_RET
+
+
+@pytest.fixture
+def roots(tmp_path, monkeypatch):
+    monkeypatch.setattr(FORWARD_RET, 'cache_dir', tmp_path / 'forward_ret')
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product(
+        [pd.bdate_range('2024-01-01', '2024-04-30'), [f's{i}' for i in range(10)]], names=['date', 'symbol']
+    )
+    PARQUET_STORE(tmp_path / 'raw').write(pd.DataFrame({'close': 10 + rng.random(len(index))}, index=index))
+    for name in ['a', 'b', 'c']:
+        factor_store('t', name, tmp_path / 'factors').write(pd.DataFrame({name: rng.standard_normal(len(index))}, index=index))
+    return dict(root=tmp_path / 'corr', price_root=tmp_path / 'raw', factor_root=tmp_path / 'factors')
+
+
+def test_cache_keyed_by_trading_dates(roots):
+    first = FACTOR_CORR('2024-01-01', '2024-04-30', **roots).run()
+    ## 结束日期晚于最后交易日 (如取今天) 时仍命中同一缓存目录, 不重新计算
+    engine = FACTOR_CORR('2023-12-30', '2030-01-01', **roots)
+    assert engine.dir == FACTOR_CORR('2024-01-01', '2024-04-30', **roots).dir
+    engine._prepare = lambda key: pytest.fail('不应重新计算')
+    again = engine.run()
+    for name in ['pearson', 'rank', 'ic']:
+        pd.testing.assert_frame_equal(again[name], first[name])
+    assert [p.name for p in roots['root'].iterdir()] == [engine.dir.name]
+
+
+def test_old_ranges_are_pruned(roots):
+    for end in ['2024-01-31', '2024-02-29', '2024-03-29', '2024-04-30']:
+        FACTOR_CORR('2024-01-01', end, keep_versions=2, **roots).run()
+    assert sorted(p.name for p in roots['root'].iterdir()) == ['all_20240101_20240329_1d', 'all_20240101_20240430_1d']
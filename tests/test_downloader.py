@@ -0,0 +1,108 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader.downloader import DOWNLOADER, RATE_LIMITER
+
+
+def stub_history(latency:float=0.0, fail_times:int=0, seed:int=0):
+    """本地 history 桩函数: 返回与掘金 history 同格式的数据, 记录每次调用; 每个分片前 fail_times 次调用失败"""
+    rng = np.random.default_rng(seed)
+    lock = threading.Lock()
+    calls, failures = [], {}
+
+    def history(symbol, frequency='1d', start_time=None, end_time=None, adjust=1, df=True):
+        symbols = symbol.split(',') if isinstance(symbol, str) else list(symbol)
+        key = (tuple(symbols), start_time, end_time)
+        with lock:
+            calls.append((time.monotonic(), key))
+            failures[key] = failures.get(key, 0) + 1
+            failed = failures[key] <= fail_times
+            delay = latency * rng.random()
+        time.sleep(delay)
+        if failed:
+            raise ConnectionError('stub failure')
+        dates = pd.bdate_range(start_time, end_time)
+        frame = pd.MultiIndex.from_product([dates, symbols], names=['eob', 'symbol']).to_frame(index=False)
+        frame['eob'] = frame['eob'].dt.tz_localize('Asia/Shanghai')
+        frame['bob'] = frame['eob']
+        frame['frequency'] = frequency
+        frame['position'] = 0
+        codes = frame['symbol'].str[-3:].astype(int)
+        frame['close'] = codes + frame['eob'].dt.dayofyear / 1000      # 可由 (date, symbol) 还原, 用于检查错位
+        frame['open'] = frame['high'] = frame['low'] = frame['close']
+        frame['volume'] = 1e6
+        return frame
+
+    history.calls = calls
+    return history
+
+
+SYMBOLS = [f'SHSE.{600000 + i}' for i in range(23)]
+
+
+def expected_index(start='2024-01-01', end='2024-03-31'):
+    return pd.MultiIndex.from_product([pd.bdate_range(start, end), SYMBOLS], names=['date', 'symbol']).sort_values()
+
+
+def test_shards_cover_each_symbol_and_date_once():
+    loader = DOWNLOADER(stub_history(), symbols_per_shard=5, rate_limit=None)
+    shards = loader.make_shards(SYMBOLS, '2024-01-01', '2024-03-31', split=4)
+    assert len(shards) == 5 * 4
+    cells = [(d, s) for symbols, start, end in shards for d in pd.date_range(start, end) for s in symbols]
+    assert len(cells) == len(set(cells)) == len(pd.date_range('2024-01-01', '2024-03-31')) * len(SYMBOLS)
+
+
+def test_run_returns_sorted_complete_data():
+    history = stub_history(latency=0.02)
+    loader = DOWNLOADER(history, max_workers=8, symbols_per_shard=4, rate_limit=None)
+    data = loader.run(SYMBOLS, '2024-01-01', '2024-03-31', split=3, progress=False)
+    assert data.index.equals(expected_index())
+    codes = data.index.get_level_values('symbol').str[-3:].astype(int)
+    np.testing.assert_allclose(data['close'], codes + data.index.get_level_values('date').dayofyear / 1000)
+    assert not {'frequency', 'position', 'bob'} & set(data.columns)
+
+
+def test_save_dir_parts_in_shard_order(tmp_path):
+    loader = DOWNLOADER(stub_history(latency=0.02), max_workers=8, symbols_per_shard=4, rate_limit=None)
+    paths = loader.run(SYMBOLS, '2024-01-01', '2024-03-31', split=3, save_dir=tmp_path, progress=False)
+    assert [p.name for p in paths] == [f'part-{i:05d}.parquet' for i in range(len(paths))]
+    assert not list(tmp_path.glob('*.tmp'))
+    data = pd.concat([pd.read_parquet(p) for p in paths]).sort_index()
+    assert data.index.equals(expected_index())
+
+
+def test_failed_shards_are_retried():
+    history = stub_history(fail_times=2)
+    loader = DOWNLOADER(history, symbols_per_shard=10, max_retries=2, backoff=0.0, rate_limit=None)
+    data = loader.run(SYMBOLS, '2024-01-01', '2024-03-31', progress=False)
+    assert data.index.equals(expected_index())
+    assert len(history.calls) == 3 * len(loader.make_shards(SYMBOLS, '2024-01-01', '2024-03-31'))
+
+
+def test_retries_exhausted_raises():
+    loader = DOWNLOADER(stub_history(fail_times=3), max_retries=2, backoff=0.0, rate_limit=None)
+    with pytest.raises(ConnectionError):
+        loader.run(SYMBOLS, '2024-01-01', '2024-01-31', progress=False)
+
+
+def test_rate_limit_spaces_requests():
+    rate = 50.0
+    history = stub_history()
+    loader = DOWNLOADER(history, max_workers=8, symbols_per_shard=1, rate_limit=rate)
+    loader.run(SYMBOLS, '2024-01-01', '2024-01-10', progress=False)
+    times = np.sort([t for t, _ in history.calls])
+    assert len(times) == len(SYMBOLS)
+    ## 并发 8 线程下, 请求仍按 1 / rate 的间隔发出
+    assert times[-1] - times[0] >= (len(times) - 1) / rate * 0.95
+
+
+def test_rate_limiter_disabled():
+    limiter = RATE_LIMITER(None)
+    t0 = time.monotonic()
+    for _ in range(100):
+        limiter.wait()
+    assert time.monotonic() - t0 < 0.05
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.downsample import downsample_lines, downsample_ohlc, lttb, select_rows, zoom_range, zoom_window
+
+
+@pytest.fixture
+def ohlc():
+    rng = np.random.default_rng(0)
+    close = 10 * np.exp(0.01 * rng.standard_normal(5000).cumsum())
+    index = pd.bdate_range('2000-01-03', periods=len(close))
+    return pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close}, index=index)
+
+
+@pytest.mark.parametrize('downsample', [downsample_ohlc, downsample_lines])
+@pytest.mark.parametrize('bounds', [(3000, 3200), (0, 1500), (4000, None), (10, 4990)])
+def test_zoom_round_trip(ohlc, downsample, bounds):
+    """缩放百分比与日期区间互逆: 反复重新渲染, 可见区间保持不变"""
+    idx = ohlc.index
+    window = (idx[bounds[0]], idx[bounds[1]] if bounds[1] is not None else None)
+    for _ in range(3):
+        shown = downsample(ohlc, window=window).index
+        again = zoom_window(shown, zoom_range(shown, window))
+        assert again == window
+        window = again
+
+
+def test_zoom_full_range(ohlc):
+    shown = downsample_ohlc(ohlc).index
+    assert zoom_range(shown) == (0.0, 100.0)
+    assert zoom_window(shown, [0, 100]) is None
+    assert zoom_window(shown, [None, None]) is None
+
+
+def test_lttb_short_series_kept():
+    y = np.arange(5.0)
+    np.testing.assert_array_equal(lttb(y, 5), np.arange(5))
+    np.testing.assert_array_equal(lttb(y, 10), np.arange(5))
+
+
+def test_lttb_keeps_ends_and_extremes():
+    y = np.zeros(1000)
+    y[377], y[612] = 5.0, -5.0
+    picked = lttb(y, 50)
+    assert len(picked) == 50 and picked[0] == 0 and picked[-1] == 999
+    assert np.all(np.diff(picked) > 0)
+    assert {377, 612} <= set(picked)
+
+
+def test_nan_columns():
+    """全 NaN 的列不参与选点, 部分 NaN 的列只在有效点上选点"""
+    T = 3000
+    values = np.column_stack([np.sin(np.arange(T) / 50), np.full(T, np.nan), np.where(np.arange(T) < 1000, np.nan, 1.0)])
+    rows = select_rows(values, 300)
+    assert rows[0] == 0 and rows[-1] == T - 1 and np.all(np.diff(rows) > 0)
+
+    df = pd.DataFrame(values, index=pd.bdate_range('2010-01-01', periods=T), columns=['a', 'b', 'c'])
+    out = downsample_lines(df, budget=300)
+    assert len(out) <= 2 * 300 and out.index.is_monotonic_increasing
+    assert out['b'].isna().all()
+    assert 1000 in set(df.index.get_indexer(out.index))     # 部分缺失列的首个有效点保留
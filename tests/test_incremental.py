@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader.loader import factor_store
+from src.data_loader.store import PARQUET_STORE
+from src.factor_calc.get_factor import update_factors
+from src.factor_calc.panel import PANEL
+from src.factor_calc.registry import EXECUTOR, FACTOR_REGISTRY
+
+
+def assert_same(result, expected):
+    result, expected = result.sort_index(), expected.sort_index()
+    assert result.index.equals(expected.index)
+    np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+
+
+def assert_store_matches_full(price_root, factor_root):
+    full = EXECUTOR(PARQUET_STORE(price_root).read()).run()
+    for (factor_type, factor_name), expected in full.items():
+        assert_same(factor_store(factor_type, factor_name, factor_root).read(), expected)
+
+
+def test_tail_matches_full(make_price):
+    """只用回看窗口内的尾部行情计算最后几个日期, 与全量结果逐位一致"""
+    panel = PANEL.from_data(make_price())
+    full = EXECUTOR(panel).run()
+    first_new = panel.shape[0] - 5
+    for key in FACTOR_REGISTRY.factors():
+        start = max(first_new - FACTOR_REGISTRY.lookback(key), 0)
+        (factor_type, factor_name), tail = next(EXECUTOR(panel.slice(start)).iter_run([key]))
+        new_date = panel.dates[first_new]
+        tail = tail[tail.index.get_level_values('date') >= new_date]
+        expected = full[(factor_type, factor_name)]
+        assert_same(tail, expected[expected.index.get_level_values('date') >= new_date])
+
+
+def test_update_appends_new_dates(tmp_path, make_price):
+    data = make_price()
+    dates = data.index.get_level_values('date')
+    split = dates.unique()[120]
+    price_store = PARQUET_STORE(tmp_path / 'raw')
+    price_store.append(data[dates < split])
+    update_factors(tmp_path / 'raw', tmp_path / 'factors')
+
+    price_store.append(data[dates >= split])
+    appended = update_factors(tmp_path / 'raw', tmp_path / 'factors')
+    assert appended[('momentum', 'slope_5')] > 0
+    assert_store_matches_full(tmp_path / 'raw', tmp_path / 'factors')
+
+
+@pytest.mark.parametrize('explicit', [False, True])
+def test_update_recomputes_replaced_symbols(tmp_path, explicit, make_price):
+    """复权变化后整体替换历史的 symbol, 其因子全历史与全量重算一致"""
+    data = make_price()
+    dates = data.index.get_level_values('date')
+    split = dates.unique()[120]
+    price_store = PARQUET_STORE(tmp_path / 'raw')
+    price_store.append(data[dates < split])
+    update_factors(tmp_path / 'raw', tmp_path / 'factors')
+
+    ## 新日期 + s1 / s3 复权变化 (全历史价格改变)
+    adjusted = ['s1', 's3']
+    symbols = data.index.get_level_values('symbol')
+    price_store.append(data[(dates >= split) & ~symbols.isin(adjusted)])
+    history = data[symbols.isin(adjusted)].copy()
+    history[['open', 'high', 'low', 'close']] *= np.linspace(0.8, 1.0, len(history))[:, None]
+    if not explicit:
+        price_store.mark_replaced(adjusted)
+    price_store.replace_symbols(history, adjusted)
+
+    update_factors(tmp_path / 'raw', tmp_path / 'factors', adjusted=adjusted if explicit else None)
+    assert_store_matches_full(tmp_path / 'raw', tmp_path / 'factors')
+    assert price_store.replaced_symbols() == []
+
+
+def test_update_reads_only_tail_dates(tmp_path, monkeypatch, make_price):
+    """已有存储时不读取行情与因子存储的全部索引"""
+    data = make_price(n_dates=400)
+    dates = data.index.get_level_values('date')
+    split = dates.unique()[390]
+    price_store = PARQUET_STORE(tmp_path / 'raw')
+    price_store.append(data[dates < split])
+    update_factors(tmp_path / 'raw', tmp_path / 'factors')
+    price_store.append(data[dates >= split])
+
+    starts = []
+    read_dates = PARQUET_STORE.dates
+    def dates_spy(self, start_date=None, end_date=None):
+        starts.append(start_date)
+        return read_dates(self, start_date, end_date)
+    monkeypatch.setattr(PARQUET_STORE, 'dates', dates_spy)
+    update_factors(tmp_path / 'raw', tmp_path / 'factors')
+    assert starts and None not in starts
+    monkeypatch.undo()
+    assert_store_matches_full(tmp_path / 'raw', tmp_path / 'factors')
@@ -0,0 +1,76 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from src.factor_eval.jobs import JOB_MANAGER, report
+
+
+def flaky(marker:str) -> str:
+    """第一次调用失败, 之后成功"""
+    path = Path(marker)
+    if not path.exists():
+        path.touch()
+        raise RuntimeError('transient')
+    return 'ok'
+
+
+def gated(gate:str) -> str:
+    """回报一次进度后等待 gate 文件出现, 再回报一次"""
+    report(0.1, 'started')
+    while not Path(gate).exists():
+        time.sleep(0.01)
+    report(0.9, 'finishing')
+    return 'ok'
+
+
+def wait(jobs:JOB_MANAGER, key:str, timeout:float=60) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = jobs.status(key)
+        if status['state'] not in ('pending', 'running'):
+            return status
+        time.sleep(0.05)
+    raise TimeoutError(key)
+
+
+@pytest.fixture
+def jobs():
+    manager = JOB_MANAGER(max_workers=1)
+    yield manager
+    manager.shutdown()
+
+
+def test_failed_job_is_resubmitted(jobs, tmp_path):
+    marker = str(tmp_path / 'marker')
+    jobs.submit('k', flaky, owner='a', marker=marker)
+    status = wait(jobs, 'k')
+    assert status['state'] == 'failed' and 'transient' in status['error']
+
+    jobs.submit('k', flaky, owner='a', marker=marker)
+    assert wait(jobs, 'k')['state'] == 'done'
+    assert jobs.result('k') == 'ok'
+
+
+def test_finished_job_is_shared(jobs, tmp_path):
+    marker = tmp_path / 'marker'
+    marker.touch()
+    jobs.submit('k', flaky, owner='a', marker=str(marker))
+    assert wait(jobs, 'k')['state'] == 'done'
+    marker.unlink()         # 再次执行会失败; 复用时不会再执行
+    jobs.submit('k', flaky, owner='b', marker=str(marker))
+    assert jobs.status('k')['state'] == 'done'
+
+
+def test_cancelled_running_job_is_reclaimed(jobs, tmp_path):
+    gate = tmp_path / 'gate'
+    jobs.submit('k', gated, owner='a', gate=str(gate))
+    deadline = time.time() + 60
+    while jobs.status('k')['state'] != 'running':
+        assert time.time() < deadline
+        time.sleep(0.01)
+    jobs.release('k', owner='a')        # 取消标志已设置, 任务尚未中止
+    jobs.submit('k', gated, owner='a', gate=str(gate))
+    gate.touch()
+    assert wait(jobs, 'k')['state'] == 'done'
+    assert jobs.result('k') == 'ok'
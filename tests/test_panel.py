@@ -0,0 +1,55 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.factor_calc.panel import PANEL
+
+
+def _close_sum(meta):
+    panel, handles = PANEL.from_shared(meta)
+    total = float(np.nansum(panel.close))
+    del panel
+    for shm in handles:
+        shm.close()
+    return total
+
+
+@pytest.fixture
+def shared():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2024-01-01', periods=40, name='date')
+    symbols = pd.Index([f's{i}' for i in range(5)], name='symbol')
+    panel = PANEL(dates, symbols, {'close': rng.random((40, 5)), 'volume': rng.random((40, 5))})
+    meta, handles = panel.to_shared()
+    yield panel, meta, handles
+    for shm in handles:
+        shm.close()
+        shm.unlink()
+
+
+def test_from_shared_does_not_register(shared, monkeypatch):
+    panel, meta, _ = shared
+    registered = []
+    monkeypatch.setattr(resource_tracker, 'register', lambda name, rtype: registered.append((name, rtype)))
+    attached, handles = PANEL.from_shared(meta)
+    np.testing.assert_array_equal(attached.close, panel.close)
+    assert not attached.close.flags.writeable
+    assert registered == []
+    del attached
+    for shm in handles:
+        shm.close()
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_segments_survive_worker_exit(shared, method):
+    panel, meta, handles = shared
+    with ProcessPoolExecutor(max_workers=2, mp_context=mp.get_context(method)) as pool:
+        totals = list(pool.map(_close_sum, [meta] * 4))
+    assert totals == [pytest.approx(float(np.nansum(panel.close)))] * 4
+    ## 子进程退出后, 创建方的段仍完整可读
+    for (field, (_, shape, dtype)), shm in zip(meta['fields'].items(), handles):
+        np.testing.assert_array_equal(np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf), panel.fields[field])
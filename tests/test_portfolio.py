@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from src.factor_eval.portfolio import long_short_nav, simulate_groups
+
+
+def test_long_short_nav():
+    rng = np.random.default_rng(0)
+    labels = rng.integers(-1, 3, (30, 20))
+    labels = np.where(labels == 1, 2, labels)        # 第 2 组从未有成分股
+    sim = simulate_groups(labels, 0.01 * rng.standard_normal((30, 20)), 3, [1])[1]
+    dates = pd.bdate_range('2024-01-01', periods=30)
+    nav = long_short_nav(sim, dates)
+    assert list(nav.columns) == [1.0, 3.0, '3.0-1.0']
+    assert len(nav) == 31 and (nav.iloc[0] == 1.0).all()
+    assert list(long_short_nav(sim, dates, 'S-L').columns)[-1] == '1.0-3.0'
+
+
+def test_long_short_nav_without_members():
+    """股票池内没有成分 (全部组号无效) 时返回空表"""
+    sim = simulate_groups(np.full((30, 20), -1), np.zeros((30, 20)), 3, [1])[1]
+    nav = long_short_nav(sim, pd.bdate_range('2024-01-01', periods=30))
+    assert nav.empty
+    turnover = pd.Series(sim['turnover'].mean(axis=0), index=np.arange(1, 4, dtype=float))
+    assert turnover.loc[nav.columns[:-1]].empty
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from src.data_loader.loader import factor_store
+from src.data_loader.store import PARQUET_STORE
+from src.factor_eval import preprocess
+from src.factor_eval.preprocess import PREPROCESS
+
+
+def make_data(tmp_path, n_dates=30, n_symbols=20, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.MultiIndex.from_product(
+        [pd.bdate_range('2024-01-01', periods=n_dates), [f's{i:02d}' for i in range(n_symbols)]], names=['date', 'symbol']
+    )
+    close = 10 + rng.random(len(index))
+    price = pd.DataFrame({'close': close, 'volume': rng.integers(1_000, 10_000, len(index)).astype(float)}, index=index)
+    PARQUET_STORE(tmp_path / 'raw').write(price)
+    factor_df = pd.DataFrame({'f': rng.standard_normal(len(index))}, index=index)
+    factor_store('t', 'f', tmp_path / 'factors').write(factor_df)
+    return price, factor_df
+
+
+def test_toggling_neutralize_reuses_earlier_stages(tmp_path, monkeypatch):
+    price, factor_df = make_data(tmp_path)
+    roots = dict(root=tmp_path / 'processed', price_root=tmp_path / 'raw', factor_root=tmp_path / 'factors')
+    base = [('mad', {'n': 3.0}), ('zscore', {})]
+    neutralized = base + [('neutralize', {'size': True, 'board': False})]
+
+    plain = PREPROCESS(base, **roots).run(factor_df, 't', 'f', price=price)
+    PREPROCESS(neutralized, **roots).run(factor_df, 't', 'f', price=price)
+    files = {p.name for p in (tmp_path / 'processed' / 't' / 'f').glob('*.parquet')}
+    assert len(files) == 3
+
+    ## 切回不含中性化的配置: 不重新计算, 已有缓存也不被删除
+    def fail(*args, **kwargs):
+        raise AssertionError('不应重新计算')
+    monkeypatch.setitem(preprocess.STEPS, 'mad', fail)
+    monkeypatch.setitem(preprocess.STEPS, 'zscore', fail)
+    again = PREPROCESS(base, **roots).run(factor_df, 't', 'f', price=price)
+    pd.testing.assert_frame_equal(again, plain)
+    assert {p.name for p in (tmp_path / 'processed' / 't' / 'f').glob('*.parquet')} == files
+
+
+def test_price_update_only_invalidates_neutralize_stages(tmp_path):
+    price, factor_df = make_data(tmp_path)
+    roots = dict(root=tmp_path / 'processed', price_root=tmp_path / 'raw', factor_root=tmp_path / 'factors')
+    steps = [('zscore', {}), ('neutralize', {'size': True, 'board': False})]
+    PREPROCESS(steps, **roots).run(factor_df, 't', 'f', price=price)
+
+    PARQUET_STORE(tmp_path / 'raw').append(price.iloc[:5])      # 行情写入标记改变
+    PREPROCESS(steps, **roots).run(factor_df, 't', 'f', price=price)
+    tags = sorted(p.stem.split('-')[2] for p in (tmp_path / 'processed' / 't' / 'f').glob('*.parquet'))
+    assert len(tags) == 2 and tags[0] == '0'